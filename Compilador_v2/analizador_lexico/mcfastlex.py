@@ -0,0 +1,314 @@
+# mcfastlex.py
+'''
+Motor Léxico de una sola pasada
+-------------------------------
+
+Alternativa a sly para las reglas de mclex.Lexer. Todas las reglas se
+compilan en una única expresión regular que se recorre con finditer:
+
+  [ignore]* (IDENT | literales seguras | reglas de Lexer | literales | error)
+
+Los caracteres ignorados se consumen como prefijo de cada coincidencia
+y las alternativas más frecuentes (IDENT y las literales que no pueden
+confundirse con ninguna regla) se prueban primero. Una alternativa solo
+se adelanta si su conjunto de primeros caracteres es disjunto del de
+todas las reglas que la preceden, así que el resultado es el mismo que
+con el orden de sly.
+
+Los saltos de línea también se consumen en el prefijo: la línea de cada
+token se obtiene de la tabla de inicios de línea (mclines.LineIndex),
+que solo se consulta cuando un token empieza después del inicio de la
+siguiente línea. Las palabras reservadas se resuelven con una sola
+búsqueda en el diccionario de remapeo de IDENT; los comentarios y las
+literales numéricas se resuelven en línea. Solo las reglas con lógica
+propia (STRING, literales mal formadas, errores) llaman a la función de
+Lexer.
+
+Produce los mismos tokens (type, value, lineno, index, end) que
+Lexer.tokenize; tests/test_lexer.py y bench/bench_lexer.py comparan
+ambos motores. Como en sly, un salto de línea dentro de una cadena no
+cuenta para la línea de los tokens siguientes: la línea de la tabla se
+corrige restando los saltos de las cadenas ya leídas.
+'''
+from bisect      import bisect_right
+from collections import namedtuple
+import re
+import sys
+
+try:
+    import re._parser as _parser
+    import re._constants as _const
+except ImportError:     # Python < 3.11
+    import sre_parse as _parser
+    import sre_constants as _const
+
+import sly
+
+from .mclex   import Lexer
+from .mclines import LineIndex
+
+Token = namedtuple('Token', ['type', 'value', 'lineno', 'index', 'end'])
+
+# Reglas ignoradas cuya función solo cuenta los saltos de línea
+# (la línea sale de la tabla, así que basta con descartarlas)
+_line_rules = {'newline', 'cppcomment', 'comment'}
+
+# Caracteres que se agregan a 'ignore' por el mismo motivo
+_line_chars = '\n'
+
+# Reglas cuya función solo convierte el lexema
+_value_rules = {'INT_LIT': int, 'FLOAT_LIT': float}
+
+# Reglas que conviene probar primero si el orden lo permite
+_hot_rules = ['IDENT']
+
+
+# ---------------------------------------------------------------------
+# Conjunto de primeros caracteres de una expresión regular.
+# None significa "cualquier carácter" (análisis conservador).
+# ---------------------------------------------------------------------
+def _first_chars(pattern, flags=0):
+    try:
+        chars, nullable = _first_seq(_parser.parse(pattern, flags))
+    except Exception:
+        return None
+    return None if nullable else chars
+
+
+def _first_seq(items):
+    result = set()
+    for op, av in items:
+        chars, nullable = _first_item(op, av)
+        if chars is None:
+            return None, True
+        result |= chars
+        if not nullable:
+            return result, False
+    return result, True
+
+
+def _first_item(op, av):
+    if op is _const.LITERAL:
+        return {chr(av)}, False
+    if op is _const.IN:
+        chars = set()
+        for iop, iav in av:
+            if iop is _const.LITERAL:
+                chars.add(chr(iav))
+            elif iop is _const.RANGE and iav[1] - iav[0] < 256:
+                chars.update(chr(c) for c in range(iav[0], iav[1] + 1))
+            elif iop is _const.CATEGORY and iav is _const.CATEGORY_DIGIT:
+                chars.update('0123456789')
+            else:
+                return None, True
+        return chars, False
+    if op is _const.SUBPATTERN:
+        return _first_seq(av[-1])
+    if op is _const.BRANCH:
+        chars, nullable = set(), False
+        for branch in av[1]:
+            bchars, bnull = _first_seq(branch)
+            if bchars is None:
+                return None, True
+            chars |= bchars
+            nullable = nullable or bnull
+        return chars, nullable
+    if op in (_const.MAX_REPEAT, _const.MIN_REPEAT):
+        chars, nullable = _first_seq(av[2])
+        return chars, nullable or av[0] == 0
+    if op in (_const.ASSERT, _const.ASSERT_NOT, _const.AT):
+        return set(), True
+    return None, True
+
+
+def _build_master(lexer_cls):
+    '''
+    Construye la expresión maestra y retorna (regex, nombre de cada grupo).
+    '''
+    flags = lexer_cls.reflags
+    rules = [(name, f'(?P<{name}>{pattern})') for name, pattern in _rules(lexer_cls)]
+    firsts = [_first_chars(part, flags) for _, part in rules]
+
+    def movable(i):
+        # Se puede adelantar si ninguna regla anterior comparte primer carácter
+        if firsts[i] is None:
+            return False
+        return all(f is not None and not (f & firsts[i]) for f in firsts[:i])
+
+    # Solo se resuelven en línea las reglas sin función propia
+    hot = [i for i, (name, _) in enumerate(rules)
+           if name in _hot_rules and name not in lexer_cls._token_funcs and movable(i)]
+    parts = [rules[i][1] for i in hot]
+
+    # Las literales que ninguna regla puede reclamar van al frente
+    rule_chars = set()
+    for f in firsts:
+        rule_chars |= f if f is not None else set(lexer_cls.literals)
+    safe = ''.join(re.escape(c) for c in lexer_cls.literals if c not in rule_chars)
+    other = ''.join(re.escape(c) for c in lexer_cls.literals if c in rule_chars)
+    if safe:
+        parts.append(f'(?P<_literal>[{safe}])')
+
+    parts.extend(part for i, (_, part) in enumerate(rules) if i not in hot)
+    if other:
+        parts.append(f'(?P<_literal_>[{other}])')
+
+    ignore = ''.join(re.escape(c) for c in lexer_cls.ignore + _line_chars)
+    if ignore:
+        # El caso de error excluye los ignorados para que el prefijo no retroceda
+        parts.append(f'(?P<_error>(?s:[^{ignore}]))')
+        master = f'[{ignore}]*(?:' + '|'.join(parts) + ')'
+    else:
+        parts.append(r'(?P<_error>(?s:.))')
+        master = '|'.join(parts)
+
+    regex = re.compile(master, flags)
+    names = [None] * (regex.groups + 1)
+    for name, index in regex.groupindex.items():
+        names[index] = name
+    return regex, names
+
+
+def _rules(lexer_cls):
+    # Reglas en el orden de sly, con el prefijo 'ignore_' removido
+    for name, value in lexer_cls._rules:
+        if name.startswith('ignore_'):
+            name = name[7:]
+        yield name, value if isinstance(value, str) else value.pattern
+
+
+class FastLexer:
+    '''
+    Reemplazo directo de Lexer: mismo constructor, mismos atributos
+    (tokens, lineno, index, text) y el mismo flujo de tokens.
+    '''
+    tokens = Lexer.tokens
+
+    _master_re, _group_names = _build_master(Lexer)
+    _keywords  = Lexer._remapping.get('IDENT', { })
+    _remapping = Lexer._remapping
+    _funcs     = Lexer._token_funcs
+    _ignored   = Lexer._ignored_tokens
+
+    def __init__(self, ctx=None):
+        self.ctx = ctx
+        self.lineno = 1
+        self.index = 0
+        self.text = ''
+
+    # Las funciones de Lexer reciben 'self' y solo usan este método
+    error = Lexer.error
+
+    def tokenize(self, text, lineno=1, index=0):
+        finditer  = self._master_re.finditer
+        names     = self._group_names
+        keywords  = self._keywords
+        make      = tuple.__new__
+        ident     = self._master_re.groupindex.get('IDENT')
+        literal   = self._master_re.groupindex.get('_literal')
+        self.text = text
+
+        # La línea de la tabla se ajusta si se pide otra línea inicial
+        lines  = self._line_index(text)
+        starts = lines.starts
+        nlines = len(starts)
+        line   = lines.lineno(index)
+        base   = lineno - line
+        next_start = starts[line] if line < nlines else sys.maxsize
+
+        try:
+            while True:
+                for m in finditer(text, index):
+                    i = m.lastindex
+                    value = m[i]
+                    end = m.end()
+                    start = end - len(value)
+
+                    if start >= next_start:
+                        line = bisect_right(starts, start)
+                        next_start = starts[line] if line < nlines else sys.maxsize
+                        lineno = line + base
+
+                    if i == ident:
+                        yield make(Token, (keywords.get(value, 'IDENT'), value, lineno, start, end))
+                        continue
+
+                    if i == literal:
+                        yield make(Token, (value, value, lineno, start, end))
+                        continue
+
+                    kind = names[i]
+                    if kind in _line_rules:
+                        continue
+
+                    convert = _value_rules.get(kind)
+                    if convert is not None:
+                        yield make(Token, (kind, convert(value), lineno, start, end))
+                        continue
+
+                    if kind == '_literal_':
+                        yield make(Token, (value, value, lineno, start, end))
+                        continue
+
+                    index = self._slow_token(m, kind, value, lineno)
+                    if self._tok is not None:
+                        yield self._tok
+
+                    if kind == 'STRING':
+                        # La función de sly no cuenta estos saltos de línea
+                        skipped = value.count('\n')
+                        base -= skipped
+                        lineno -= skipped
+
+                    # Si la función movió el índice se reinicia el recorrido
+                    if index != end:
+                        break
+                else:
+                    index = len(text)
+                    return
+        finally:
+            self.index = index
+            self.lineno = lineno
+
+    def _line_index(self, text):
+        # Se reutiliza la tabla que Context.parse construyó para este código
+        lines = getattr(self.ctx, 'lines', None)
+        if lines is None or lines.source is not text:
+            lines = LineIndex(text)
+        self.lines = lines
+        return lines
+
+    def _slow_token(self, m, kind, value, lineno):
+        '''
+        Reglas con lógica propia: se construye un Token de sly y se llama
+        a la función de Lexer igual que en sly.tokenize.
+        '''
+        start = m.end() - len(value)
+        tok = sly.lex.Token()
+        tok.lineno = lineno
+        tok.index = start
+
+        if kind in self._remapping:
+            kind = self._remapping[kind].get(value, kind)
+
+        if kind == '_error':
+            tok.type = 'ERROR'
+            tok.value = self.text[start:]
+            self.index, self.lineno = start, lineno
+            tok = self.error(tok)
+            if tok is not None:
+                tok.end = self.index
+        else:
+            tok.type = kind
+            tok.value = value
+            tok.end = m.end()
+            self.index, self.lineno = tok.end, lineno
+            func = self._funcs.get(kind)
+            if func is not None:
+                tok = func(self, tok)
+
+        if tok and tok.type not in self._ignored:
+            self._tok = tuple.__new__(Token, (tok.type, tok.value, tok.lineno, tok.index, tok.end))
+        else:
+            self._tok = None
+        return self.index
@@ -24,6 +24,9 @@ class Lexer(sly.Lexer):
     }
     literals = '+-*/%=().,;{}[]<>!'
 
+    def __init__(self, ctx=None):
+        self.ctx = ctx
+
     # Ignorar patrones dentro del archivo fuente
     ignore = ' \t'
 
@@ -80,7 +83,7 @@ class Lexer(sly.Lexer):
         print(f"{self.lineno}: Literal de punto flotante '{t.value}' no sportado")
 
     @_(r'0(?!\d)|([1-9]\d*)')
-    def INIT_LIT(self, t):
+    def INT_LIT(self, t):
         t.value = int(t.value)
         return t
 
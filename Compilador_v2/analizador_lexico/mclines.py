@@ -0,0 +1,67 @@
+# mclines.py
+'''
+Tabla de Inicios de Línea
+-------------------------
+
+Se construye una sola vez por código fuente: un array con el offset
+donde empieza cada línea. Convertir un offset a (línea, columna) es una
+búsqueda binaria sobre ese array y obtener el texto de una línea es un
+slice, sin recorrer el código carácter por carácter.
+
+Las líneas y columnas empiezan en 1.
+'''
+from array     import array
+from bisect    import bisect_right
+from itertools import accumulate
+
+
+class LineIndex:
+
+    def __init__(self, source: str):
+        self.source = source
+        # La línea k+1 empieza un carácter después del k-ésimo '\n'
+        lengths = map((1).__add__, map(len, source.split('\n')))
+        self.starts = array('q', accumulate(lengths, initial=0))
+        self.starts.pop()
+
+    def __len__(self):
+        return len(self.starts)
+
+    def lineno(self, offset: int) -> int:
+        '''
+        Línea que contiene el offset
+        '''
+        return bisect_right(self.starts, offset)
+
+    def position(self, offset: int):
+        '''
+        (línea, columna) del offset
+        '''
+        lineno = bisect_right(self.starts, offset)
+        return lineno, offset - self.starts[lineno - 1] + 1
+
+    def line_start(self, lineno: int) -> int:
+        return self.starts[lineno - 1]
+
+    def line_end(self, lineno: int) -> int:
+        '''
+        Offset del '\\n' que termina la línea (o el final del código)
+        '''
+        if lineno < len(self.starts):
+            return self.starts[lineno] - 1
+        return len(self.source)
+
+    def line(self, lineno: int) -> str:
+        '''
+        Texto de la línea sin el salto de línea
+        '''
+        return self.source[self.line_start(lineno):self.line_end(lineno)]
+
+    def snippet(self, start: int, end: int):
+        '''
+        Línea donde empieza [start, end) y el subrayado '^^^' del rango,
+        recortado al final de esa línea.
+        '''
+        lineno, col = self.position(start)
+        stop = min(max(end, start + 1), self.line_end(lineno) + 1)
+        return self.line(lineno), ' ' * (col - 1) + '^' * (stop - start)
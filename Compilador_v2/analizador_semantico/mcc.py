@@ -1,7 +1,7 @@
 
 # mc.py
 '''
-usage: mc.py [-h] [-d] [-o OUT] [-l] [-D] [-p] [-I] [--sym] [-S] [-R] input
+usage: mc.py [-h] [-d] [-o OUT] [-l] [-D] [-p] [--func NAME] [--depth N] [--backend {ast,c,closure,ir,pycode,vm}] [--all-errors] [-j N] [-O {0,1,2,3}] [--passes LIST] [--time-passes] [-I] [--sym] [--lalr] [-S] [-R] input
 
 Compiler for MiniC programs
 
@@ -11,20 +11,39 @@ positional arguments:
 optional arguments:
   -h, --help         show this help message and exit
   -d, --debug        Generate assembly with extra information (for debugging purposes)
-  -o OUT, --out OUT  File name to store generated executable
+  -o OUT, --out OUT  Build a native executable (or a shared object if OUT ends in .so) with the C compiler
   -l, --lex          Store output of lexer
   -D, --dot          Generate AST graph as DOT format
-  -p, --png          Generate AST graph as png format
+  -p, --png          Generate AST graph as png format (needs the graphviz 'dot' program)
+  --func NAME        Only graph the function NAME
+  --depth N          Only graph the AST up to depth N
+  --backend BACKEND  Run with the bytecode VM (default), the AST interpreter (ast)
+                     the closure compiler (closure), Python code objects (pycode), C (c)
+                     or the intermediate representation (ir)
+  --all-errors       Report every semantic error instead of stopping at the first one
+  -j N, --jobs N     Check function bodies in N processes (default 1; 0 = one per CPU)
+  -O {0,1,2,3}       Optimization level (default 0)
+  --passes LIST      Comma separated list of passes to run instead of the -O pipeline
+  --time-passes      Print the wall time and size change of each pass
   -I, --ir           Dump the generated Intermediate representation
   --sym              Dump the symbol table
-  -S, --asm          Store the generated assembly file
-  -R, --exec         Execute the generated program
+  --lalr             Write the grammar and LALR states to minicc.txt
+  -S, --asm          Store the generated C file
+  -R, --exec         Build the program with the C compiler and execute it
 '''
 from contextlib import redirect_stdout
 from rich       import print
+import shutil
+import subprocess
+import sys
 
 from analizador_lexico.mclex      import print_lexer
-from analizador_sintactico.mcparser   import gen_ast
+from analizador_sintactico.mcast      import DotRender, FuncDeclStmt
+from analizador_sintactico.mcparser   import Parser
+from interprete.mcgenc             import CGenerator, build
+from interprete.mcir               import dump
+from interprete.mcpasses           import PassManager, levels
+from interprete.mcruntime          import RunError
 from .mcontext   import Context
 
 import argparse
@@ -67,18 +86,136 @@ def parse_args():
           action='store_true',
           help='Generate AST graph as png format')
 
+  fgroup.add_argument(
+          '--func',
+          metavar='NAME',
+          help='Only graph the function NAME (with --dot/--png)')
+
+  fgroup.add_argument(
+          '--depth',
+          type=int,
+          metavar='N',
+          help='Only graph the AST up to depth N (with --dot/--png)')
+
+  mutex.add_argument(
+          '-I', '--ir',
+          action='store_true',
+          help='Dump the generated Intermediate representation')
+
   mutex.add_argument(
           '--sym',
           action='store_true',
           help='Dump the symbol table')
 
+  cli.add_argument(
+          '--backend',
+          choices=sorted(Context.backends),
+          default='vm',
+          help='Run with the bytecode VM (default), the AST interpreter, closures, Python code or C')
+
+  cli.add_argument(
+          '--all-errors',
+          action='store_true',
+          help='Report every semantic error instead of stopping at the first one')
+
+  cli.add_argument(
+          '-j', '--jobs',
+          metavar='N',
+          type=int,
+          default=1,
+          help='Check function bodies in N processes (default 1; 0 = one per CPU)')
+
+  ogroup = cli.add_argument_group('Optimization options')
+
+  ogroup.add_argument(
+          '-O',
+          dest='level',
+          type=int,
+          choices=sorted(levels),
+          default=0,
+          help='Optimization level (default 0)')
+
+  ogroup.add_argument(
+          '--passes',
+          metavar='LIST',
+          help='Comma separated list of passes to run instead of the -O pipeline')
+
+  ogroup.add_argument(
+          '--time-passes',
+          action='store_true',
+          help='Print the wall time and size change of each pass')
+
+  cgroup = cli.add_argument_group('C backend options')
+
+  cgroup.add_argument(
+          '-S', '--asm',
+          action='store_true',
+          help='Store the generated C file')
+
+  cgroup.add_argument(
+          '-o', '--out',
+          metavar='OUT',
+          help='Build a native executable (or a shared object if OUT ends in .so)')
+
+  cgroup.add_argument(
+          '-R', '--exec',
+          action='store_true',
+          help='Build the program with the C compiler and execute it')
+
+  cli.add_argument(
+          '--lalr',
+          action='store_true',
+          help='Write the grammar and LALR states to minicc.txt')
+
   return cli.parse_args()
 
 
+_type_tokens = {'INT', 'FLOAT', 'BOOL', 'VOID'}
+
+def repl():
+  '''
+  Cada línea es una declaración global (variable o función), un main()
+  completo o una lista de sentencias. Las declaraciones se acumulan; las
+  sentencias se ejecutan en un main() junto con las declaraciones
+  anteriores, y las variables globales conservan su valor entre líneas.
+  '''
+  context = Context('ast')
+  context.interp.keep_globals = True
+  decls = []
+
+  while True:
+    line = input('minic $ ')
+    first = [tok for _, tok in zip(range(2), context.lexer.tokenize(line))]
+    if not first:
+      continue
+
+    if first[0].type in _type_tokens:
+      source = '\n'.join(decls + [line])
+      if len(first) > 1 and first[1].value == 'main':
+        context.parse(source)
+        context.run()
+      else:
+        # Solo se verifica; main() vacío para que el programa sea válido
+        context.parse(source + '\nvoid main(void) { ; }')
+        if not context.have_errors:
+          decls.append(line)
+    else:
+      context.parse('\n'.join(decls + ['void main(void) {', line, '}']))
+      context.run()
+
+
 if __name__ == '__main__':
 
   args = parse_args()
-  context = Context()
+  try:
+    passes = PassManager.parse(args.passes) if args.passes is not None else PassManager.level(args.level)
+  except ValueError as e:
+    print(f'[red]{e}[/red]')
+    raise SystemExit(2)
+  context = Context(args.backend, passes, args.all_errors, args.jobs or None)
+
+  if args.lalr:
+    Parser.write_debug('minicc.txt')
 
   if args.input:
     fname = args.input
@@ -94,33 +231,76 @@ if __name__ == '__main__':
           print_lexer(source)
 
     elif args.dot or args.png:
-      ast, dot = gen_ast(source)
+      context.parse(source)
+      if context.ast is None:
+        raise SystemExit(1)
+      # --func se verifica antes de crear el archivo o ejecutar 'dot'
+      if args.func is not None and not any(
+              isinstance(d, FuncDeclStmt) and d.name == args.func for d in context.ast.decls):
+        print(f"[red]No existe la función '{args.func}'[/red]")
+        raise SystemExit(1)
       base = fname.split('.')[0]
+      options = dict(ctx=context, func=args.func, depth=args.depth)
+      dot = shutil.which('dot') if args.png else None
+
+      if dot:
+        # El grafo se escribe directamente en la entrada de 'dot'
+        fpng = base + '.png'
+        print(f'print ast: {fpng}')
+        with subprocess.Popen([dot, '-Tpng', '-o', fpng], stdin=subprocess.PIPE,
+                              text=True, encoding='utf-8') as proc:
+          DotRender.render(context.ast, out=proc.stdin, **options)
+          proc.stdin.close()
+        if proc.returncode:
+          raise SystemExit(proc.returncode)
 
-      if args.dot:
+      else:
+        if args.png:
+          print("[red]No se encontró el programa 'dot' de graphviz; se genera el archivo .dot[/red]")
         fdot = base + '.dot'
         print(f'print ast: {fdot}')
-        with open(fdot, 'w') as f:
-          with redirect_stdout(f):
-            print(dot)
+        with open(fdot, 'w', encoding='utf-8') as f:
+          DotRender.render(context.ast, out=f, **options)
 
-      elif args.png:
-        pass
+    elif args.ir:
+      context.parse(source)
+      if context.ast is None or context.have_errors:
+        raise SystemExit(1)
+      # Sin el print de rich: el texto de la IR no lleva marcas
+      sys.stdout.write(dump(context.lower()))
+
+    elif args.asm or args.out or args.exec:
+      context.parse(source)
+      if context.ast is None or context.have_errors:
+        raise SystemExit(1)
+      csource = CGenerator.generate(context.ast)
+      if args.asm:
+        fc = fname.split('.')[0] + '.c'
+        print(f'print C: {fc}')
+        with open(fc, 'w', encoding='utf-8') as f:
+          f.write(csource)
+      if args.out:
+        print(f'build: {args.out}')
+        try:
+          build(csource, args.out, shared=args.out.endswith('.so'))
+        except RunError as e:
+          print(f'[red]{e}[/red]')
+          raise SystemExit(1)
+      if args.exec:
+        context.backend = 'c'
+        context.run()
 
     else:
       context.parse(source)
       context.run()
 
+    if args.time_passes:
+      sys.stderr.write(context.passes.report() + '\n')
+
   else:
 
     try:
-      while True:
-        source = input('minic $ ')
-        context.parse(source)
-        if not context.have_errors:
-          for stmt in context.ast.stmts:
-            context.ast = stmt
-            context.run()
+      repl()
 
     except EOFError:
       pass
@@ -1,22 +1,60 @@
-
 # checker.py
 '''
 Analisis Semantico
 ------------------
 
-
+Checker.check(program) lanza CheckError en el primer error. Con
+collect=True reúne todos los errores del programa en
+checker.diagnostics, una lista de Diagnostic(span, mensaje) en el orden
+del código fuente: cada visit() se ejecuta dentro de _recover, que anota
+el error y le da a la expresión el tipo veneno ERROR. Un error en un
+nodo con algún operando ERROR es consecuencia de otro ya reportado y se
+descarta, así 'x + 1' con x sin declarar da un solo error.
 '''
+from collections import namedtuple
+from types       import GeneratorType
 
-
-from collections import ChainMap  # Tabla de Simbolos
 from typing      import Union
 from analizador_sintactico.mcast       import *
-from mctypesys   import *
+from .mctypesys  import *
+
+# Error encontrado por el checker: (inicio, fin) en el código fuente, o
+# None si el nodo no tiene posición, y el mensaje
+Diagnostic = namedtuple('Diagnostic', ['span', 'message'])
 
 class SymbolTable:
+    '''
+    Tabla de símbolos con ámbitos anidados.
+
+    Cada nombre local apunta a una pila con sus declaraciones visibles
+    (la más interna al final) y cada ámbito guarda los nombres que
+    declaró. Buscar e insertar cuesta O(1) sin importar cuántos símbolos
+    o niveles de anidamiento haya; salir de un ámbito cuesta O(símbolos
+    declarados en él).
+    '''
     def __init__(self):
-        # Inicializamos la tabla de símbolos con un diccionario vacío
-        self.symbol_table = ChainMap()
+        self.globals  = {}      # nombre -> valor
+        self.bindings = {}      # nombre -> pila de valores locales
+        self.scopes   = []      # nombres declarados en cada ámbito local
+
+    def enter_scope(self):
+        """
+        Abre un ámbito local (función o bloque).
+        """
+        self.scopes.append([])
+
+    def exit_scope(self):
+        """
+        Cierra el ámbito local actual y descarta sus símbolos.
+        """
+        if not self.scopes:
+            raise ValueError("No se puede eliminar el ámbito global.")
+        bindings = self.bindings
+        for name in self.scopes.pop():
+            stack = bindings[name]
+            stack.pop()
+            if not stack:
+                del bindings[name]
 
     def add_symbol(self, name, value, scope="global"):
         """
@@ -26,11 +64,16 @@ class SymbolTable:
         :param scope: El ámbito del símbolo ('global' o 'local').
         """
         if scope == "global":
-            # Añadimos al ámbito global
-            self.symbol_table.maps[0][name] = value
+            self.globals[name] = value
         elif scope == "local":
-            # Añadimos al ámbito local
-            self.symbol_table.maps.append({name: value})
+            if not self.scopes:
+                raise ValueError("No hay un ámbito local abierto")
+            stack = self.bindings.get(name)
+            if stack is None:
+                self.bindings[name] = [value]
+            else:
+                stack.append(value)
+            self.scopes[-1].append(name)
         else:
             raise ValueError("Ámbito no válido")
 
@@ -40,23 +83,17 @@ class SymbolTable:
         :param name: El nombre del símbolo a buscar.
         :return: El valor del símbolo si existe, o None si no se encuentra.
         """
-        for map in self.symbol_table.maps:
-            if name in map:
-                return map[name]
-        return None
+        # Los ámbitos locales mas recientes ocultan a los anteriores
+        stack = self.bindings.get(name)
+        if stack:
+            return stack[-1]
+        return self.globals.get(name)
 
-    def remove_local_scope(self):
+    def is_global(self, name):
         """
-        Elimina el ámbito local actual (cuando salimos de una función).
+        Indica si el nombre ya está declarado en el ámbito global.
         """
-        if len(self.symbol_table.maps) > 1:
-            self.symbol_table.maps.pop()
-        else:
-            raise ValueError("No se puede eliminar el ámbito global.")
-
-
-class CheckError(Exception):
-  pass
+        return name in self.globals
 
 
 def _check_name(name, symbol_table: SymbolTable):
@@ -69,20 +106,111 @@ def _check_name(name, symbol_table: SymbolTable):
     return symbol_value
 
 
+def _check_var(name, symbol_table: SymbolTable):
+    # Verificar que el símbolo sea una variable o un parámetro
+    symbol_value = _check_name(name, symbol_table)
+    if not isinstance(symbol_value, (VarDeclStmt, Param)):
+        raise CheckError(f"'{name}' no es una variable")
+    return symbol_value
+
+
+def _var_type(decl):
+    # Tipo de una variable declarada (los arreglos son el Type 'array<tipo>')
+    if decl.is_array:
+        return array_of(decl.type_spec)
+    return intern_type(decl.type_spec)
+
+
+# Tipo de cada clase de valor constante; se busca por la clase exacta, así
+# True no se confunde con un int
+_const_types = {
+    bool : BOOL,
+    int  : INT,
+    float: FLOAT,
+    str  : STRING,
+}
+
+
+def _coerce(expr, expected):
+    # Conversión implícita de int a float
+    if expected == 'float' and expr.type == 'int':
+        conv = IntToFloatExpr(expr)
+        conv.type = FLOAT
+        return conv
+    if expr.type != expected:
+        raise CheckError(f"Tipo '{expr.type}' no es compatible con el tipo esperado '{expected}'")
+    return expr
+
+
+def _poisoned(n: Node):
+    return any(isinstance(c, Expression) and c.type is ERROR for c in children(n))
+
+
+def _recover(handler):
+    # visit() del modo que reúne los errores
+    def visit(self, n, *args, **kwargs):
+        try:
+            result = handler(self, n, *args, **kwargs)
+            if result.__class__ is GeneratorType:
+                result = yield from result
+            return result
+        except CheckError as e:
+            self.error(n, str(e))
+            if isinstance(n, Expression):
+                n.type = ERROR
+    return visit
+
+
+class _RecoveringTable(dict):
+    # Tabla de despacho con cada visit() de 'table' envuelto en _recover
+    def __init__(self, table):
+        super().__init__()
+        self.table = table
+
+    def __missing__(self, node_cls):
+        handler = self[node_cls] = _recover(self.table[node_cls])
+        return handler
+
 
 class Checker(Visitor):
-  
+    # Los visit() con hijos son generadores: 'yield hijo' visita el hijo con
+    # los mismos argumentos y 'yield hijo, env, symbol_table' con otros.
+    # mcast los ejecuta con una pila explícita (sin límite de profundidad).
+
+    _recovering = { }       # clase -> _RecoveringTable
+
     @classmethod
-    def check(cls, n: Node, env: ChainMap, interp):
-        checker = cls()
+    def check(cls, n: Node, ctx=None, collect=False, jobs=1):
+        if jobs != 1 and isinstance(n, Program):
+            # Cuerpos de las funciones en paralelo (mcparallel)
+            from .mcparallel import check_program
+            return check_program(n, collect, jobs)
+        checker = cls(collect)
         # Creamos una instancia de SymbolTable para manejar la tabla de símbolos
         symbol_table = SymbolTable()
-        n.accept(checker, env.new_child(), symbol_table)
+        n.accept(checker, { }, symbol_table)
         return checker
 
+    def __init__(self, collect=False):
+        self.diagnostics = [] if collect else None
+        if collect:
+            table = self._recovering.get(type(self))
+            if table is None:
+                table = self._recovering[type(self)] = _RecoveringTable(self._visit_table)
+            self._visit_table = table
+
+    def error(self, n: Node, message):
+        '''
+        Lanza CheckError o, si se reúnen los errores, lo anota y sigue
+        '''
+        if self.diagnostics is None:
+            raise CheckError(message)
+        if not _poisoned(n):
+            self.diagnostics.append(Diagnostic(n.span, message))
+
     # Declarations
 
-    def visit(self, n: Program, env: ChainMap, symbol_table: SymbolTable):
+    def visit(self, n: Program, env: dict, symbol_table: SymbolTable):
       '''
       1. Crear una nueva tabla de símbolos.
       2. Insertar dentro de esa tabla funciones como: scanf, printf.
@@ -90,152 +218,167 @@ class Checker(Visitor):
       4. Validar que exista una función main.
       '''
       # Agregamos funciones predefinidas (como scanf y printf) al ámbito global
-      symbol_table.add_symbol("scanf", "function", "global")
-      symbol_table.add_symbol("printf", "function", "global")
+      for name in builtin_funcs:
+          symbol_table.add_symbol(name, "function", "global")
 
       # Variable para verificar si se encuentra la función main
       main_found = False
 
       # Visitamos todas las declaraciones
       for decl in n.decls:
-          decl.accept(self, env, symbol_table)
+          yield decl
+          main_found |= self.check_main(decl)
 
-          # Verificar si la declaración es una función y si es la función main
-          if isinstance(decl, FuncDeclStmt) and decl.ident == "main":
-              # Asegurarnos de que la función main tenga la firma correcta
-              if decl.return_type != "int" or len(decl.params) > 0:
-                  raise CheckError("La función main debe ser de tipo 'int' y no debe recibir parámetros.")
-              main_found = True
+      self.check_main_found(n, main_found)
 
+    def check_main_found(self, n: Program, main_found):
       # Si no encontramos la función main, lanzamos un error
       if not main_found:
-          raise CheckError("No se ha encontrado la función 'main' en el programa.")
+          self.error(n, "No se ha encontrado la función 'main' en el programa.")
+
+    def check_main(self, decl):
+      '''
+      True si la declaración es la función main; verifica su firma.
+      '''
+      # Verificar si la declaración es una función y si es la función main
+      if isinstance(decl, FuncDeclStmt) and decl.name == "main":
+          # Asegurarnos de que la función main tenga la firma correcta
+          if decl.return_type not in ("int", "void") or len(decl.params) > 0:
+              self.error(decl, "La función main debe ser de tipo 'int' o 'void' y no debe recibir parámetros.")
+          return True
+      return False
 
-    def visit(self, n: FuncDeclStmt, env: ChainMap, symbol_table: SymbolTable):
+    def visit(self, n: FuncDeclStmt, env: dict, symbol_table: SymbolTable):
         '''
         1. Guardamos la función en la tabla de símbolos.
         2. Creamos un ámbito local para la función.
         3. Agregamos los parámetros de la función al ámbito local y verificamos duplicados.
         4. Visitamos los statements dentro de la función.
         '''
+        if symbol_table.is_global(n.name):
+            self.error(n, f"'{n.name}' ya ha sido declarado.")
+
         # Agregar la función al ámbito global
-        symbol_table.add_symbol(n.ident, "function", "global")
+        symbol_table.add_symbol(n.name, n, "global")
 
         # Creamos un nuevo ámbito para la función (ámbito local)
-        symbol_table.add_symbol(n.ident, n, "local")
-        env = env.new_child()
-
-        # Verificar duplicados y agregar los parámetros al ámbito local
-        seen_params = set()
-        for p in n.params:
-            if p in seen_params:
-                raise CheckError(f"El parámetro '{p}' está duplicado en la función '{n.ident}'.")
-            seen_params.add(p)
-            symbol_table.add_symbol(p, "parameter", "local")
-
-        # Visitamos los statements dentro de la función
-        try:
-            n.stmts.accept(self, env, symbol_table)
-        except CheckError as e:
-            raise CheckError(f"Error al visitar los statements de la función '{n.ident}': {e}")
+        symbol_table.enter_scope()
+        env = {**env, 'return_type': n.return_type}
 
-    def visit(self, n: VarDeclStmt, env: ChainMap, symbol_table: SymbolTable):
+        try:
+            # Verificar duplicados y agregar los parámetros al ámbito local
+            seen_params = set()
+            for p in n.params:
+                if p.ident in seen_params:
+                    self.error(p, f"El parámetro '{p.ident}' está duplicado en la función '{n.name}'.")
+                if p.type_spec not in typenames:
+                    self.error(p, f"El tipo '{p.type_spec}' no es válido para el parámetro '{p.ident}'.")
+                seen_params.add(p.ident)
+                symbol_table.add_symbol(p.ident, p, "local")
+
+            # Visitamos los statements dentro de la función
+            try:
+                yield n.body, env, symbol_table
+            except CheckError as e:
+                raise CheckError(f"Error al visitar los statements de la función '{n.name}': {e}")
+        finally:
+            symbol_table.exit_scope()
+
+    def visit(self, n: VarDeclStmt, env: dict, symbol_table: SymbolTable):
         '''
         1. Verificamos si la variable ya ha sido declarada en el ámbito actual.
         2. Validamos que el tipo de la variable sea válido.
-        3. Agregamos la variable al ámbito local.
+        3. Agregamos la variable al ámbito local (o global).
         '''
-        # Verificar si la variable ya ha sido declarada en el ámbito actual
-        if symbol_table.lookup_symbol(n.ident, "local"):
-            raise CheckError(f"La variable '{n.ident}' ya ha sido declarada en el ámbito local.")
+        # Las variables declaradas fuera de una función son globales
+        scope = "local" if 'return_type' in env else "global"
+
+        # Verificar si la variable ya ha sido declarada en el ámbito global
+        if scope == "global" and symbol_table.is_global(n.ident):
+            raise CheckError(f"La variable '{n.ident}' ya ha sido declarada en el ámbito global.")
 
-        # Verificar si el tipo de la variable es válido (esto es opcional y depende del lenguaje)
-        valid_types = ["int", "float", "char", "bool"]  # Ejemplo de tipos permitidos
-        if n.type not in valid_types:
-            raise CheckError(f"El tipo '{n.type}' no es válido para la variable '{n.ident}'.")
+        # Verificar si el tipo de la variable es válido
+        if n.type_spec not in typenames:
+            raise CheckError(f"El tipo '{n.type_spec}' no es válido para la variable '{n.ident}'.")
 
-        # Agregamos la variable al ámbito local
-        symbol_table.add_symbol(n.ident, n.type, "local")
+        # Agregamos la variable a la tabla de símbolos
+        symbol_table.add_symbol(n.ident, n, scope)
 
 
-    def visit(self, n: CompoundStmt, env: ChainMap, symbol_table: SymbolTable):
+    def visit(self, n: CompoundStmt, env: dict, symbol_table: SymbolTable):
         '''
         1. Creamos un ámbito local.
         2. Visitamos las declaraciones y statements dentro del bloque.
         '''
-        newenv = env.new_child()
+        symbol_table.enter_scope()
 
-        # Verificamos declaraciones duplicadas
-        declared_vars = set()
-        for decl in n.decls:
-            if decl.ident in declared_vars:
-                raise CheckError(f"La variable '{decl.ident}' ya ha sido declarada en este ámbito.")
-            declared_vars.add(decl.ident)
-            decl.accept(self, newenv, symbol_table)
+        try:
+            # Verificamos declaraciones duplicadas
+            declared_vars = set()
+            for decl in n.local_decls:
+                if decl.ident in declared_vars:
+                    self.error(decl, f"La variable '{decl.ident}' ya ha sido declarada en este ámbito.")
+                declared_vars.add(decl.ident)
+                yield decl
 
-        for stmt in n.stmts:
-            stmt.accept(self, newenv, symbol_table)
+            for stmt in n.stmt_list:
+                yield stmt
+        finally:
+            symbol_table.exit_scope()
 
 
-    def visit(self, n: IfStmt, env: ChainMap, symbol_table: SymbolTable):
+    def visit(self, n: IfStmt, env: dict, symbol_table: SymbolTable):
         '''
         1. Visitamos la expresión (validar tipos).
         2. Visitamos los statements de 'then' y 'else'.
         '''
         # Visitamos la expresión condicional
-        n.expr.accept(self, env, symbol_table)
-        
+        yield n.condition
+
         # Validamos que la expresión sea de tipo booleano
-        if n.expr.type != 'bool':  # Suponiendo que los tipos se manejan con un atributo 'type'
-            raise CheckError(f"La expresión en la condición de 'if' debe ser de tipo 'bool', pero se encontró '{n.expr.type}'.")
+        if n.condition.type != 'bool':
+            self.error(n, f"La expresión en la condición de 'if' debe ser de tipo 'bool', pero se encontró '{n.condition.type}'.")
 
         # Visitamos los bloques de 'then' y 'else'
-        n.then.accept(self, env, symbol_table)
-        if n.else_:
-            n.else_.accept(self, env, symbol_table)
+        yield n.then_stmt
+        if n.else_stmt:
+            yield n.else_stmt
 
 
-    def visit(self, n: WhileStmt, env: ChainMap, symbol_table: SymbolTable):
+    def visit(self, n: WhileStmt, env: dict, symbol_table: SymbolTable):
         '''
         1. Visitamos la expresión (validar tipos).
         2. Visitamos el statement dentro del ciclo.
         '''
         # Visitamos la expresión condicional del ciclo
-        n.expr.accept(self, env, symbol_table)
-        
+        yield n.condition
+
         # Validamos que la expresión sea de tipo booleano
-        if n.expr.type != 'bool':  # Supuesto de que 'type' sea un atributo de 'expr'
-            raise CheckError(f"La expresión en el ciclo 'while' debe ser de tipo 'bool', pero se encontró '{n.expr.type}'.")
-        
+        if n.condition.type != 'bool':
+            self.error(n, f"La expresión en el ciclo 'while' debe ser de tipo 'bool', pero se encontró '{n.condition.type}'.")
+
         # Visitamos el statement dentro del ciclo
-        n.stmt.accept(self, env, symbol_table)
+        yield n.body, {**env, 'while': True}, symbol_table
 
 
-    def visit(self, n: VarExpr, env: ChainMap, symbol_table: SymbolTable):
+    def visit(self, n: VarExpr, env: dict, symbol_table: SymbolTable):
         '''
         1. Verificamos si la variable está definida en la tabla de símbolos.
-        2. Validamos que la variable esté accesible y posiblemente revisamos su tipo.
+        2. Asignamos el tipo de la variable a la expresión.
         '''
-        symbol_value = symbol_table.lookup_symbol(n.name)
-        if symbol_value is None:
-            raise CheckError(f"La variable '{n.name}' no está definida antes de su uso.")
-        else:
-            # Verificamos que el tipo de la variable sea compatible, si es relevante en el contexto
-            if hasattr(symbol_value, 'type') and symbol_value.type != n.expected_type:
-                raise CheckError(f"El tipo de la variable '{n.name}' es '{symbol_value.type}', pero se esperaba '{n.expected_type}'.")
-            
-            # Podríamos agregar más comprobaciones como el alcance o la visibilidad de la variable
+        decl = _check_var(n.ident, symbol_table)
+        n.type = _var_type(decl)
 
 
-    def visit(self, n: BinaryOpExpr, env: ChainMap, interp):
+    def visit(self, n: BinaryOpExpr, env: dict, interp):
         """
         1. Visitar n.left y n.right.
         2. Verificar si los tipos de ambas expresiones son compatibles.
         3. Si son compatibles, asignar el tipo resultante de la operación.
         """
         # Visitar ambas expresiones
-        n.left.accept(self, env, interp)
-        n.right.accept(self, env, interp)
+        yield n.left
+        yield n.right
 
         # Obtener los tipos de las expresiones
         left_type = n.left.type
@@ -244,25 +387,25 @@ class Checker(Visitor):
         # Verificar que los tipos no sean nulos
         if left_type is None or right_type is None:
             raise CheckError("Tipo no definido en la expresión binaria.")
-        
+
         # Verificar la compatibilidad de los tipos y obtener el tipo resultante
-        result_type = check_binary_op(n.op, left_type, right_type)
-        
+        result_type = check_binary_op(n.opr, left_type, right_type)
+
         if result_type is None:
-            raise CheckError(f"Tipos incompatibles para la operación '{n.op}': '{left_type}' y '{right_type}'.")
+            raise CheckError(f"Tipos incompatibles para la operación '{n.opr}': '{left_type}' y '{right_type}'.")
 
         # Asignar el tipo resultante a la expresión
         n.type = result_type
 
-        
-    def visit(self, n: UnaryOpExpr, env: ChainMap, interp):
+
+    def visit(self, n: UnaryOpExpr, env: dict, interp):
         """
         1. Visitar la expresión (n.expr).
         2. Verificar si el tipo de la expresión es compatible con el operador unario.
         3. Asignar el tipo resultante a la expresión.
         """
         # Visitar la expresión
-        n.expr.accept(self, env, interp)
+        yield n.expr
 
         # Obtener el tipo de la expresión
         expr_type = n.expr.type
@@ -272,62 +415,67 @@ class Checker(Visitor):
             raise CheckError("Tipo no definido en la expresión unaria.")
 
         # Verificar la compatibilidad del tipo con el operador unario
-        result_type = check_unary_op(n.op, expr_type)
+        result_type = check_unary_op(n.opr, expr_type)
 
         # Lanzar un error si los tipos no son compatibles
         if result_type is None:
-            raise CheckError(f"Tipo incompatibles para la operación unaria '{n.op}': '{expr_type}'.")
+            raise CheckError(f"Tipo incompatibles para la operación unaria '{n.opr}': '{expr_type}'.")
 
         # Asignar el tipo resultante a la expresión
         n.type = result_type
 
 
-        
-    def visit(self, n: CallExpr, env: ChainMap, symbol_table: SymbolTable):
+
+    def visit(self, n: CallExpr, env: dict, symbol_table: SymbolTable):
         """
-        1. Verificar si la función (n.func) está definida.
+        1. Verificar si la función (n.ident) está definida.
         2. Verificar que los argumentos sean del tipo esperado.
-        3. Verificar que el valor de retorno sea compatible con el tipo esperado.
+        3. Asignar el tipo de retorno de la función a la expresión.
         """
         # Verificar si la función está definida en la tabla de símbolos
-        func_entry = symbol_table.lookup_symbol(n.func.name)
+        func_entry = symbol_table.lookup_symbol(n.ident)
         if func_entry is None:
-            raise CheckError(f"La función '{n.func.name}' no está definida.")
+            raise CheckError(f"La función '{n.ident}' no está definida.")
+
+        # Verificar que la función sea una función
+        if func_entry != "function" and not isinstance(func_entry, FuncDeclStmt):
+            raise CheckError(f"'{n.ident}' no es una función válida.")
 
-        # Verificar que la función sea una función y obtener su definición
-        if func_entry["type"] != "function":
-            raise CheckError(f"'{n.func.name}' no es una función válida.")
+        for arg in n.args:
+            yield arg
 
-        # Verificar argumentos específicos de scanf
-        if n.func.name == "scanf":
-            if len(n.args) != 1:
-                raise CheckError("scanf debe recibir exactamente un argumento.")
-            
-            arg = n.args[0]
-            if not isinstance(arg, VarExpr):
-                raise CheckError("scanf debe recibir una variable como argumento.")
+        # Funciones predefinidas
+        if func_entry == "function":
+            if n.ident == "printf":
+                if not n.args or n.args[0].type != "string":
+                    raise CheckError("printf debe recibir una cadena de formato como primer argumento.")
 
-            # Validar que la variable sea de tipo 'int'
-            if arg.name not in symbol_table or symbol_table.lookup_symbol(arg.name)["type"] != "int":
-                raise CheckError("scanf solo puede recibir variables de tipo int.")
+            elif n.ident == "scanf":
+                if len(n.args) != 1:
+                    raise CheckError("scanf debe recibir exactamente un argumento.")
 
-        # Validar la llamada a la función y los tipos de los argumentos
-        n.func.accept(self, env, symbol_table)
+                # Validar que el argumento sea una variable de tipo 'int'
+                arg = n.args[0]
+                if not isinstance(arg, VarExpr) or arg.type != "int":
+                    raise CheckError("scanf solo puede recibir variables de tipo int.")
+
+            elif n.args:
+                raise CheckError(f"La función '{n.ident}' no recibe argumentos.")
+
+            n.type = builtin_funcs[n.ident]
+            return
 
         # Verificar la cantidad y tipo de los argumentos
-        if len(n.args) != len(n.func.params):
-            raise CheckError(f"El número de argumentos ({len(n.args)}) no coincide con el número de parámetros ({len(n.func.params)}) de la función '{n.func.name}'.")
+        if len(n.args) != len(func_entry.params):
+            raise CheckError(f"El número de argumentos ({len(n.args)}) no coincide con el número de parámetros ({len(func_entry.params)}) de la función '{n.ident}'.")
 
-        for arg, param in zip(n.args, n.func.params):
-            arg.accept(self, env, symbol_table)
-            if arg.type != param.type:
-                raise CheckError(f"Argumento de tipo {arg.type} no compatible con parámetro de tipo {param.type} en la función '{n.func.name}'.")
+        for i, (arg, param) in enumerate(zip(n.args, func_entry.params)):
+            n.args[i] = _coerce(arg, _var_type(param))
 
-        # Verificar la compatibilidad del tipo de retorno si existe
-        if n.func.return_type and n.type != n.func.return_type:
-            raise CheckError(f"El tipo de retorno {n.type} no es compatible con el tipo de retorno {n.func.return_type} de la función '{n.func.name}'.")
+        # Asignar el tipo de retorno de la función a la expresión
+        n.type = intern_type(func_entry.return_type)
 
-    def visit(self, n: ForStmt, env: ChainMap, symbol_table: SymbolTable):
+    def visit(self, n: ForStmt, env: dict, symbol_table: SymbolTable):
       '''
       Validar la instrucción FOR:
       1. Declaración de la variable de control.
@@ -335,182 +483,160 @@ class Checker(Visitor):
       3. Incremento/decremento correcto de la variable de control.
       '''
       # Validar la inicialización (debe ser una declaración de variable)
-      n.init.accept(self, env, symbol_table)
-      
+      yield n.init
+
       # Validar la condición (debe ser un booleano)
-      n.condition.accept(self, env, symbol_table)
+      yield n.condition
       if n.condition.type != "bool":
-          raise CheckError("La condición del FOR debe ser de tipo 'bool'")
-      
+          self.error(n, "La condición del FOR debe ser de tipo 'bool'")
+
       # Validar la actualización (debe ser una operación sobre la variable de control)
-      n.update.accept(self, env, symbol_table)
-      
+      yield n.update
+
       # Visitar el cuerpo del ciclo
-      n.body.accept(self, env, symbol_table)
-    
-    def visit(self, n: Union[BreakStmt, ContinueStmt], env: ChainMap, symbol_table: SymbolTable):
+      yield n.body, {**env, 'for': True}, symbol_table
+
+    def visit(self, n: Union[BreakStmt, ContinueStmt], env: dict, symbol_table: SymbolTable):
         '''
         Verificar que BREAK y CONTINUE estén dentro de un ciclo WHILE o FOR.
         '''
         name = 'break' if isinstance(n, BreakStmt) else 'continue'
-        
+
         # Verificar que la declaración de break o continue esté dentro de un bucle
-        current_env = env
-        while current_env is not None:
-            if 'while' in current_env or 'for' in current_env:
-                # Si encontramos un ciclo, la declaración es válida
-                return
-            
-            # Pasar al entorno padre
-            current_env = current_env.parent
-        
+        if 'while' in env or 'for' in env:
+            return
+
         # Si no se encontró un ciclo en el entorno, lanzar un error
         raise CheckError(f"{name} usado fuera de un ciclo WHILE o FOR")
 
-    def visit(self, n: Param, env: ChainMap, symbol_table: SymbolTable):
-        '''
-        1. Agregar el parámetro a la tabla de símbolos.
-        2. Verificar que el tipo del parámetro sea válido.
-        '''
-        if symbol_table.lookup_symbol(n.name):
-            raise CheckError(f"El parámetro '{n.name}' ya ha sido declarado previamente.")
-        
-        # Agregar el parámetro al ámbito local
-        symbol_table.add_symbol(n.name, n.type, "parameter")
-    
-    def visit(self, n: ExprStmt, env: ChainMap, symbol_table: SymbolTable):
+    def visit(self, n: ExprStmt, env: dict, symbol_table: SymbolTable):
         '''
         1. Visitar la expresión contenida en la sentencia.
         '''
-        n.expr.accept(self, env, symbol_table)
-    
-    def visit(self, n: NullStmt, env: ChainMap, symbol_table: SymbolTable):
+        yield n.expr
+
+    def visit(self, n: NullStmt, env: dict, symbol_table: SymbolTable):
         '''
         1. No hay validaciones necesarias para una sentencia nula.
         '''
         pass  # La sentencia `NullStmt` no requiere acciones específicas
 
-    def visit(self, n: ReturnStmt, env: ChainMap, symbol_table: SymbolTable):
+    def visit(self, n: ReturnStmt, env: dict, symbol_table: SymbolTable):
         '''
         1. Verificar si la función tiene un tipo de retorno.
         2. Verificar que el tipo de retorno sea compatible con el tipo de la función.
         '''
+        return_type = env['return_type']
         if n.expr:
-            n.expr.accept(self, env, symbol_table)
-            if n.expr.type != env["return_type"]:
-                raise CheckError(f"Tipo de retorno '{n.expr.type}' no compatible con el tipo esperado '{env['return_type']}'")
-    def visit(self, n: VarAssignmentExpr, env: ChainMap, symbol_table: SymbolTable):
+            yield n.expr
+            if return_type == 'void':
+                raise CheckError("Una función 'void' no puede retornar un valor")
+            try:
+                n.expr = _coerce(n.expr, return_type)
+            except CheckError:
+                raise CheckError(f"Tipo de retorno '{n.expr.type}' no compatible con el tipo esperado '{return_type}'")
+        elif return_type != 'void':
+            raise CheckError(f"Se esperaba un valor de retorno de tipo '{return_type}'")
+
+    def visit(self, n: VarAssignmentExpr, env: dict, symbol_table: SymbolTable):
         '''
         1. Verificar que la variable esté declarada.
         2. Verificar que el tipo de la expresión sea compatible con el tipo de la variable.
         '''
-        n.expr.accept(self, env, symbol_table)
-        var_info = symbol_table.lookup_symbol(n.var_name)
-        
-        if var_info is None:
-            raise CheckError(f"La variable '{n.var_name}' no está declarada.")
-        
-        if var_info["type"] != n.expr.type:
-            raise CheckError(f"Tipo de la expresión '{n.expr.type}' no es compatible con el tipo de la variable '{var_info['type']}'")
+        yield n.expr
+        var_type = _var_type(_check_var(n.ident, symbol_table))
+
+        try:
+            n.expr = _coerce(n.expr, var_type)
+        except CheckError:
+            raise CheckError(f"Tipo de la expresión '{n.expr.type}' no es compatible con el tipo de la variable '{var_type}'")
+        n.type = var_type
 
-    def visit(self, n: ArrayAssignmentExpr, env: ChainMap, symbol_table: SymbolTable):
+    def visit(self, n: ArrayAssignmentExpr, env: dict, symbol_table: SymbolTable):
         '''
         1. Verificar que el array esté declarado.
         2. Verificar que el índice sea de tipo 'int'.
         3. Verificar que el tipo de la expresión sea compatible con el tipo del array.
         '''
-        n.index.accept(self, env, symbol_table)
-        n.expr.accept(self, env, symbol_table)
-        
-        array_info = symbol_table.lookup_symbol(n.array_name)
-        if array_info is None:
-            raise CheckError(f"El array '{n.array_name}' no está declarado.")
-        
-        if array_info["type"] != n.expr.type:
-            raise CheckError(f"Tipo de la expresión '{n.expr.type}' no es compatible con el tipo del array '{array_info['type']}'")
-        
+        yield n.index
+        yield n.expr
+
+        array_info = _check_var(n.ident, symbol_table)
+        if not array_info.is_array:
+            raise CheckError(f"'{n.ident}' no es un array.")
+
+        try:
+            n.expr = _coerce(n.expr, array_info.type_spec)
+        except CheckError:
+            raise CheckError(f"Tipo de la expresión '{n.expr.type}' no es compatible con el tipo del array '{array_info.type_spec}'")
+
         if n.index.type != "int":
             raise CheckError(f"El índice debe ser de tipo 'int', pero se encontró '{n.index.type}'")
+        n.type = intern_type(array_info.type_spec)
 
-    def visit(self, n: ArrayLookupExpr, env: ChainMap, symbol_table: SymbolTable):
+    def visit(self, n: ArrayLookupExpr, env: dict, symbol_table: SymbolTable):
         '''
         1. Verificar que el array esté declarado.
         2. Verificar que el índice sea de tipo 'int'.
         3. Asignar el tipo del array al resultado de la expresión.
         '''
-        n.index.accept(self, env, symbol_table)
-        
-        array_info = symbol_table.lookup_symbol(n.array_name)
-        if array_info is None:
-            raise CheckError(f"El array '{n.array_name}' no está declarado.")
-        
+        yield n.index
+
+        array_info = _check_var(n.ident, symbol_table)
+        if not array_info.is_array:
+            raise CheckError(f"'{n.ident}' no es un array.")
+
         if n.index.type != "int":
             raise CheckError(f"El índice debe ser de tipo 'int', pero se encontró '{n.index.type}'")
-        
-        # Asignar el tipo de la expresión como el tipo del array
-        n.type = array_info["type"]
-    
-    def visit(self, n: ArraySizeExpr, env: ChainMap, symbol_table: SymbolTable):
+
+        # Asignar el tipo de la expresión como el tipo de los elementos del array
+        n.type = intern_type(array_info.type_spec)
+
+    def visit(self, n: ArraySizeExpr, env: dict, symbol_table: SymbolTable):
         '''
         1. Verificar que el array esté declarado.
         2. Verificar que el array sea de un tipo válido.
         '''
-        array_info = symbol_table.lookup_symbol(n.array_name)
-        if array_info is None:
-            raise CheckError(f"El array '{n.array_name}' no está declarado.")
-        
+        array_info = _check_var(n.ident, symbol_table)
+
         # Verificar que el array sea un tipo de array válido
-        if not array_info["type"].startswith("array"):
-            raise CheckError(f"'{n.array_name}' no es un array, no se puede obtener su tamaño.")
-        
+        if _var_type(array_info).element is None:
+            raise CheckError(f"'{n.ident}' no es un array, no se puede obtener su tamaño.")
+
         # Asignar el tipo de la expresión como 'int'
-        n.type = "int"
-        
-    def visit(self, n: ConstExpr, env: ChainMap, symbol_table: SymbolTable):
-        '''
-        1. Asignar el tipo de la expresión según el valor constante.
-        '''
-        # Asignar el tipo de la expresión según el tipo del valor constante
-        if isinstance(n.value, int):
-            n.type = "int"
-        elif isinstance(n.value, float):
-            n.type = "float"
-        elif isinstance(n.value, str):
-            n.type = "string"
-        elif isinstance(n.value, bool):
-            n.type = "bool"
-        else:
-            raise CheckError(f"Tipo de valor constante '{type(n.value).__name__}' no reconocido.")
+        n.type = INT
 
-    def visit(self, n: ConstExpr, env: ChainMap, symbol_table: SymbolTable):
+    def visit(self, n: ConstExpr, env: dict, symbol_table: SymbolTable):
         '''
         1. Asignar el tipo de la expresión según el valor constante.
         '''
-        # Asignar el tipo de la expresión según el tipo del valor constante
-        if isinstance(n.value, int):
-            n.type = "int"
-        elif isinstance(n.value, float):
-            n.type = "float"
-        elif isinstance(n.value, str):
-            n.type = "string"
-        elif isinstance(n.value, bool):
-            n.type = "bool"
-        else:
+        # Asignar el tipo de la expresión según la clase del valor constante
+        n.type = _const_types.get(n.value.__class__)
+        if n.type is None:
             raise CheckError(f"Tipo de valor constante '{type(n.value).__name__}' no reconocido.")
 
-    def visit(self, n: NewArrayExpr, env: ChainMap, symbol_table: SymbolTable):
+    def visit(self, n: NewArrayExpr, env: dict, symbol_table: SymbolTable):
         '''
         1. Verificar que el tipo del array sea válido.
         2. Verificar que el tamaño sea de tipo 'int'.
         '''
-        n.size.accept(self, env, symbol_table)
-        
-        if n.size.type != "int":
-            raise CheckError(f"El tamaño del array debe ser de tipo 'int', pero se encontró '{n.size.type}'")
-        
+        yield n.expr
+
+        if n._type not in typenames:
+            raise CheckError(f"El tipo '{n._type}' no es válido para un array")
+
+        if n.expr.type != "int":
+            raise CheckError(f"El tamaño del array debe ser de tipo 'int', pero se encontró '{n.expr.type}'")
+
         # Asignar el tipo de la expresión como el tipo del array
-        n.type = f"array<{n.elem_type}>"
-    
+        n.type = array_of(n._type)
+
+    def visit(self, n: IntToFloatExpr, env: dict, symbol_table: SymbolTable):
+        '''
+        1. Conversión insertada por el propio checker; el resultado es 'float'.
+        '''
+        n.type = FLOAT
+
     def can_cast(self, from_type, to_type):
         # Ejemplo simple de tipos que pueden ser convertidos
         # Se puede extender con lógica más compleja según el lenguaje
@@ -522,44 +648,3 @@ class Checker(Visitor):
             return True
         # Agrega más casos según los tipos que soporte tu lenguaje
         return False
-
-    def validate_main_function(self, symbol_table: SymbolTable):
-        """
-        Verifica que exista una función main en el símbolo de la tabla y que sea única.
-        """
-        # Verificar si la función 'main' está en la tabla de símbolos
-        if symbol_table.lookup_symbol("main") is None:
-            raise CheckError("Debe existir una función 'main' como punto de entrada.")
-
-        # Verificar que la función 'main' no tenga parámetros (según la convención común)
-        main_info = symbol_table.lookup_symbol("main")
-        if main_info != "function":
-            raise CheckError("La función 'main' debe ser declarada sin parámetros.")
-
-        print("La función 'main' está presente y es válida.")
-
-    def validate_main_function(symbol_table: SymbolTable):
-        """
-        Verifica que exista una función main en el símbolo de la tabla y que sea única.
-        """
-        # Verificar si la función 'main' está en la tabla de símbolos
-        if "main" not in symbol_table:
-            raise CheckError("Debe existir una función 'main' como punto de entrada.")
-
-        # Verificar que la función 'main' no tenga parámetros (según la convención común)
-        main_info = symbol_table.lookup_symbol("main")
-        if main_info["type"] != "function" or main_info["params"]:
-            raise CheckError("La función 'main' debe ser declarada sin parámetros.")
-
-        print("La función 'main' está presente y es válida.")
-    
-    def analyze_program(ast, symbol_table):
-        """
-        Analiza el árbol de sintaxis abstracta (AST) y verifica la existencia de la función main.
-        """
-        # Recorrer el árbol de sintaxis y llenar la tabla de símbolos
-        for node in ast.nodes:
-            node.accept(symbol_table)
-
-        # Validar que la función 'main' exista
-        validate_main_function(symbol_table)
@@ -11,48 +11,131 @@ inluido el codigo fuente, informe de errores, etc.
 from rich     import print
 
 from analizador_sintactico.mcast    import Node
-from analizador_lexico.mclex    import Lexer
+from analizador_lexico.mcfastlex  import FastLexer
+from analizador_lexico.mclines    import LineIndex
 from analizador_sintactico.mcparser import Parser
+from .mchecker   import Checker, CheckError
+from .mcquery    import Database
+from interprete.mcbytecode import Compiler
+from interprete.mcvm       import VM
+from interprete.mcinterp   import Interpreter
+from interprete.mcclosure  import ClosureCompiler
+from interprete.mcpycode   import PyCompiler
+from interprete.mcgenc     import Native
+from interprete.mcirvm     import IRMachine
+from interprete.mcpasses   import PassManager
+from interprete.mcruntime  import RunError
 
 class Context:
-    def __init__(self):
-        self.lexer  = Lexer(self)
+    # backend -> función que ejecuta el AST verificado
+    backends = {
+        'vm' : lambda ctx: ctx.vm.run(Compiler.compile(ctx.ast)),
+        'ast': lambda ctx: ctx.interp.run(ctx.ast),
+        'closure': lambda ctx: ClosureCompiler.compile(ctx.ast).run(),
+        'pycode': lambda ctx: PyCompiler.compile(ctx.ast).run(),
+        'c'  : lambda ctx: Native.compile(ctx.ast).run(),
+        'ir' : lambda ctx: IRMachine(ctx.lower()).run(),
+    }
+
+    def __init__(self, backend='vm', passes=None, all_errors=False, jobs=1, incremental=False):
+        self.lexer  = FastLexer(self)
         self.parser = Parser(self)
+        self.vm     = VM()
+        self.interp = Interpreter()
+        self.backend = backend
+        self.passes = passes or PassManager()     # optimizaciones (-O, --passes)
+        self.all_errors = all_errors    # reportar todos los errores semánticos, no solo el primero
+        self.jobs   = jobs              # procesos para verificar las funciones (mcparallel)
+        self.queries = Database(self) if incremental else None  # resultados de cada parse() (mcquery)
         self.source = ''
+        self.lines  = LineIndex('')
         self.ast    = None
         self.have_errors = False
 
     def parse(self, source):
         self.have_errors = False
         self.source = source
+        self.lines = LineIndex(source)
+        if self.queries is not None:
+            # Solo lo que cambió desde el parse() anterior
+            self.ast = self.queries.build(source)
+            if self.ast is not None:
+                return
         self.ast = self.parser.parse(self.lexer.tokenize(self.source))
+        if self.ast is None:
+            self.have_errors = True
+        if not self.have_errors:
+            self.check(lambda: Checker.check(self.ast, self, collect=self.all_errors, jobs=self.jobs))
+        if not self.have_errors:
+            self.ast = self.passes.run_ast(self.ast)
+
+    def check(self, run):
+        '''
+        Reporta los errores del Checker que retorna run()
+        '''
+        try:
+            checker = run()
+        except CheckError as e:
+            self.error('Error semántico', e)
+        else:
+            for d in checker.diagnostics or ():
+                self.error(d.span or 'Error semántico', d.message)
+
+    def lower(self):
+        '''
+        IR del programa verificado, con las pasadas de la IR aplicadas
+        '''
+        if self.queries is not None and self.ast is self.queries.program:
+            return self.queries.lower(self.ast)
+        return self.passes.lower(self.ast)
     
     def run(self):
         if not self.have_errors:
-            pass
+            try:
+                return self.backends[self.backend](self)
+            except RunError as e:
+                self.error('Error de ejecución', e)
     
     def find_source(self, node):
         indices = self.parser.index_position(node)
         if indices:
             return self.source[indices[0]:indices[1]]
-        else:
-            return f"{type(node).__name__} (fuente no disponible)"
-    
+        lineno = self.parser.line_position(node)
+        if lineno:
+            return self.lines.line(lineno)
+        return f"{type(node).__name__} (fuente no disponible)"
+
+    def position(self, node):
+        '''
+        (línea, columna) donde empieza el nodo, o None si no se conoce
+        '''
+        indices = self.parser.index_position(node)
+        if indices:
+            return self.lines.position(indices[0])
+        return None
+
     def error(self, position, message):
+        '''
+        position puede ser un nodo del AST, un token, un rango (inicio,
+        fin), un número de línea o un texto; con nodos, tokens y rangos se
+        muestra la línea y el rango.
+        '''
         if isinstance(position, Node):
-            lineno = self.parser.line_position(position)
-            (start, end) = (part_start, part_end) = self.parser.index_position(position)
-            while start >= 0 and self.source[start] != '\n':
-                start -= 1
-
-            start += 1
-            while end < len(self.source) and self.source[end] != '\n':
-                end += 1
+            indices = self.parser.index_position(position)
+        elif hasattr(position, 'index') and hasattr(position, 'end'):
+            indices = (position.index, position.end)   # Token también es una tupla
+        elif isinstance(position, tuple):
+            indices = position
+        else:
+            indices = None
+
+        if indices:
+            lineno, col = self.lines.position(indices[0])
+            line, marker = self.lines.snippet(*indices)
             print()
-            print(self.source[start:end])
-            print(" "*(part_start - start), end='')
-            print("^"*(part_end - part_start))
-            print(f"{lineno}: {message}")
+            print(line)
+            print(marker)
+            print(f"{lineno}:{col}: {message}")
         else:
             print(f"{position}: {message}")
         self.have_errors = True
@@ -0,0 +1,276 @@
+# mcparallel.py
+'''
+Verificación en Paralelo
+------------------------
+
+Checker.check(program, jobs=N) verifica los cuerpos de las funciones en
+N procesos (o en N hilos si el intérprete no tiene GIL). Una vez
+conocidas las declaraciones globales, cada cuerpo se verifica sin mirar
+los demás:
+
+1. Una primera pasada, en este proceso y en orden, verifica las
+   variables globales y registra cada nombre global con la posición de
+   su declaración (las funciones con su firma, un FuncDeclStmt sin
+   cuerpo).
+2. Las funciones se reparten en lotes. Cada una se verifica con una
+   tabla de símbolos que solo ve los nombres declarados antes que ella,
+   igual que en la verificación secuencial.
+3. Los errores se juntan en el orden del código. Sin collect se lanza
+   el primero, el mismo que encuentra la verificación secuencial.
+
+Los procesos se crean con fork y heredan el AST ya analizado. Copiar el
+AST con pickle cuesta más que verificarlo, así que cada proceso regresa
+solo el tipo de cada nodo (un índice en la lista de nombres de los
+tipos que usó la función) y dónde se insertó un IntToFloatExpr, que
+este proceso aplica al AST original. Los ids de mctypesys no sirven:
+un proceso puede crear tipos (por ejemplo array<void> en un parámetro
+inválido) que este proceso no conoce. Sin fork (Windows) la verificación es secuencial.
+'''
+from array import array
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import multiprocessing
+import os
+import sys
+
+from analizador_sintactico.mcast import *
+from analizador_sintactico.mcast import _fields_of
+from .mchecker   import Checker, SymbolTable, Diagnostic
+from .mctypesys  import CheckError, FLOAT, builtin_funcs, intern_type
+
+_can_fork = 'fork' in multiprocessing.get_all_start_methods()
+
+_missing = object()
+
+
+class _Declared(dict):
+    '''
+    Globales visibles desde la declaración número 'position': de cada
+    nombre, el último valor registrado antes de ella. Lo que se agrega
+    al verificar (la propia función) se guarda en el dict.
+    '''
+    def __init__(self, history, position):
+        super().__init__()
+        self.history  = history     # nombre -> [(posición, valor)]
+        self.position = position
+
+    def get(self, name, default=None):
+        if dict.__contains__(self, name):
+            return dict.__getitem__(self, name)
+        value = default
+        for position, v in self.history.get(name, ()):
+            if position >= self.position:
+                break
+            value = v
+        return value
+
+    def __contains__(self, name):
+        return self.get(name, _missing) is not _missing
+
+
+# Estado que heredan los procesos del pool (ver check_program)
+_program = None
+_history = None
+_collect = False
+
+
+def check_function(func: FuncDeclStmt, position, history, collect=False):
+    '''
+    Verifica la función que está en la posición 'position' del programa
+    con los globales declarados antes de ella; retorna sus errores como
+    Diagnostic
+    '''
+    symbol_table = SymbolTable()
+    symbol_table.globals = _Declared(history, position)
+    checker = Checker(collect)
+    try:
+        func.accept(checker, { }, symbol_table)
+        return checker.diagnostics or []
+    except CheckError as e:
+        return [Diagnostic(func.span, str(e))]
+
+
+def _check_functions(batch, n: Program, history, collect):
+    # [(posición, errores)] de las funciones en las posiciones de batch
+    return [(position, check_function(n.decls[position], position, history, collect))
+            for position in batch]
+
+
+def _check_in_process(batch):
+    # En otro proceso: retorna también la anotación de cada función
+    results = _check_functions(batch, _program, _history, _collect)
+    return [(position, _annotations(_program.decls[position]), errors)
+            for position, errors in results]
+
+
+def _annotations(func):
+    '''
+    Tipos que anotó el checker: el índice en 'names' del tipo de cada
+    nodo en pre-orden (-2 si no es una expresión o no tiene tipo), sin
+    contar los IntToFloatExpr que insertó, el nombre de cada tipo usado
+    y el lugar de cada IntToFloatExpr como (posición del padre, campo,
+    índice en la lista o None)
+    '''
+    codes = array('i')
+    names = []
+    local = { }                 # id del Type -> índice en names
+    wraps = []
+    stack = [func]
+    while stack:
+        n = stack.pop()
+        position = len(codes)
+        t = getattr(n, 'type', None) if isinstance(n, Expression) else None
+        if t is None:
+            codes.append(-2)
+        else:
+            code = local.get(t.id)
+            if code is None:
+                code = local[t.id] = len(names)
+                names.append(str(t))
+            codes.append(code)
+        for name in reversed(_fields_of(n.__class__)):
+            value = getattr(n, name)
+            if isinstance(value, IntToFloatExpr):
+                wraps.append((position, name, None))
+                stack.append(value.expr)
+            elif isinstance(value, Node):
+                stack.append(value)
+            elif isinstance(value, list):
+                for i in range(len(value) - 1, -1, -1):
+                    x = value[i]
+                    if isinstance(x, IntToFloatExpr):
+                        wraps.append((position, name, i))
+                        stack.append(x.expr)
+                    elif isinstance(x, Node):
+                        stack.append(x)
+    return codes, names, wraps
+
+
+def _annotate(func, annotations):
+    '''
+    Aplica a func (sin verificar) lo que retorna _annotations
+    '''
+    codes, names, wraps = annotations
+    types = [intern_type(name) for name in names]
+    parents = {position for position, _, _ in wraps}
+    nodes = { }
+    stack = [func]
+    position = 0
+    while stack:
+        n = stack.pop()
+        code = codes[position]
+        if code != -2:
+            n.type = types[code]
+        if position in parents:
+            nodes[position] = n
+        position += 1
+        for name in reversed(_fields_of(n.__class__)):
+            value = getattr(n, name)
+            if isinstance(value, Node):
+                stack.append(value)
+            elif isinstance(value, list):
+                stack.extend(x for x in reversed(value) if isinstance(x, Node))
+    for position, name, i in wraps:
+        parent = nodes[position]
+        if i is None:
+            setattr(parent, name, IntToFloatExpr(getattr(parent, name), type=FLOAT))
+        else:
+            value = getattr(parent, name)
+            value[i] = IntToFloatExpr(value[i], type=FLOAT)
+
+
+def _free_threaded():
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+
+def declare_globals(n: Program, collect=False):
+    '''
+    Primera pasada, en orden: verifica las variables globales y registra
+    cada nombre global con la posición de su declaración. Retorna
+    (history, errors, positions): nombre -> [(posición, valor)],
+    posición -> [Diagnostic] de las globales y las posiciones de las
+    funciones que falta verificar.
+    '''
+    symbol_table = SymbolTable()
+    history = { }
+
+    def register(name, value, position):
+        symbol_table.add_symbol(name, value, 'global')
+        history.setdefault(name, []).append((position, value))
+
+    for name in builtin_funcs:
+        register(name, 'function', -1)
+
+    errors = { }
+    positions = []
+    for position, decl in enumerate(n.decls):
+        if isinstance(decl, FuncDeclStmt):
+            positions.append(position)
+            register(decl.name, FuncDeclStmt(decl.name, decl.params, None, decl.return_type,
+                                             span=decl.span), position)
+            continue
+        local = Checker(collect)
+        try:
+            decl.accept(local, { }, symbol_table)
+            errors[position] = local.diagnostics or []
+        except CheckError as e:
+            errors[position] = [Diagnostic(decl.span, str(e))]
+        if errors[position] and not collect:
+            break                           # las funciones siguientes no se verifican
+        ident = getattr(decl, 'ident', None)
+        if symbol_table.globals.get(ident) is decl:
+            history.setdefault(ident, []).append((position, decl))
+    return history, errors, positions
+
+
+def report(n: Program, errors, collect=False):
+    '''
+    Junta los errores de cada declaración (posición -> [Diagnostic]) en
+    el orden del código y verifica main. Sin collect lanza el primero.
+    '''
+    checker = Checker(collect)
+    main_found = False
+    for position, decl in enumerate(n.decls):
+        for d in errors.get(position, ()):
+            if not collect:
+                raise CheckError(d.message)
+            checker.diagnostics.append(d)
+        main_found |= checker.check_main(decl)
+    checker.check_main_found(n, main_found)
+    return checker
+
+
+def check_program(n: Program, collect=False, jobs=None):
+    jobs = jobs or os.cpu_count() or 1
+
+    # 1. Globales y firmas
+    history, errors, positions = declare_globals(n, collect)
+
+    # 2. Cuerpos de las funciones
+    global _program, _history, _collect
+    size = max(1, len(positions) // (jobs * 4))
+    batches = [positions[i:i + size] for i in range(0, len(positions), size)]
+    results = []
+    if jobs == 1 or len(batches) < 2 or not (_free_threaded() or _can_fork):
+        for batch in batches:
+            results.extend(_check_functions(batch, n, history, collect))
+    elif _free_threaded():
+        # Los hilos anotan directamente el AST (cada uno sus funciones)
+        with ThreadPoolExecutor(jobs) as pool:
+            for batch_results in pool.map(lambda b: _check_functions(b, n, history, collect), batches):
+                results.extend(batch_results)
+    else:
+        # Los procesos heredan el AST al crearse y solo regresan los tipos
+        _program, _history, _collect = n, history, collect
+        try:
+            with ProcessPoolExecutor(jobs, mp_context=multiprocessing.get_context('fork')) as pool:
+                for batch_results in pool.map(_check_in_process, batches):
+                    for position, annotations, func_errors in batch_results:
+                        _annotate(n.decls[position], annotations)
+                        results.append((position, func_errors))
+        finally:
+            _program = _history = None
+
+    # 3. Errores en el orden del código
+    errors.update(results)
+    return report(n, errors, collect)
@@ -0,0 +1,405 @@
+# mcquery.py
+'''
+Compilación Incremental
+-----------------------
+
+Database guarda, de una compilación a la siguiente, el resultado de
+cada etapa por declaración global (una función o una variable) y solo
+vuelve a ejecutar las consultas cuyas entradas cambiaron. Se usa con
+Context(incremental=True): cada ctx.parse(source) pasa por build().
+
+  split             rangos de las declaraciones globales, contando
+                    llaves y ';' fuera de cadenas y comentarios. Solo se
+                    recorre la parte que cambió desde el build()
+                    anterior (ver resplit): las declaraciones antes y
+                    después de la edición se reutilizan en su lugar sin
+                    volver a leer su texto
+  parse             tokens y AST de una declaración; clave: hash del
+                    texto de la declaración
+  signature         tipo de retorno y parámetros de una función, tipo
+                    de una variable; sale del AST
+  check             función verificada (y con las pasadas del AST) y sus
+                    errores; clave: hash del texto + firma de cada
+                    nombre global que aparece en ella, tal como se ve
+                    desde su posición
+  lower             mcir.Function con las pasadas de la IR; clave: la de
+                    check + la firma de cada global que usa. Si esas
+                    globales o funciones quedaron en otro índice del
+                    módulo, la Function se copia con los índices nuevos
+                    (relocate) en lugar de traducirla otra vez
+
+Cambiar el cuerpo de una función solo la verifica otra vez a ella: las
+que la llaman dependen de su firma, no de su texto. Cambiar una firma
+verifica de nuevo las funciones que usan ese nombre y nada más. Una
+declaración que no cambió pero quedó en otra posición (se editó algo
+antes) conserva sus resultados y sus spans se mueven con
+mcast.shift_spans; una que se movió a otro lugar del archivo se
+encuentra por el hash de su texto.
+
+La verificación anota el AST en su lugar, así que el AST de una
+declaración pertenece a su último resultado: si una función se tiene que
+verificar otra vez sin que cambie su texto, su parse se ejecuta de nuevo.
+Cada build() conserva solo las entradas que usó.
+
+Las variables globales se verifican en cada build() (mcparallel.
+declare_globals; es barato) y los errores se reportan en el orden del
+código, igual que la verificación de mcparallel. Si una declaración no
+se puede analizar por separado (error léxico o de sintaxis, o llaves
+que no cierran), build() retorna None y Context.parse analiza el
+archivo completo, que reporta los errores como siempre.
+'''
+from bisect      import bisect_left, bisect_right
+from collections import Counter
+from contextlib  import redirect_stdout
+import hashlib
+import io
+import re
+
+from analizador_lexico.mcfastlex  import FastLexer
+from analizador_sintactico.mcast  import *
+from analizador_sintactico.mcparser import Parser
+from interprete.mcir import relocate
+from .mcparallel import check_function, declare_globals, report, _Declared
+
+# Cadenas, comentarios (que pueden contener llaves) y los símbolos que
+# cierran una declaración global
+_boundary = re.compile(r'"(?:\\.|[^"\\])*"|//[^\n]*|/\*.*?\*/|[{};]', re.S)
+
+
+def _ends(source, start=0):
+    '''
+    Posición donde termina cada declaración global desde 'start', que
+    debe estar entre dos declaraciones
+    '''
+    depth = 0
+    for m in _boundary.finditer(source, start):
+        c = m.group()
+        if c == '{':
+            depth += 1
+        elif c == '}':
+            depth -= 1
+            if depth == 0:
+                yield m.end()
+        elif c == ';' and depth == 0:
+            yield m.end()
+
+
+def split(source):
+    '''
+    Rangos (inicio, fin) de las declaraciones globales, sin huecos: cada
+    uno incluye los espacios y comentarios que lo preceden. Lo que sigue
+    a la última declaración no está en ningún rango.
+    '''
+    spans = []
+    start = 0
+    for end in _ends(source):
+        spans.append((start, end))
+        start = end
+    return spans
+
+
+def _common_prefix(a, b, limit):
+    # Se comparan bloques (memcmp) y solo el último carácter por carácter
+    i, step = 0, 4096
+    while i < limit:
+        j = min(i + step, limit)
+        if a[i:j] != b[i:j]:
+            break
+        i = j
+    else:
+        return limit
+    while a[i] == b[i]:
+        i += 1
+    return i
+
+
+def _common_suffix(a, b, limit):
+    la, lb = len(a), len(b)
+    i, step = 0, 4096
+    while i < limit:
+        j = min(i + step, limit)
+        if a[la - j:la - i] != b[lb - j:lb - i]:
+            break
+        i = j
+    else:
+        return limit
+    while a[la - 1 - i] == b[lb - 1 - i]:
+        i += 1
+    return i
+
+
+def _digest(text):
+    return hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+
+def _idents(n: Node):
+    # Nombres que aparecen en la declaración (globales, locales y parámetros)
+    names = set()
+    for c in preorder(n):
+        for attr in ('ident', 'name'):
+            value = getattr(c, attr, None)
+            if isinstance(value, str):
+                names.add(value)
+    return tuple(sorted(names))
+
+
+def signature(value):
+    '''
+    Lo que el checker usa de un nombre global al verificar otra función
+    '''
+    if isinstance(value, FuncDeclStmt):
+        return ('function', value.return_type, tuple((p.type_spec, p.is_array) for p in value.params))
+    if isinstance(value, VarDeclStmt):
+        return ('var', value.type_spec, value.is_array)
+    return value            # None o 'function' (predefinida)
+
+
+def _remap(old, new):
+    '''
+    (gmap, fmap): índice anterior -> nuevo de las globales y funciones,
+    a partir de los (tipo, índice) de los mismos nombres en dos módulos
+    '''
+    gmap, fmap = { }, { }
+    for before, after in zip(old, new):
+        if before is not None:
+            (gmap if before[0] == 'global' else fmap)[before[1]] = after[1]
+    return gmap, fmap
+
+
+class _Decl:
+    '''
+    Una declaración global y los resultados de sus consultas
+    '''
+    __slots__ = ('digest', 'node', 'start', 'idents', 'checked', 'folded', 'errors', 'lowered')
+
+    def __init__(self, digest, node, start):
+        self.digest  = digest       # hash del texto
+        self.node    = node
+        self.start   = start        # posición con la que están los spans de node
+        self.idents  = _idents(node)
+        self.checked = None         # clave con la que se verificó (None: solo analizada)
+        self.folded  = False        # ya pasó por las pasadas del AST
+        self.errors  = []           # Diagnostic de la verificación
+        self.lowered = None         # (clave, mcir.Function, índices que usa)
+
+    def move(self, start):
+        delta = start - self.start
+        if delta:
+            shift_spans(self.node, delta)
+            self.errors = [d._replace(span=d.span and (d.span[0] + delta, d.span[1] + delta))
+                           for d in self.errors]
+            self.start = start
+
+
+class _Silent:
+    # ctx del lexer y el parser de una declaración: los errores solo se anotan
+    def __init__(self):
+        self.lines  = None
+        self.failed = False
+
+    def error(self, position, message):
+        self.failed = True
+
+
+class _DeclLexer(FastLexer):
+    def _slow_token(self, m, kind, value, lineno):
+        # Un token descartado es un error léxico
+        index = super()._slow_token(m, kind, value, lineno)
+        if self._tok is None:
+            self.ctx.failed = True
+        return index
+
+
+class Database:
+
+    def __init__(self, ctx):
+        self.ctx      = ctx
+        self.silent   = _Silent()
+        self.lexer    = _DeclLexer(self.silent)
+        self.parser   = Parser(self.silent)
+        self.decls    = { }         # hash del texto -> [_Decl]
+        # Del último build() que terminó: el código, el rango de cada
+        # declaración (ver split) y sus entradas, en orden
+        self.source   = ''
+        self.spans    = []
+        self.entries  = []
+        self.program  = None        # Program que retornó el último build()
+        self.executed = Counter()   # consultas ejecutadas en el último build()
+
+    def parse(self, source, start, end):
+        '''
+        AST de la declaración source[start:end] o None si tiene errores
+        '''
+        self.executed['parse'] += 1
+        silent = self.silent
+        silent.lines, silent.failed = self.ctx.lines, False
+        def tokens():
+            for tok in self.lexer.tokenize(source, silent.lines.lineno(start), start):
+                if tok.index >= end:
+                    return
+                yield tok
+        # Los mensajes del lexer se imprimen de nuevo al analizar el archivo completo
+        with redirect_stdout(io.StringIO()):
+            program = self.parser.parse(tokens())
+        if silent.failed or program is None or len(program.decls) != 1:
+            return None
+        return program.decls[0]
+
+    def resplit(self, source):
+        '''
+        Rangos de las declaraciones de source a partir de los del build()
+        anterior: con el prefijo y el sufijo que source comparte con
+        self.source, solo se recorre desde la primera declaración tocada
+        hasta que un fin de declaración después del cambio coincide con
+        uno anterior (desde ahí el texto y el estado del recorrido son
+        los mismos). Retorna (spans, entries), con la entrada anterior de
+        cada rango que no se tocó y None en los demás.
+        '''
+        old, spans = self.source, self.spans
+        if not spans:
+            new = split(source)
+            self.executed['split'] += len(new)
+            return new, [None] * len(new)
+
+        limit = min(len(old), len(source))
+        prefix = _common_prefix(old, source, limit)
+        suffix = _common_suffix(old, source, limit - prefix)
+        delta = len(source) - len(old)
+        changed_end = len(source) - suffix
+
+        # Primera declaración tocada; la última también incluye lo que le sigue
+        ends = [end for _, end in spans]
+        first = min(bisect_right(ends, prefix), len(spans) - 1)
+        start = spans[first][0]
+        new = []
+        resync = len(spans)
+        for end in _ends(source, start):
+            new.append((start, end))
+            start = end
+            if end >= changed_end:
+                k = bisect_left(ends, end - delta)
+                if k < len(ends) and ends[k] == end - delta:
+                    resync = k + 1
+                    break
+        self.executed['split'] += len(new)
+        tail = [(a + delta, b + delta) for a, b in spans[resync:]]
+        return (spans[:first] + new + tail,
+                self.entries[:first] + [None] * len(new) + self.entries[resync:])
+
+    def build(self, source):
+        '''
+        Program verificado (con las pasadas del AST si no hay errores) o
+        None si hay que analizar el archivo completo
+        '''
+        ctx = self.ctx
+        self.executed = Counter()
+        self.program = None
+        spans, entries = self.resplit(source)
+        if not spans:
+            return None
+
+        # Análisis: las declaraciones que no se tocaron se reutilizan en su
+        # lugar y las demás se buscan por el hash de su texto. Con un error
+        # no cambia nada y el siguiente build() compara con el anterior.
+        chunks = spans[:-1] + [(spans[-1][0], len(source))]
+        kept = {id(e) for e in entries if e is not None}
+        taken = set()
+        for i, (start, end) in enumerate(chunks):
+            if entries[i] is not None and i < len(chunks) - 1:
+                continue
+            digest = _digest(source[start:end])
+            entry = entries[i]
+            if entry is None or entry.digest != digest:
+                pool = self.decls.get(digest, ())
+                entry = next((e for e in pool if id(e) not in kept and id(e) not in taken), None)
+            if entry is None:
+                node = self.parse(source, start, end)
+                if node is None:
+                    return None
+                entry = _Decl(digest, node, start)
+            taken.add(id(entry))
+            entries[i] = entry
+        for entry, (start, _) in zip(entries, chunks):
+            entry.move(start)
+        self.decls = { }
+        for entry in entries:
+            self.decls.setdefault(entry.digest, []).append(entry)
+        self.source, self.spans, self.entries = source, spans, entries
+
+        # Verificación: solo las funciones cuyo texto o dependencias cambiaron
+        program = Program([e.node for e in entries],
+                          span=(entries[0].node.span[0], entries[-1].node.span[1]))
+        collect = ctx.all_errors
+        history, errors, positions = declare_globals(program, collect)
+        for position in positions:
+            entry = entries[position]
+            declared = _Declared(history, position)
+            key = (collect, tuple((name, signature(declared.get(name))) for name in entry.idents))
+            if entry.checked != key:
+                if entry.checked is not None:
+                    start, end = chunks[position]
+                    entry.node = program.decls[position] = self.parse(source, start, end)
+                    entry.folded, entry.lowered = False, None
+                self.executed['check'] += 1
+                entry.errors = check_function(entry.node, position, history, collect)
+                entry.checked = key
+            errors[position] = entry.errors
+        self.program = program
+        ctx.check(lambda: report(program, errors, collect))
+        if ctx.have_errors:
+            return program
+
+        # Pasadas del AST de las funciones que no las tienen
+        pending = [e for e in entries if not e.folded and isinstance(e.node, FuncDeclStmt)]
+        if pending:
+            folded = ctx.passes.run_ast(Program([e.node for e in pending]))
+            for entry, node in zip(pending, folded.decls):
+                entry.node, entry.folded = node, True
+            program.decls = [e.node for e in entries]
+        return program
+
+    def lower(self, n: Program):
+        '''
+        mcir.Module de n (el último build()): solo se traducen las
+        funciones cuya clave de lower cambió. Una función que se
+        reutiliza pero cuyas globales o funciones quedaron en otro índice
+        se copia con los índices nuevos (mcir.relocate).
+        '''
+        passes = self.ctx.passes
+        layout = { }                # nombre -> lo que lower usa de él
+        slots  = { }                # nombre -> (tipo, índice en el módulo)
+        nglobals = nfunctions = 0
+        for decl in n.decls:
+            if isinstance(decl, FuncDeclStmt):
+                layout[decl.name] = 'function'
+                slots[decl.name] = ('function', nfunctions)
+                nfunctions += 1
+            else:
+                layout[decl.ident] = signature(decl)
+                slots[decl.ident] = ('global', nglobals)
+                nglobals += 1
+
+        pipeline = tuple(passes.pipeline)
+        functions = [e for e in self.entries if isinstance(e.node, FuncDeclStmt)]
+        keys, places = [], []
+        reuse = { }
+        for e in functions:
+            key = (pipeline, e.checked, tuple(layout.get(name) for name in e.idents))
+            place = tuple(slots.get(name) for name in e.idents)
+            keys.append(key)
+            places.append(place)
+            if e.lowered is None or e.lowered[0] != key:
+                continue
+            _, func, old = e.lowered
+            if old != place:
+                self.executed['relocate'] += 1
+                func = relocate(func, *_remap(old, place))
+                e.lowered = (key, func, place)
+            reuse[id(e.node)] = func
+
+        module = passes.lower(n, reuse)
+        for entry, key, place, func in zip(functions, keys, places, module.functions):
+            if id(entry.node) not in reuse:
+                self.executed['lower'] += 1
+                entry.lowered = (key, func, place)
+        return module
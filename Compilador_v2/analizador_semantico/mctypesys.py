@@ -1,10 +1,81 @@
 # mctypesys.py
-# Conjunto valido de typenames
-from analizador_semantico.mchecker import CheckError
+'''
+Sistema de Tipos
+----------------
+
+Los tipos son objetos Type únicos por nombre ('int', 'array<float>',
+...) con un número, Type.id. Type es un str, así que se compara, se
+imprime y se usa como clave igual que su nombre y el resto del
+compilador (que compara n.type == 'int') no cambia; pero el checker
+consulta las operaciones en tablas densas indexadas por el número del
+operador y de los tipos en lugar de armar una tupla de strings por
+cada expresión:
+
+    _binary_table[op_id][left.id][right.id]  -> Type del resultado o None
+'''
+
+
+class CheckError(Exception):
+    pass
+
+
+class Type(str):
+    '''
+    Usar intern_type() o array_of(); nunca Type(...) directamente.
+    '''
+    # id: posición en 'all_types'; element: tipo de los elementos de un arreglo
+
+    def __reduce__(self):
+        # Al copiar o pasar a otro proceso se obtiene el mismo objeto
+        return intern_type, (str(self),)
+
+
+all_types = []          # id -> Type
+_types_by_name = { }
+_binary_table  = []     # ver _build_tables
+_unary_table   = []
+
+
+def intern_type(name) -> Type:
+    '''
+    El Type de un nombre de tipo; 'array<T>' es un arreglo de T
+    '''
+    t = _types_by_name.get(name)
+    if t is None:
+        t = Type(name)
+        t.id = len(all_types)
+        t.element = None
+        if name.startswith('array<') and name.endswith('>'):
+            t.element = intern_type(name[6:-1])
+        all_types.append(t)
+        _types_by_name[name] = t
+        if _binary_table:
+            _build_tables()
+    return t
+
+
+def array_of(element) -> Type:
+    return intern_type(f'array<{element}>')
 
 
 typenames = {'int', 'float', 'bool'}
 
+INT    = intern_type('int')
+FLOAT  = intern_type('float')
+BOOL   = intern_type('bool')
+STRING = intern_type('string')
+VOID   = intern_type('void')
+ERROR  = intern_type('<error>')   # veneno: expresión con un error ya reportado
+for _name in sorted(typenames):
+    array_of(_name)
+
+# Funciones predefinidas y su tipo de retorno
+builtin_funcs = {
+    'printf': VOID,
+    'scanf' : VOID,
+    'iread' : INT,
+}
+
 # Tabla de todas las operaciones binarias soportadas y el tipo resultante
 _binary_ops = {
     # Operaciones int
@@ -12,6 +83,7 @@ _binary_ops = {
     ('-', 'int', 'int') : 'int',
     ('*', 'int', 'int') : 'int',
     ('/', 'int', 'int') : 'int',
+    ('%', 'int', 'int') : 'int',
     
     # Operaciones float
     ('+', 'float', 'float') : 'float',
@@ -84,40 +156,70 @@ _unary_ops = {
     ('!', 'bool') : 'bool',
 }
 
+# Tablas densas: operador -> tipo izquierdo -> tipo derecho -> resultado
+binary_opnames = sorted({op for op, _, _ in _binary_ops})
+unary_opnames  = sorted({op for op, _ in _unary_ops})
+binary_op_ids  = {op: i for i, op in enumerate(binary_opnames)}
+unary_op_ids   = {op: i for i, op in enumerate(unary_opnames)}
+
+
+def _build_tables():
+    n = len(all_types)
+    _binary_table[:] = [[[None] * n for _ in range(n)] for _ in binary_opnames]
+    _unary_table[:]  = [[None] * n for _ in unary_opnames]
+    for (op, left, right), result in _binary_ops.items():
+        _binary_table[binary_op_ids[op]][intern_type(left).id][intern_type(right).id] = intern_type(result)
+    for (op, operand), result in _unary_ops.items():
+        _unary_table[unary_op_ids[op]][intern_type(operand).id] = intern_type(result)
+
+_build_tables()
+
+
+def binary_type(op, left: Type, right: Type):
+    '''
+    Tipo del resultado de la operación o None si no está definida
+    '''
+    op_id = binary_op_ids.get(op)
+    if op_id is None:
+        return None
+    return _binary_table[op_id][left.id][right.id]
+
+
+def unary_type(op, operand: Type):
+    op_id = unary_op_ids.get(op)
+    if op_id is None:
+        return None
+    return _unary_table[op_id][operand.id]
+
+
 def loockup_type(name):
     '''
-    Dado el nombre de un tipo primitivo, se busca el objeto "type" apropiado.
-    Para empezar, los tipos son solo nombres, pero mas adelante pueden ser
-    objetos mas avanzados.
+    Dado el nombre de un tipo primitivo, retorna su Type o None.
     '''
     if name in typenames:
-        return name
+        return intern_type(name)
     else:
         return None
     
-def check_binary_op(op, left, right):
+def check_binary_op(op, left: Type, right: Type):
     '''
     Revisa si una operacion binaria es permitida o no.
     Si las operaciones entre tipos primitivos no son compatibles, puede realizar conversiones.
     '''
-    # Primero, revisamos si los tipos son iguales
-    if left == right:
-        return _binary_ops.get((op, left, right))
-    
-    # Si los tipos son diferentes, verificamos si hay alguna conversión permitida
-    result_type = _binary_ops.get((op, left, right))
-    if not result_type:
+    result_type = binary_type(op, left, right)
+
+    # Con tipos iguales el checker reporta el error (retornamos None); con
+    # tipos diferentes no hay ninguna conversión permitida
+    if result_type is None and left is not right:
         raise CheckError(f"La operación {op} no está definida para {left} y {right}") 
-    
-    # Si no hay una operación válida entre estos tipos, devolvemos None
     return result_type
 
 
-def check_unary_op(op, expr_type):
+def check_unary_op(op, expr_type: Type):
     """
     Verifica si una operación unaria es válida con el tipo de expresión proporcionado.
     """
-    result_type = _unary_ops.get((op, expr_type))
+    result_type = unary_type(op, expr_type)
     if not result_type:
         raise CheckError(f"La operación unaria {op} no está definida para {expr_type}")
     return result_type
@@ -2,40 +2,186 @@
 '''
 Estructura del AST (básica). 
 '''
-from dataclasses import dataclass, field
-from multimethod import multimeta # type: ignore
-from typing import Union, List
-from graphviz import Digraph
+from dataclasses import dataclass, field, fields
+from typing import Union, List, Optional, Tuple, get_args, get_origin
+import inspect
+import io
+import re
+import types
 
 
 
+# =====================================================================
+# Despacho de Visitantes
+# =====================================================================
+# Una clase Visitor define varios métodos 'visit(self, n: TipoNodo, ...)'.
+# VisitorMeta los reúne por el tipo anotado del primer argumento y crea
+# una tabla por clase: la primera vez que se visita una clase de nodo se
+# busca el método más específico siguiendo el MRO del nodo y el
+# resultado queda en la tabla, así que las visitas siguientes cuestan
+# una sola búsqueda en un diccionario.
+
+class _VisitorNamespace(dict):
+    # Las redefiniciones de 'visit' se acumulan en lugar de reemplazarse
+    def __init__(self):
+        super().__init__()
+        self.visits = []
+
+    def __setitem__(self, key, value):
+        if key == 'visit' and inspect.isfunction(value):
+            self.visits.append(value)
+        else:
+            super().__setitem__(key, value)
+
+
+class _DispatchTable(dict):
+    def __init__(self, visitor_cls, handlers):
+        super().__init__()
+        self.visitor_cls = visitor_cls
+        self.handlers = handlers
+
+    def __missing__(self, node_cls):
+        for base in node_cls.__mro__:
+            handler = self.handlers.get(base)
+            if handler is not None:
+                self[node_cls] = handler
+                return handler
+        raise TypeError(f"{self.visitor_cls.__name__} no tiene visit() para '{node_cls.__name__}'")
+
+
+def _visited_types(func):
+    # Tipos anotados en el primer argumento después de self
+    params = list(inspect.signature(func, eval_str=True).parameters.values())
+    if len(params) < 2 or params[1].annotation is inspect.Parameter.empty:
+        raise TypeError(f"{func.__qualname__}: el nodo visitado debe tener anotación de tipo")
+    annotation = params[1].annotation
+    if get_origin(annotation) in (Union, types.UnionType):
+        return get_args(annotation)
+    return (annotation,)
+
+
+class VisitorMeta(type):
+
+    @classmethod
+    def __prepare__(meta, name, bases, **kwargs):
+        return _VisitorNamespace()
+
+    def __new__(meta, name, bases, namespace, **kwargs):
+        cls = super().__new__(meta, name, bases, dict(namespace), **kwargs)
+
+        # Los métodos heredados se pueden redefinir por tipo
+        handlers = {}
+        for base in reversed(cls.__mro__[1:]):
+            handlers.update(vars(base).get('_visit_handlers', {}))
+        for func in namespace.visits:
+            for node_cls in _visited_types(func):
+                handlers[node_cls] = func
+
+        cls._visit_handlers = handlers
+        cls._visit_table = _DispatchTable(cls, handlers)
+        return cls
+
+
+# =====================================================================
+# Recorrido con pila explícita
+# =====================================================================
+# Un visit() puede escribirse como generador: en lugar de llamar a
+# 'hijo.accept(self, ...)' hace 'valor = yield hijo' (mismos argumentos)
+# o 'valor = yield hijo, arg1, arg2' (otros argumentos). _drive ejecuta
+# esos generadores sobre una lista, así que la profundidad del árbol no
+# consume la pila de Python. Las excepciones de un hijo se relanzan
+# dentro del generador del padre, de modo que try/except/finally se
+# comportan igual que en la versión recursiva.
+
+def _drive(v, gen, args, kwargs):
+    table = v._visit_table
+    stack = [(gen, args, kwargs)]
+    value = error = None
+    while stack:
+        gen, args, kwargs = stack[-1]
+        try:
+            if error is None:
+                request = gen.send(value)
+            else:
+                request, error = gen.throw(error), None
+        except StopIteration as stop:
+            stack.pop()
+            value = stop.value
+            continue
+        except BaseException as e:
+            stack.pop()
+            if not stack:
+                raise
+            error = e
+            continue
+
+        if request.__class__ is tuple:
+            child, *cargs = request
+            ckwargs = { }
+        else:
+            child, cargs, ckwargs = request, args, kwargs
+
+        try:
+            value = table[child.__class__](v, child, *cargs, **ckwargs)
+        except BaseException as e:
+            value, error = None, e
+            continue
+        if value.__class__ is types.GeneratorType:
+            stack.append((value, cargs, ckwargs))
+            value = None
+    return value
+
+
 # =====================================================================
 # Clases Abstractas
 # =====================================================================
-@dataclass
-class Visitor(metaclass=multimeta):
+class Visitor(metaclass=VisitorMeta):
     pass
 
-@dataclass
+def _dispatch(self, n, *args, **kwargs):
+    result = self._visit_table[n.__class__](self, n, *args, **kwargs)
+    if result.__class__ is types.GeneratorType:
+        return _drive(self, result, args, kwargs)
+    return result
+
+# Se asigna fuera del cuerpo de la clase para que VisitorMeta no lo
+# registre como un visit() más; las subclases lo heredan
+Visitor.visit = _dispatch
+
+# Los nodos usan __slots__: no tienen __dict__, así que todos los
+# atributos, incluidas las anotaciones que agregan las etapas
+# posteriores, se declaran aquí. Las anotaciones son keyword-only para
+# no alterar el orden de los argumentos de cada nodo.
+
+def annotation(default=None):
+    return field(default=default, kw_only=True, repr=False, compare=False)
+
+@dataclass(slots=True)
 class Node:
+    span: Optional[Tuple[int, int]] = annotation()   # (inicio, fin) en el código fuente
+
     def accept(self, v: Visitor, *args, **kwargs):
-        return v.visit(self, *args, **kwargs)
+        # Equivale a v.visit(self, ...) sin la llamada intermedia
+        result = v._visit_table[self.__class__](v, self, *args, **kwargs)
+        if result.__class__ is types.GeneratorType:
+            return _drive(v, result, args, kwargs)
+        return result
 
-@dataclass
+@dataclass(slots=True)
 class Statement(Node):
     pass
 
-@dataclass
+@dataclass(slots=True)
 class Declaration(Node):
     pass
 
-@dataclass
+@dataclass(slots=True)
 class Expression(Node):
-    pass
+    type: Optional[str] = annotation()    # Tipo resuelto por el checker
 # =====================================================================
 # Clases Concretas
 # =====================================================================
-@dataclass
+@dataclass(slots=True)
 class NullStmt(Statement):
     """
     Representa una sentencia vacía o una transición nula.
@@ -43,18 +189,18 @@ class NullStmt(Statement):
     """
     pass
 
-@dataclass
+@dataclass(slots=True)
 class Program(Statement):
     decls: List[Declaration] = field(default_factory = list)
 
-@dataclass
+@dataclass(slots=True)
 class ExprStmt(Statement):
     """
     Representa una declaración de expresión.
     """
     expr: Expression
 
-@dataclass
+@dataclass(slots=True)
 class ForStmt(Statement):
     """
     Representa un ciclo 'for' en el programa.
@@ -65,7 +211,7 @@ class ForStmt(Statement):
     body: Statement  # El cuerpo del ciclo (puede ser una declaración o un bloque de instrucciones)
 
 
-@dataclass
+@dataclass(slots=True)
 class IfStmt(Statement):
     """
     Representa una sentencia 'if'.
@@ -74,7 +220,7 @@ class IfStmt(Statement):
     then_stmt: Statement
     else_stmt: Statement = None
 
-@dataclass
+@dataclass(slots=True)
 class WhileStmt(Statement):
     """
     Representa un bucle 'while'.
@@ -82,118 +228,127 @@ class WhileStmt(Statement):
     condition: Expression
     body: Statement
 
-@dataclass
+@dataclass(slots=True)
 class ReturnStmt(Statement):
     """
     Representa una sentencia 'return'.
     """
     expr: Expression
 
-@dataclass
+@dataclass(slots=True)
 class BreakStmt(Statement):
     """
     Representa una sentencia 'break'.
     """
     pass
 
-@dataclass
+@dataclass(slots=True)
 class ContinueStmt(Statement):
     pass
 
-@dataclass
+@dataclass(slots=True)
 class VarDeclStmt(Statement):
     type_spec: str  # o puedes usar un tipo específico si lo has definido
     ident: str
     is_array: bool = False  # Default is False for non-array declarations
 
 
-@dataclass
+@dataclass(slots=True)
 class CompoundStmt(Statement):
     local_decls: List[VarDeclStmt] = field(default_factory=list)  # Lista de declaraciones locales
     stmt_list: List[Statement] = field(default_factory=list)      # Lista de declaraciones
+    depth: Optional[int] = annotation()   # Marco que crea el bloque
+    frame: Optional[list] = annotation()  # Valores iniciales de sus locales
 
 
-@dataclass
+@dataclass(slots=True)
 class FuncDeclStmt(Statement):
     name: str                    # El nombre de la función
     params: List[Declaration]    # Lista de nombres de parámetros
     body: CompoundStmt              # El cuerpo de la función
     return_type: str             # El tipo de retorno de la función
 
-@dataclass
+@dataclass(slots=True)
 class StaticVarDeclStmt(Statement):
     name: str        # El nombre de la variable
     type: str        # El tipo de la variable
     initial_value: Expression  # El valor inicial de la variable
     
 
-@dataclass
-class Param:
+@dataclass(slots=True)
+class Param(Declaration):
     type_spec: str  # Type of the parameter (e.g., 'INT', 'FLOAT', etc.)
     ident: str      # Identifier of the parameter
     is_array: bool  # Indicates if the parameter is an array
 
-@dataclass
+@dataclass(slots=True)
 class ArrayDeclStmt(Declaration):
     ident: str       # Nombre del arreglo
     size: Expression # Expresión que representa el tamaño del arreglo
 
-@dataclass
+@dataclass(slots=True)
 class NewArrayExpr(Expression):
-    _type: str         # El tipo del arreglo (por ejemplo, int, float)
+    _type: str         # El tipo de los elementos del arreglo (por ejemplo, int, float)
     expr: Expression   # La expresión que representa el tamaño del arreglo
-    
-    @property
-    def type(self):
-        return self._type
 
-@dataclass
+@dataclass(slots=True)
 class ConstExpr(Expression):
     value: Union[bool, int, float, str]  # El valor de la constante (puede ser bool, int, float, o str)
 
-@dataclass
+@dataclass(slots=True)
 class BinaryOpExpr(Expression):
     opr: str              # Operador binario (como '+', '-', '*', etc.)
     left: Expression      # Expresión izquierda
     right: Expression     # Expresión derecha
 
-@dataclass
+@dataclass(slots=True)
 class UnaryOpExpr(Expression):
     opr  : str  # El operador unario, por ejemplo: '-', '!', etc.
     expr : Expression  # La expresión sobre la que se aplica el operador unario
 
-@dataclass
+@dataclass(slots=True)
 class CallExpr(Expression):
     ident: str                     # Nombre de la función
     args: List[Expression] = field(default_factory=list)  # Argumentos de la llamada
+    slot: Optional[int] = annotation()    # Índice de la función llamada
 
 
-@dataclass
+@dataclass(slots=True)
 class VarExpr(Expression):
     ident: str              # Identificador de la variable
     var_type: str = None    # Opcional: tipo de la variable (si es relevante)
+    depth: Optional[int] = annotation()   # Marco de la variable (0 = globales), ver interprete/mcinterp.py
+    slot: Optional[int] = annotation()    # Posición dentro del marco
 
-@dataclass
+@dataclass(slots=True)
 class ArrayLookupExpr(Expression):
     ident: str           # Identificador del arreglo
     index: Expression     # Índice para acceder al arreglo
+    depth: Optional[int] = annotation()   # Como en VarExpr
+    slot: Optional[int] = annotation()
     
-@dataclass
+@dataclass(slots=True)
 class ArraySizeExpr(Expression):
     ident: str  # Identificador del arreglo del cual se obtiene el tamaño
+    depth: Optional[int] = annotation()   # Como en VarExpr
+    slot: Optional[int] = annotation()
 
-@dataclass
+@dataclass(slots=True)
 class VarAssignmentExpr(Expression):
     ident: str  # Nombre de la variable a la que se le asigna el valor
     expr: Expression  # Expresión cuyo valor se asigna a la variable
+    depth: Optional[int] = annotation()   # Como en VarExpr
+    slot: Optional[int] = annotation()
 
-@dataclass
+@dataclass(slots=True)
 class ArrayAssignmentExpr(Expression):
     ident: str           # Identificador del arreglo
     index: Expression    # Expresión que evalúa el índice en el arreglo
     expr: Expression     # Expresión que se asignará en la posición del índice
+    depth: Optional[int] = annotation()   # Como en VarExpr
+    slot: Optional[int] = annotation()
 
-@dataclass
+@dataclass(slots=True)
 class IntToFloatExpr(Expression):
     """
     Representa una expresión que convierte un valor de tipo entero a flotante.
@@ -202,296 +357,399 @@ class IntToFloatExpr(Expression):
     
 # =====================================================================
 
+# =====================================================================
+# Recorridos genéricos (sin recursión)
+# =====================================================================
+_child_fields = { }
+
+def _fields_of(cls):
+    # Campos propios del nodo (las anotaciones keyword-only no tienen hijos)
+    names = _child_fields.get(cls)
+    if names is None:
+        names = _child_fields[cls] = tuple(f.name for f in fields(cls) if not f.kw_only)
+    return names
+
+def children(n: Node):
+    '''
+    Hijos directos de n en el orden de sus campos
+    '''
+    result = []
+    for name in _fields_of(n.__class__):
+        value = getattr(n, name)
+        if isinstance(value, Node):
+            result.append(value)
+        elif isinstance(value, list):
+            result.extend(x for x in value if isinstance(x, Node))
+    return result
+
+def preorder(root: Node):
+    '''
+    Genera los nodos en pre-orden (padre antes que sus hijos)
+    '''
+    stack = [root]
+    while stack:
+        n = stack.pop()
+        yield n
+        stack.extend(reversed(children(n)))
+
+def postorder(root: Node):
+    '''
+    Genera los nodos en post-orden (hijos antes que el padre)
+    '''
+    stack = [(root, False)]
+    while stack:
+        n, expanded = stack.pop()
+        if expanded:
+            yield n
+        else:
+            stack.append((n, True))
+            stack.extend((c, False) for c in reversed(children(n)))
+
+def rewrite(root: Node, fn):
+    '''
+    Aplica fn a cada nodo en post-orden. Si fn retorna un nodo distinto,
+    ese nodo reemplaza al original en su padre. Retorna la nueva raíz.
+    '''
+    replaced = { }
+    for n in postorder(root):
+        if replaced:
+            for name in _fields_of(n.__class__):
+                value = getattr(n, name)
+                if isinstance(value, Node):
+                    if id(value) in replaced:
+                        setattr(n, name, replaced.pop(id(value)))
+                elif isinstance(value, list):
+                    for i, x in enumerate(value):
+                        if isinstance(x, Node) and id(x) in replaced:
+                            value[i] = replaced.pop(id(x))
+        new = fn(n)
+        if new is not None and new is not n:
+            replaced[id(n)] = new
+    return replaced.pop(id(root), root)
+
+def shift_spans(root: Node, delta: int):
+    '''
+    Mueve 'delta' caracteres el span de root y de sus descendientes
+    '''
+    if not delta:
+        return
+    stack = [root]
+    while stack:
+        n = stack.pop()
+        span = n.span
+        if span is not None:
+            n.span = (span[0] + delta, span[1] + delta)
+        for name in _fields_of(n.__class__):
+            value = getattr(n, name)
+            if isinstance(value, Node):
+                stack.append(value)
+            elif isinstance(value, list):
+                stack.extend(x for x in value if isinstance(x, Node))
+
 # =====================================================================
 # Clases del Renderizador
 # =====================================================================
 class DotRender(Visitor):
+    '''
+    Escribe el AST en formato DOT a medida que lo recorre: cada nodo y
+    cada arista se escriben en 'out' apenas se conocen, en una sola
+    pasada y sin guardar el grafo en memoria.
+
+    - func:  solo se dibuja la función con ese nombre.
+    - depth: profundidad máxima (el Program es 0); los hijos que quedan
+             fuera se reemplazan por un nodo '...'.
+    '''
     node_default ={
         'shape' : 'box',
-        'color' : 'cian',
+        'color' : 'cyan',
         'style' : 'filled'    
     }
     edge_default = {
         'arrowhead':'none'
     }
     
-    def _init_(self,name):
-        self.dot = Digraph(name)
-        self.dot.attr('node',**self.node_default)
-        self.dot.attr('edge',**self.edge_default)
+    def __init__(self, name, ctx=None, out=None, func=None, depth=None):
+        self.out = out if out is not None else io.StringIO()
         self.program = name 
+        self.ctx = ctx
+        self.func = func
+        self.max_depth = depth
+        self.depth = 0
         self.seq = 0
-        
-    def __repr__(self):
-        return self.dot.source
-    
-    def __str__(self):
-        return self.dot.source
-    
+
     @classmethod
-    def remder(cls,n:Node,name:str="AST"):
-        dot = cls(name)
+    def render(cls, n: Node, name: str="AST", ctx=None, out=None, func=None, depth=None):
+        '''
+        Escribe el grafo en 'out'. Sin 'out' retorna el texto DOT.
+        '''
+        dot = cls(name, ctx, out, func, depth)
+        write = dot.out.write
+        write(f'digraph {_quote(name)} {{\n')
+        write(f'\tnode [{_attrs(cls.node_default)}]\n')
+        write(f'\tedge [{_attrs(cls.edge_default)}]\n')
         n.accept(dot)
-        return dot.dot
+        write('}\n')
+        if out is None:
+            return dot.out.getvalue()
 
     def name(self):
         self.seq += 1
         return f"n{self.seq:02d}"
+
+    def node(self, n: Node, label: str):
+        # Crea el nodo; si el contexto conoce la posición se agrega 'línea:columna'
+        name = self.name()
+        position = self.ctx.position(n) if self.ctx else None
+        if position:
+            label += "\\n%d:%d" % position
+        self.out.write(f'\t{name} [label={_quote(label)}]\n')
+        return name
+
+    def edge(self, parent: str, child: str, label: str=None):
+        if label:
+            self.out.write(f'\t{parent} -> {child} [label={_quote(label)}]\n')
+        else:
+            self.out.write(f'\t{parent} -> {child}\n')
+
+    def child(self, parent: str, n: Node, label: str=None):
+        '''
+        Visita n como hijo de 'parent' y escribe la arista. Se usa con
+        'yield from' dentro de los visit().
+        '''
+        if self.max_depth is not None and self.depth >= self.max_depth:
+            name = self.name()
+            self.out.write(f'\t{name} [label="..." shape=plaintext style=""]\n')
+        else:
+            self.depth += 1
+            try:
+                name = yield n
+            finally:
+                self.depth -= 1
+        self.edge(parent, name, label)
+
     # Visitantes para los nodos del AST
     def visit(self, n: Program):
-        name = self.name()
-        self.dot.node(name, label=f"{self.Program}")
-        for decl in n.decls:
-            self.dot.edge(name, decl.accept(self))
+        name = self.node(n, self.program)
+        decls = n.decls
+        if self.func is not None:
+            decls = [decl for decl in decls if isinstance(decl, FuncDeclStmt) and decl.name == self.func]
+            if not decls:
+                raise KeyError(f"No existe la función '{self.func}'")
+        for decl in decls:
+            yield from self.child(name, decl)
         return name
     
     def visit(self, n: NullStmt):
-        name = self.name()
-        self.dot.node(name, label="NullStmt")
-        return name
+        return self.node(n, "NullStmt")
 
     def visit(self, n: CompoundStmt):
-        name = self.name()
-        self.dot.node(name, label="CompoundStmt")
+        name = self.node(n, "CompoundStmt")
 
         # Recorrer las declaraciones locales
         for decl in n.local_decls:
-            decl_name = decl.accept(self)
-            self.dot.edge(name, decl_name)
+            yield from self.child(name, decl)
         
         # Recorrer la lista de sentencias
         for stmt in n.stmt_list:
-            stmt_name = stmt.accept(self)
-            self.dot.edge(name, stmt_name)
+            yield from self.child(name, stmt)
         
         return name
 
     def visit(self, n: ExprStmt):
-        name = self.name()
-        self.dot.node(name, label="ExprStmt")
-        
-        expr_name = n.expr.accept(self)
-        self.dot.edge(name, expr_name)
-        
+        name = self.node(n, "ExprStmt")
+        yield from self.child(name, n.expr)
         return name
 
     def visit(self, n: IfStmt):
-        name = self.name()
-        self.dot.node(name, label="IfStmt")
+        name = self.node(n, "IfStmt")
 
         # Visita la condición
-        cond_name = n.condition.accept(self)
-        self.dot.edge(name, cond_name, label="Condition")
+        yield from self.child(name, n.condition, "Condition")
 
         # Visita el bloque 'then'
-        then_name = n.then_stmt.accept(self)
-        self.dot.edge(name, then_name, label="Then")
+        yield from self.child(name, n.then_stmt, "Then")
 
         # Visita el bloque 'else' (si existe)
         if n.else_stmt:
-            else_name = n.else_stmt.accept(self)
-            self.dot.edge(name, else_name, label="Else")
+            yield from self.child(name, n.else_stmt, "Else")
 
         return name
 
     def visit(self, n: WhileStmt):
-        name = self.name()
-        self.dot.node(name, label="WhileStmt")
+        name = self.node(n, "WhileStmt")
 
         # Visita la condición del 'while'
-        cond_name = n.condition.accept(self)
-        self.dot.edge(name, cond_name, label="Condition")
+        yield from self.child(name, n.condition, "Condition")
 
         # Visita el cuerpo del 'while'
-        body_name = n.body.accept(self)
-        self.dot.edge(name, body_name, label="Body")
+        yield from self.child(name, n.body, "Body")
+
+        return name
 
+    def visit(self, n: ForStmt):
+        name = self.node(n, "ForStmt")
+        yield from self.child(name, n.init, "Init")
+        yield from self.child(name, n.condition, "Condition")
+        yield from self.child(name, n.update, "Update")
+        yield from self.child(name, n.body, "Body")
         return name
 
     def visit(self, n: ReturnStmt):
-        name = self.name()
-        self.dot.node(name, label="ReturnStmt")
+        name = self.node(n, "ReturnStmt")
         # Verifica si hay una expresión en la sentencia 'return' y la visita
         if n.expr:
-            self.dot.edge(name, n.expr.accept(self), label="Expression")
+            yield from self.child(name, n.expr, "Expression")
         return name
 
     def visit(self, n: Union[BreakStmt, ContinueStmt]):
-        name = self.name()
-        self.dot.node(name, label=f"{n}")
-        return name
+        return self.node(n, type(n).__name__)
     
     def visit(self, n: FuncDeclStmt):
-        name = self.name()
-        # Se utiliza el atributo `name` de la clase FuncDeclStmt en lugar de `ident`
-        self.dot.node(name, label=f"FuncDecl: {n.name} -> {n.return_type}")
+        name = self.node(n, f"FuncDecl: {n.name} -> {n.return_type}")
         
-        # Para cada parámetro de la función, no es necesario `accept`, solo podemos usar `param`
+        # Cada parámetro se convierte en un nodo conectado a la función
         for param in n.params:
-            param_name = self.name()  # Cada parámetro se convierte en un nodo
-            self.dot.node(param_name, label=f"Param: {param}")
-            self.dot.edge(name, param_name)  # Conectar la función al parámetro
+            yield from self.child(name, param)
         
-        # El cuerpo de la función (en este caso el body) se conecta
-        body_name = n.compound_stmt.accept(self)
-        self.dot.edge(name, body_name)
+        # El cuerpo de la función se conecta
+        yield from self.child(name, n.body)
         
         return name
     
     def visit(self, n: Param):
-        name = self.name()
         # Etiqueta el nodo con el tipo y el nombre del parámetro
-        label = f"{n.type_spec} {n.ident}"
+        label = f"Param: {n.type_spec} {n.ident}"
         if n.is_array:
             label += "[]"
-        self.dot.node(name, label=label)
-        return name
+        return self.node(n, label)
+
+    def visit(self, n: VarDeclStmt):
+        label = f"VarDecl: {n.type_spec} {n.ident}"
+        if n.is_array:
+            label += "[]"
+        return self.node(n, label)
 
     def visit(self, n: StaticVarDeclStmt):
-        name = self.name()  # Generamos un nombre único para el nodo
         # Creamos el nodo con la información de la declaración estática de la variable
-        self.dot.node(name, label=f"StaticVarDecl: {n.name} : {n.type}")
+        name = self.node(n, f"StaticVarDecl: {n.name} : {n.type}")
         
         # Si hay un valor inicial, lo agregamos al gráfico
         if n.initial_value:
-            initial_value_name = n.initial_value.accept(self)  # Visitamos el valor inicial
-            self.dot.edge(name, initial_value_name)  # Conectamos la variable con su valor inicial
+            yield from self.child(name, n.initial_value)
         
         return name
 
     def visit(self, n: ArrayDeclStmt):
-        name = self.name()  # Generamos un nombre único para el nodo
-        # Creamos un nodo con el nombre del arreglo y su tamaño
-        self.dot.node(name, label=f"ArrayDecl: {n.ident} of size {n.size.accept(self)}")
-        
-        # Retornamos el nombre del nodo creado
+        # Creamos un nodo con el nombre del arreglo y una arista a su tamaño
+        name = self.node(n, f"ArrayDecl: {n.ident}")
+        yield from self.child(name, n.size, "Size")
         return name
     
     def visit(self, n: NewArrayExpr):
-        name = self.name()  # Generamos un nombre único para el nodo
         # Creamos un nodo para el nuevo arreglo, mostrando su tipo y tamaño
-        self.dot.node(name, label=f"NewArray: {n.type}[{n.expr.accept(self)}]")
+        name = self.node(n, f"NewArray: {n._type}")
+        yield from self.child(name, n.expr, "Size")
         return name
     
     def visit(self, n: ConstExpr):
-            name = self.name()  # Generamos un nombre único para el nodo
-            # Creamos un nodo con la etiqueta que muestra el valor de la constante
-            self.dot.node(name, label=f"Const: {n.value}")
-            return name
+        # Creamos un nodo con la etiqueta que muestra el valor de la constante
+        return self.node(n, f"Const: {n.value!r}")
     
     def visit(self, n: VarAssignmentExpr):
-        name = self.name()  # Genera un nombre único para el nodo
         # Crea un nodo que representa la asignación de la variable
-        self.dot.node(name, label=f"Assign: {n.var} = {n.expr.accept(self)}")
+        name = self.node(n, f"Assign: {n.ident}")
+        yield from self.child(name, n.expr)
         return name
 
     def visit(self, n: BinaryOpExpr):
-        name = self.name()
-        self.dot.node(name, label=f"BinaryOp: {n.opr}")
-        left_name = n.left.accept(self)
-        right_name = n.right.accept(self)
-        self.dot.edge(name, left_name)
-        self.dot.edge(name, right_name)
+        name = self.node(n, f"BinaryOp: {n.opr}")
+        yield from self.child(name, n.left)
+        yield from self.child(name, n.right)
         return name
     
     def visit(self, n: UnaryOpExpr):
-        name = self.name()  # Genera un nombre único para el nodo
-        self.dot.node(name, label=f"UnaryOp: {n.opr}")  # Crea un nodo con el operador unario como etiqueta
-        expr_name = n.expr.accept(self)  # Recursivamente visita la expresión que es operada
-        self.dot.edge(name, expr_name)  # Conecta el nodo del operador con la expresión
+        name = self.node(n, f"UnaryOp: {n.opr}")  # Crea un nodo con el operador unario como etiqueta
+        yield from self.child(name, n.expr)  # Visita la expresión que es operada
         return name
    
     def visit(self, n: CallExpr):
-        name = self.name()  # Genera un nombre único para el nodo
         # Crea el nodo para la llamada a la función
-        self.dot.node(name, label=f"Call: {n.ident}()")
+        name = self.node(n, f"Call: {n.ident}()")
 
         # Si hay argumentos, procesarlos
         if n.args:
             for arg in n.args:
-                arg_name = arg.accept(self)
-                self.dot.edge(name, arg_name)
+                yield from self.child(name, arg)
         else:
-            self.dot.node(f"{name}_no_args", label="No arguments")
-            self.dot.edge(name, f"{name}_no_args")
+            self.out.write(f'\t{name}_no_args [label="No arguments"]\n')
+            self.edge(name, f"{name}_no_args")
 
         return name
     
     def visit(self, n: VarExpr):
-        name = self.name()  # Genera un nombre único para el nodo
         label = f"Var: {n.ident}"
-        if n.var_type:
-            label += f" : {n.var_type}"  # Agrega el tipo si está disponible
-        self.dot.node(name, label=label)
-        return name
+        var_type = n.type or n.var_type
+        if var_type:
+            label += f" : {var_type}"  # Agrega el tipo si está disponible
+        return self.node(n, label)
 
     def visit(self, n: ArrayLookupExpr):
-        name = self.name()  # Genera un nombre único para el nodo
-        # Usamos el índice de la expresión como parte de la etiqueta
-        self.dot.node(name, label=f"ArrayLookup: {n.ident}[{n.index.accept(self)}]")
+        name = self.node(n, f"ArrayLookup: {n.ident}")
+        yield from self.child(name, n.index, "Index")
         return name
 
     def visit(self, n: ArrayAssignmentExpr):
-        name = self.name()  # Genera un nombre único para el nodo
-        # La etiqueta incluirá el identificador del arreglo, el índice y la expresión asignada
-        self.dot.node(name, label=f"ArrayAssign: {n.ident}[{n.index.accept(self)}] = {n.expr.accept(self)}")
+        # El nodo tiene aristas al índice y a la expresión asignada
+        name = self.node(n, f"ArrayAssign: {n.ident}")
+        yield from self.child(name, n.index, "Index")
+        yield from self.child(name, n.expr, "Value")
         return name
     
     def visit(self, n: ArraySizeExpr):
-        name = self.name()  # Genera un nombre único para el nodo
-        self.dot.node(name, label=f"ArraySize: {n.ident}")  # Crea un nodo con la etiqueta del identificador del arreglo
-        return name
+        return self.node(n, f"ArraySize: {n.ident}")  # Crea un nodo con la etiqueta del identificador del arreglo
 
     def visit(self, n: IntToFloatExpr):
-        name = self.name()
-        self.dot.node(name, label="IntToFloat")
-        expr_name = n.expr.accept(self)
-        self.dot.edge(name, expr_name)
+        name = self.node(n, "IntToFloat")
+        yield from self.child(name, n.expr)
         return name
-    
-    def visit_for_stmt(self, n: ForStmt):
-        """
-        Genera el grafo para un ForStmt.
-        """
-        name = f"forstmt_{self.node_id}"
-        self.dot.node(name, label="ForStmt")  # Nodo principal para el ciclo 'for'
-        
-        # Visitar e incluir los subcomponentes: init, condition, update y body
-        init_name = n.init.accept(self)
-        condition_name = n.condition.accept(self)
-        update_name = n.update.accept(self)
-        body_name = n.body.accept(self)
-        
-        # Conectar los nodos para representar el flujo del ciclo for
-        self.dot.edge(name, init_name)  # Conexión inicial
-        self.dot.edge(name, condition_name)  # Conexión con la condición
-        self.dot.edge(name, update_name)  # Conexión con la actualización
-        self.dot.edge(name, body_name)  # Conexión con el cuerpo del ciclo
-        
-        # Conexiones entre los componentes del ciclo
-        self.dot.edge(condition_name, body_name)  # Si la condición es True, se ejecuta el cuerpo
-        self.dot.edge(body_name, update_name)  # Después de ejecutar el cuerpo, se actualiza
-        self.dot.edge(update_name, condition_name)  # Vuelve a verificar la condición
-        
-        return name  # Retorna el nombre del nodo principal 'ForStmt'
+
+
+_ident    = re.compile(r'[A-Za-z_][A-Za-z_0-9]*$')
+_keywords = {'node', 'edge', 'graph', 'digraph', 'subgraph', 'strict'}
+
+def _quote(text: str) -> str:
+    # Los identificadores simples van sin comillas (como en graphviz); el
+    # resto entre comillas. '\\n' dentro de una etiqueta es un salto de línea DOT
+    if _ident.match(text) and text.lower() not in _keywords:
+        return text
+    return '"' + text.replace('"', '\\"') + '"'
+
+def _attrs(attrs: dict) -> str:
+    return ' '.join(f'{key}={_quote(value)}' for key, value in sorted(attrs.items()))
 
 # Ejemplo de uso:
 
 def gen_ast(source):
-    from analizador_lexico.mclex import Lexer
-    from analizador_sintactico.mcast import Parser
-    
-    l = Lexer()
-    p = Parser()
-
-    root = p.parse(l.tokenize(source))
-    print(root)
+    '''
+    Analiza el código y retorna (ast, grafo DOT). Las etiquetas incluyen
+    la línea y columna de cada nodo.
+    '''
+    from analizador_semantico.mcontext import Context
+
+    ctx = Context()
+    ctx.parse(source)
+    if ctx.ast is None:
+        return None, None
+    return ctx.ast, DotRender.render(ctx.ast, ctx=ctx)
 
 if __name__ == '__main__':
     import sys
 
     if len(sys.argv) != 2:
-        print(f"[red]Usage python mcparser.py textfile[/red]")
+        print(f"[red]Usage python mcast.py textfile[/red]")
         exit(1)
    
-    gen_ast(open(sys.argv[1], encoding='utf-8').read())
\ No newline at end of file
+    # Como script este archivo es __main__; el AST usa las clases del paquete
+    from analizador_sintactico.mcast import gen_ast
+    ast, dot = gen_ast(open(sys.argv[1], encoding='utf-8').read())
+    print(dot)
@@ -11,16 +11,23 @@ EBNF
 from rich import print
 from analizador_lexico.mclex import Lexer
 from .mcast import (
-    VarDeclStmt, FuncDeclStmt, Param, CompoundStmt, ExprStmt, NullStmt, IfStmt,
-    WhileStmt, ReturnStmt, BreakStmt, VarAssignmentExpr, ArrayAssignmentExpr,
-    BinaryOpExpr, UnaryOpExpr, VarExpr, ArrayLookupExpr, CallExpr,
-    ArraySizeExpr, ConstExpr, NewArrayExpr, ForStmt
+    Program, VarDeclStmt, FuncDeclStmt, Param, CompoundStmt, ExprStmt, NullStmt,
+    IfStmt, WhileStmt, ReturnStmt, BreakStmt, ContinueStmt, VarAssignmentExpr,
+    ArrayAssignmentExpr, BinaryOpExpr, UnaryOpExpr, VarExpr, ArrayLookupExpr,
+    CallExpr, ArraySizeExpr, ConstExpr, NewArrayExpr, Node
 )
+from .mctables import CachedParser
 
-import sly
 
-class Parser(sly.Parser):
-    debugfile = 'minicc.txt'
+class _NoPositions(dict):
+    # sly guarda la posición de cada valor en dos diccionarios indexados
+    # por id(); aquí la posición vive en Node.span y esos registros se descartan
+    def __setitem__(self, key, value):
+        pass
+
+class Parser(CachedParser):
+    # Las tablas LALR se guardan en __pycache__ (ver mctables.py).
+    # El volcado de estados se genera con 'mcc --lalr'.
 
     tokens = Lexer.tokens
 
@@ -37,6 +44,20 @@ class Parser(sly.Parser):
         ('right', '!', 'UNARY'),
         )
 
+    _line_positions = _index_positions = _NoPositions()
+
+    def __init__(self, ctx=None):
+        self.ctx = ctx
+
+    def index_position(self, value):
+        return getattr(value, 'span', None)
+
+    def line_position(self, value):
+        span = getattr(value, 'span', None)
+        if span and self.ctx:
+            return self.ctx.lines.lineno(span[0])
+        return None
+
     # Definición de Reglas
 
     @_("decl { decl }")
@@ -44,14 +65,14 @@ class Parser(sly.Parser):
         '''
         program ::= decl+
         '''
-        return [decl for decl in (p.decl0,) + p.decl1]
+        return Program([p.decl0, *p.decl1])
 
     @_("var_decl", "func_decl")
     def decl(self, p):
         '''
         decl ::= var_decl | func_decl
         '''
-        return p[0] + p.decl1
+        return p[0]
 
     @_("type_spec IDENT ';'")
     def var_decl(self, p):
@@ -89,21 +110,31 @@ class Parser(sly.Parser):
         return_type=p.type_spec  # Return type is derived from type_spec
     )
 
-    @_("param_list", "VOID")
+    @_("param_list")
     def params(self, p):
         '''
-        params ::= param_list | 'VOID'
+        params ::= param_list
         '''
-        if p[0] == 'VOID':
-            return [ ] # Si no hay parametros retorna una lista vacia
         return p.param_list # Devuelve la lista de parametros
 
+    @_("VOID")
+    def params(self, p):
+        '''
+        params ::= 'VOID'
+        '''
+        return [ ] # Si no hay parametros retorna una lista vacia
+
+    # Las listas se extienden en su lugar: cada una la crea la regla base
+    # y solo la reducción siguiente la recibe, así que una secuencia de
+    # N elementos cuesta O(N) en lugar de O(N²)
+
     @_("param_list ',' param")
     def param_list(self, p):
         '''
         param_list ::= param_list ',' param
         '''
-        return p.param_list + [p.param] # Devuelve la lista de parametros
+        p.param_list.append(p.param)
+        return p.param_list # Devuelve la lista de parametros
 
     @_("param")
     def param_list(self, p):
@@ -133,12 +164,20 @@ class Parser(sly.Parser):
         '''
         return CompoundStmt(p.local_decls, p.stmt_list)
 
-    @_("local_decl decl", "empty")
+    @_("local_decls local_decl")
     def local_decls(self, p):
         '''
-        local_decls ::= local_decls decl
+        local_decls ::= local_decls local_decl
         '''
-        return p.local_decls + [p.decl] if p.local_decls else [p.decl]
+        p.local_decls.append(p.local_decl)
+        return p.local_decls
+
+    @_("empty")
+    def local_decls(self, p):
+        '''
+        local_decls ::= empty
+        '''
+        return [ ]
 
     @_("type_spec IDENT ';'")
     def local_decl(self, p):
@@ -159,7 +198,8 @@ class Parser(sly.Parser):
         '''
         stmt_list ::= stmt_list stmt
         '''
-        return p.stmt_list + [p.stmt] # Devuelve una lista con la sentencia
+        p.stmt_list.append(p.stmt)
+        return p.stmt_list # Devuelve una lista con la sentencia
 
     @_("stmt")
     def stmt_list(self, p):
@@ -202,7 +242,7 @@ class Parser(sly.Parser):
         '''
         if_stmt ::= 'IF' '(' expr ')' stmt
         '''
-        return IfStmt(p.expr, p.stmt0, None)
+        return IfStmt(p.expr, p.stmt, None)
 
     @_("WHILE '(' expr ')' stmt")
     def while_stmt(self, p):
@@ -211,13 +251,6 @@ class Parser(sly.Parser):
         '''
         return WhileStmt(p.expr, p.stmt)
     
-    @_("FOR '(' expr_stmt expr ';' expr ')' stmt")
-    def for_stmt(self, p):
-        '''
-        for_stmt ::= 'FOR' '(' expr_stmt expr ';' expr ')' stmt
-        '''
-        return ForStmt(p.expr_stmt, p.expr0, p.expr1, p.stmt)
-
     @_("RETURN [ expr ] ';'")
     def return_stmt(self, p):
         '''
@@ -231,6 +264,8 @@ class Parser(sly.Parser):
         '''
         break_stmt ::= ('BREAK' | 'CONTINUE') ';'
         '''
+        if p[0] == 'continue':
+            return ContinueStmt()
         return BreakStmt()
 
     @_("IDENT '=' expr")
@@ -261,7 +296,7 @@ class Parser(sly.Parser):
     "expr '/' expr",
     "expr '%' expr")
     def expr(self, p):
-        return BinaryOpExpr(p[0], p.expr0, p.expr1)
+        return BinaryOpExpr(p[1], p.expr0, p.expr1)
 
     @_("'!' expr",
     "'-' expr %prec UNARY",
@@ -280,7 +315,7 @@ class Parser(sly.Parser):
 
     @_("IDENT '[' expr ']'")
     def expr(self, p):
-        return ArrayLookupExpr(p.ident, p.expr)
+        return ArrayLookupExpr(p.IDENT, p.expr)
 
     @_("IDENT '(' args ')'")
     def expr(self, p):
@@ -290,13 +325,16 @@ class Parser(sly.Parser):
     def expr(self, p):
         return ArraySizeExpr(p.IDENT)
 
-    @_("BOOL_LIT",
-    "INT_LIT",
+    @_("INT_LIT",
     "FLOAT_LIT",
     "STRING")
     def expr(self, p):
         return ConstExpr(p[0])
 
+    @_("BOOL_LIT")
+    def expr(self, p):
+        return ConstExpr(p.BOOL_LIT == 'true')
+
     @_("NEW type_spec '[' expr ']'")
     def expr(self, p):
         return NewArrayExpr(p.type_spec, p.expr)
@@ -314,7 +352,8 @@ class Parser(sly.Parser):
         '''
         arg_list ::= arg_list ',' expr
         '''
-        return p.arg_list + [ p.expr ]
+        p.arg_list.append(p.expr)
+        return p.arg_list
 
     @_("expr")
     def arg_list(self, p):
@@ -328,4 +367,27 @@ class Parser(sly.Parser):
         '''
         Definición produccion vacia (lambda transition)
         '''
-        return NullStmt()
\ No newline at end of file
+        return NullStmt()
+
+    def error(self, p):
+        if p:
+            self.ctx.error(p, f"Error de sintaxis en '{p.value}'")
+        else:
+            self.ctx.error('EOF', 'Error de sintaxis. No hay mas entrada')
+
+
+def _record_span(func):
+    # Envuelve la acción de una regla: el nodo que crea recibe el rango
+    # (inicio, fin) de los símbolos reducidos
+    def rule(self, p):
+        value = func(self, p)
+        if isinstance(value, Node) and value.span is None:
+            s = p._slice
+            if s and s[0].index is not None:
+                value.span = (s[0].index, s[-1].end)
+        return value
+    return rule
+
+for _prod in Parser._grammar.Productions[1:]:
+    if _prod.func:
+        _prod.func = _record_span(_prod.func)
@@ -0,0 +1,159 @@
+# mctables.py
+'''
+Cache de Tablas LALR
+--------------------
+
+sly reconstruye el autómata LALR(1) cada vez que se define una clase
+Parser. CachedParser reemplaza ese paso: la gramática se construye como
+siempre (las acciones de cada regla son funciones de la clase), pero las
+tablas action/goto se leen de disco cuando existe un archivo cuya clave
+coincide con el hash de
+
+  - las producciones (nombre, símbolos y precedencia de cada regla),
+  - la tabla de precedencia y los tokens,
+  - la versión de sly.
+
+Si la gramática cambia la clave cambia y las tablas se regeneran. Los
+archivos se guardan en el __pycache__ del módulo que define el parser.
+
+El volcado de depuración (gramática + estados LALR) solo se escribe si
+la clase define 'debugfile' o si se llama a write_debug().
+'''
+import hashlib
+import os
+import pickle
+import sys
+
+import sly
+from sly.yacc import LRTable, YaccError
+
+# Cambiar si cambia el formato del archivo de cache
+_FORMAT = 1
+
+
+class CachedTable:
+    '''
+    Las únicas partes de sly.yacc.LRTable que usa Parser.parse
+    '''
+    def __init__(self, lr_action, lr_goto, defaulted_states):
+        self.lr_action = lr_action
+        self.lr_goto = lr_goto
+        self.defaulted_states = defaulted_states
+
+
+class CachedParser(sly.Parser):
+
+    # Directorio del cache (None: __pycache__ junto al módulo del parser)
+    tablesdir = None
+
+    @classmethod
+    def _build(cls, definitions):
+        if vars(cls).get('_build', False):
+            return
+
+        rules = [(name, value) for name, value in definitions
+                 if callable(value) and hasattr(value, 'rules')]
+
+        if not cls._Parser__validate_specification():
+            raise YaccError('Invalid parser specification')
+        cls._Parser__build_grammar(rules)
+
+        key = grammar_key(cls)
+        fname = cls._tables_file(key)
+        entry = _load(fname, key)
+        if entry is None:
+            lrtable = LRTable(cls._grammar)
+            entry = {
+                'key': key,
+                'action': lrtable.lr_action,
+                'goto': lrtable.lr_goto,
+                'defaulted': lrtable.defaulted_states,
+                'sr': len(lrtable.sr_conflicts),
+                'rr': len(lrtable.rr_conflicts),
+            }
+            _save(fname, entry)
+
+        cls._report_conflicts(entry['sr'], entry['rr'])
+        cls._lrtable = CachedTable(entry['action'], entry['goto'], entry['defaulted'])
+
+        if cls.debugfile:
+            cls.write_debug(cls.debugfile)
+
+    @classmethod
+    def write_debug(cls, fname):
+        '''
+        Escribe la gramática y los estados LALR (el formato de sly) en fname
+        '''
+        lrtable = LRTable(cls._grammar)
+        with open(fname, 'w') as f:
+            f.write(str(cls._grammar))
+            f.write('\n')
+            f.write(str(lrtable))
+        cls.log.info('Parser debugging for %s written to %s', cls.__qualname__, fname)
+
+    @classmethod
+    def _tables_file(cls, key):
+        tablesdir = cls.tablesdir
+        if tablesdir is None:
+            module = sys.modules.get(cls.__module__)
+            base = os.path.dirname(os.path.abspath(getattr(module, '__file__', None) or '.'))
+            tablesdir = os.path.join(base, '__pycache__')
+        return os.path.join(tablesdir, f'{cls.__name__}.{key[:16]}.lalr')
+
+    @classmethod
+    def _report_conflicts(cls, num_sr, num_rr):
+        # Mismos mensajes que sly.Parser.__build_lrtables
+        if num_sr != getattr(cls, 'expected_shift_reduce', None):
+            if num_sr == 1:
+                cls.log.warning('1 shift/reduce conflict')
+            elif num_sr > 1:
+                cls.log.warning('%d shift/reduce conflicts', num_sr)
+
+        if num_rr != getattr(cls, 'expected_reduce_reduce', None):
+            if num_rr == 1:
+                cls.log.warning('1 reduce/reduce conflict')
+            elif num_rr > 1:
+                cls.log.warning('%d reduce/reduce conflicts', num_rr)
+
+
+def grammar_key(cls):
+    '''
+    Hash de todo lo que determina las tablas LALR de cls
+    '''
+    grammar = cls._grammar
+    spec = (
+        _FORMAT,
+        sly.__version__,
+        sorted(cls.tokens),
+        tuple(tuple(level) for level in getattr(cls, 'precedence', ())),
+        grammar.Start,
+        [(p.name, p.prod, p.prec) for p in grammar.Productions],
+    )
+    return hashlib.sha256(repr(spec).encode('utf-8')).hexdigest()
+
+
+def _load(fname, key):
+    try:
+        with open(fname, 'rb') as f:
+            entry = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+        return None
+    if not isinstance(entry, dict) or entry.get('key') != key:
+        return None
+    return entry
+
+
+def _save(fname, entry):
+    # Se escribe en un temporal y se renombra: un proceso concurrente nunca
+    # lee un archivo a medias. Si no se puede escribir se trabaja sin cache.
+    tmp = f'{fname}.{os.getpid()}.tmp'
+    try:
+        os.makedirs(os.path.dirname(fname), exist_ok=True)
+        with open(tmp, 'wb') as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, fname)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
@@ -0,0 +1,101 @@
+# bench_ast.py
+'''
+Memoria del AST.
+
+  python -m bench.bench_ast [nodos]
+
+Genera un programa con ~1M nodos (por defecto), lo analiza y lo
+verifica, y reporta:
+
+1. bytes por nodo de la estructura: el objeto nodo, su __dict__ (si lo
+   tiene) y las listas de hijos. No cuenta cadenas ni números, que son
+   compartidos con los tokens.
+2. memoria retenida por el AST según tracemalloc (todo lo que sigue vivo
+   al terminar el análisis, incluidas las anotaciones del checker) y su
+   relación con el tamaño del código fuente.
+'''
+from dataclasses import fields
+import gc
+import sys
+import time
+import tracemalloc
+
+from analizador_semantico.mcontext import Context
+from analizador_sintactico.mcast   import Node
+
+_stmts = [
+    'x = x * 2 + y;',
+    'if (x < 10) y = y - 1; else y = 0;',
+    'v[x % 8] = v[y % 8] + 1.5;',
+    'while (x > y) x = x - 1;',
+]
+
+
+def generate(nnodes):
+    # ~39 nodos por bloque de 4 sentencias
+    nblocks = max(1, nnodes // 39)
+    body = '\n'.join(f'  {s}' for s in _stmts)
+    return ('void main(void) {\n  int x; int y; float v[];\n'
+            '  x = 1; y = 2; v = new float[8];\n'
+            + '\n'.join(body for _ in range(nblocks)) + '\n}\n')
+
+
+def _children(n):
+    for f in fields(n):
+        value = getattr(n, f.name, None)
+        if isinstance(value, Node):
+            yield value
+        elif isinstance(value, list):
+            yield value
+
+
+def structure_size(root):
+    '''
+    (nodos, bytes) de los nodos, sus __dict__ y las listas de hijos
+    '''
+    count = size = 0
+    stack = [root]
+    seen = set()
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, list):
+            stack.extend(x for x in obj if isinstance(x, (Node, list)))
+            continue
+        count += 1
+        if hasattr(obj, '__dict__'):
+            size += sys.getsizeof(obj.__dict__)
+        stack.extend(_children(obj))
+    return count, size
+
+
+def main(argv):
+    nnodes = int(argv[1]) if len(argv) > 1 else 1_000_000
+    source = generate(nnodes)
+    ctx = Context()
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    ctx.parse(source)
+    elapsed = time.perf_counter() - start
+    if ctx.have_errors:
+        sys.exit(1)
+    ctx.lexer.text = None
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    count, size = structure_size(ctx.ast)
+    print(f'{count} nodos, {len(source)} bytes de código, análisis + checker {elapsed:.2f} s')
+    print(f'estructura: {size / count:8.1f} bytes/nodo ({size / 2**20:.1f} MiB)')
+    print(f'retenido:   {retained / count:8.1f} bytes/nodo ({retained / 2**20:.1f} MiB, '
+          f'{retained / len(source):.1f}x el código fuente)')
+
+
+if __name__ == '__main__':
+    main(sys.argv)
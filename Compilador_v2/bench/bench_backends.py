@@ -0,0 +1,63 @@
+# bench_backends.py
+'''
+Comparación de los backends de ejecución.
+
+  python -m bench.bench_backends [-O<n>] [archivo.mcc ...]
+
+Ejecuta cada programa (por defecto los de test/ que no leen la entrada)
+con todos los backends de Context.backends y reporta el tiempo de cada
+uno. El intérprete del AST ('ast') sin optimizar es la referencia: si la
+salida o el valor de retorno de otro backend difiere, se reporta y el
+programa termina con error. Con -O1 a -O3 los backends se ejecutan con
+las pasadas de ese nivel (las del AST y, en 'ir', las de la IR).
+'''
+from contextlib import redirect_stdout
+import io
+import sys
+import time
+
+from analizador_semantico.mcontext import Context
+from interprete.mcpasses import PassManager
+
+_default = ['test/mandel.mcc']
+
+
+def run(fname, backend, level=0):
+    ctx = Context(backend, PassManager.level(level))
+    with open(fname, encoding='utf-8') as f:
+        ctx.parse(f.read())
+    if ctx.have_errors:
+        sys.exit(1)
+    out = io.StringIO()
+    with redirect_stdout(out):
+        start = time.perf_counter()
+        result = ctx.run()
+        elapsed = time.perf_counter() - start
+    return result, out.getvalue(), elapsed
+
+
+def main(argv):
+    level = next((int(a[2:]) for a in argv[1:] if a.startswith('-O')), 0)
+    fnames = [a for a in argv[1:] if not a.startswith('-O')] or _default
+    backends = ['ast'] + sorted(set(Context.backends) - {'ast'})
+    failed = False
+
+    print(f'{"programa":<24}' + ''.join(f'{b:>10}' for b in backends))
+    for fname in fnames:
+        result, output, _ = run(fname, 'ast')
+        reference = result, output
+        times = []
+        for backend in backends:
+            result, output, elapsed = run(fname, backend, level)
+            times.append(elapsed)
+            if (result, output) != reference:
+                print(f'{fname}: {backend} difiere de ast')
+                failed = True
+        print(f'{fname:<24}' + ''.join(f'{t:>10.3f}' for t in times))
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
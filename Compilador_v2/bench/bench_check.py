@@ -0,0 +1,100 @@
+# bench_check.py
+'''
+Verificación semántica secuencial y en paralelo.
+
+  python -m bench.bench_check [funciones]
+
+Genera un programa con muchas funciones (por defecto 4000) que usan
+globales y llaman a las anteriores, y lo verifica con Checker.check con
+jobs = 1, 2, 4 y 8 (mcparallel). Reporta el tiempo de cada uno y
+comprueba que todos anoten los mismos tipos en el AST. Después repite la
+verificación de un programa con errores (--all-errors) y compara los
+errores reportados.
+
+El tiempo con varios procesos incluye crearlos y aplicar al AST los
+tipos que regresan, así que la ganancia depende de los núcleos
+disponibles (os.cpu_count()).
+'''
+import os
+import sys
+import time
+
+from analizador_semantico.mchecker import Checker
+from analizador_semantico.mcontext import Context
+from analizador_sintactico.mcast import Expression, preorder
+
+_function = '''
+int f{i}(int n, float v[]) {{
+  int i; int s; float x;
+  i = 0; s = g{g} + n;
+  while (i < n && i < v.size) {{
+    if (i % 3 == 0 || s > 100) s = s + i * 2; else s = s - 1;
+    x = v[i] * 0.5 + s * 2 - (i + 1) * 1.5;
+    v[i] = x + (s - i) * (s + i) / 3;
+    i = i + 1;
+  }}
+  return s + f{prev}(n - 1, v);
+}}
+'''
+
+# Errores: variables sin declarar y tipos incompatibles
+_broken = '''
+int f{i}(int n, float v[]) {{
+  int s;
+  s = v[n] + u{i};
+  if (s) s = true;
+  return f{prev}(n, v, 1) + g{g};
+}}
+'''
+
+
+def generate(nfuncs, template=_function):
+    globals_ = ''.join(f'int g{i};\n' for i in range(10))
+    funcs = [template.format(i=i, prev=max(i - 1, 0), g=i % 10) for i in range(nfuncs)]
+    return globals_ + ''.join(funcs) + 'int main(void) { return 0; }\n'
+
+
+def parse(source):
+    ctx = Context()
+    return ctx.parser.parse(ctx.lexer.tokenize(source))
+
+
+def types_of(ast):
+    return [n.type for n in preorder(ast) if isinstance(n, Expression)]
+
+
+def main(argv):
+    nfuncs = int(argv[1]) if len(argv) > 1 else 4000
+    source = generate(nfuncs)
+    print(f'{nfuncs} funciones, {os.cpu_count()} CPU')
+    print(f'{"jobs":>6}{"s":>10}{"aceleración":>14}')
+    failed = False
+    reference = base = None
+    for jobs in (1, 2, 4, 8):
+        ast = parse(source)
+        start = time.perf_counter()
+        Checker.check(ast, jobs=jobs)
+        elapsed = time.perf_counter() - start
+        if reference is None:
+            reference, base = types_of(ast), elapsed
+        elif types_of(ast) != reference:
+            print(f'jobs={jobs}: los tipos difieren de jobs=1')
+            failed = True
+        print(f'{jobs:>6}{elapsed:>10.3f}{base / elapsed:>14.2f}')
+
+    broken = generate(nfuncs // 10, _broken)
+    expected = None
+    for jobs in (1, 4):
+        diagnostics = Checker.check(parse(broken), collect=True, jobs=jobs).diagnostics
+        if expected is None:
+            expected = diagnostics
+            print(f'{len(diagnostics)} errores en {nfuncs // 10} funciones')
+        elif diagnostics != expected:
+            print(f'jobs={jobs}: los errores difieren de jobs=1')
+            failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
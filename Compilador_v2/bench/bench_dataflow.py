@@ -0,0 +1,135 @@
+# bench_dataflow.py
+'''
+Análisis de flujo de datos sobre funciones grandes.
+
+  python -m bench.bench_dataflow [bloques] [variables]
+
+Genera una función con unos 10000 bloques (por defecto) y 2000 variables,
+hecha de ciclos anidados con if/else que leen y escriben variables al
+azar, y mide liveness, reaching_definitions y available_expressions de
+mcdataflow (conjuntos como enteros), antes y después de pasar a SSA.
+Para comparar, resuelve también liveness con set de Python por bloque y
+verifica que ambos den los mismos registros vivos.
+'''
+import random
+import sys
+import time
+import tracemalloc
+
+from analizador_semantico.mcontext import Context
+from interprete.mcdataflow import Solution, liveness, reaching_definitions, available_expressions, members
+from interprete.mcir import signatures
+from interprete.mcopt import to_ssa
+
+
+def generate(nblocks, nvars, seed=1):
+    rnd = random.Random(seed)
+    var = lambda: f'v{rnd.randrange(nvars)}'
+    lines = ['int main(void) {']
+    lines += [f'  int v{i};' for i in range(nvars)]
+    lines += [f'  v{i} = {i};' for i in range(nvars)]
+    # Cada if/else son unos 3 bloques y cada ciclo 2 más
+    depth = 0
+    for k in range(nblocks // 3):
+        if depth < 3 and k % 7 == 0:
+            lines.append(f'  while ({var()} < {var()}) {{')
+            depth += 1
+        lines.append(f'  if ({var()} < {var()}) {var()} = {var()} + {var()}; '
+                     f'else {var()} = {var()} * {var()};')
+        if depth and k % 7 == 6:
+            lines.append(f'  {var()} = {var()} + 1; }}')
+            depth -= 1
+    lines += ['  }'] * depth
+    lines += [f'  return {var()};', '}']
+    return '\n'.join(lines)
+
+
+def set_liveness(func):
+    '''
+    Misma liveness que mcdataflow, con un set por bloque
+    '''
+    blocks = func.blocks
+    use = [set() for _ in blocks]
+    defs = [set() for _ in blocks]
+    phi_uses = [set() for _ in blocks]
+    for block in blocks:
+        u, d = use[block.index], defs[block.index]
+        for dst, args in block.phis:
+            d.add(dst)
+            for a, p in zip(args, block.preds):
+                if a >= 0:
+                    phi_uses[p].add(a)
+        for op, x, y, z in block:
+            sig = signatures[op]
+            for c, v in zip(sig, (x, y, z)):
+                if c == 'r' and v not in d:
+                    u.add(v)
+            if sig[0] == 'd':
+                d.add(x)
+    ins = [set() for _ in blocks]
+    outs = [set() for _ in blocks]
+    changed = True
+    while changed:
+        changed = False
+        for block in reversed(blocks):
+            b = block.index
+            out = set(phi_uses[b])
+            for s in block.succs:
+                out |= ins[s]
+            new = use[b] | (out - defs[b])
+            outs[b] = out
+            if new != ins[b]:
+                ins[b] = new
+                changed = True
+    return ins, outs
+
+
+def measure(run, func):
+    # El tiempo sin tracemalloc, que hace mucho más lentas las asignaciones
+    start = time.perf_counter()
+    result = run(func)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    run(func)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main(argv):
+    nblocks = int(argv[1]) if len(argv) > 1 else 10000
+    nvars = int(argv[2]) if len(argv) > 2 else 2000
+    ctx = Context()
+    ctx.parse(generate(nblocks, nvars))
+    if ctx.have_errors:
+        sys.exit(1)
+    func = ctx.lower().functions[0]
+
+    analyses = [
+        ('liveness', liveness),
+        ('reaching', lambda f: reaching_definitions(f)[0]),
+        ('available', lambda f: available_expressions(f)[0]),
+        ('liveness (set)', set_liveness),
+    ]
+    print(f'{"forma":<6}{"análisis":<16}{"bloques":>9}{"registros":>11}{"s":>9}{"MB pico":>10}{"visitas":>9}')
+    failed = False
+    for form in ('ir', 'ssa'):
+        if form == 'ssa':
+            to_ssa(func)
+        results = { }
+        for name, run in analyses:
+            result, elapsed, peak = measure(run, func)
+            results[name] = result
+            visits = result.visits if isinstance(result, Solution) else '-'
+            print(f'{form:<6}{name:<16}{len(func.blocks):>9}{len(func.types):>11}'
+                  f'{elapsed:>9.3f}{peak / 2**20:>10.1f}{visits:>9}')
+        bits, sets = results['liveness'], results['liveness (set)']
+        if any(set(members(a)) != b for a, b in zip(bits.ins, sets[0])):
+            print(f'{form}: liveness con enteros y con set difieren')
+            failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,70 @@
+# bench_depth.py
+'''
+Recorridos sobre árboles muy profundos.
+
+  python -m bench.bench_depth [profundidad]
+
+Genera tres programas con anidamiento N (por defecto 100k, muy por
+encima del límite de recursión de Python):
+
+- expr:  x = 1 + 1 + ... + 1;         (árbol binario degenerado)
+- if:    if (x < 1) if (x < 1) ...    (sentencias anidadas)
+- block: { { { ... } } }              (bloques con ámbito propio)
+
+y mide el análisis (parser + checker), la compilación a bytecode, el
+DotRender y los recorridos genéricos preorder/postorder/rewrite de
+mcast. Ninguna etapa debe terminar en RecursionError.
+'''
+import sys
+import time
+
+from analizador_semantico.mcontext import Context
+from analizador_sintactico.mcast   import *
+from interprete.mcbytecode         import Compiler
+
+
+def gen_expr(depth):
+    return f'int main(void) {{\n  int x;\n  x = {" + ".join(["1"] * depth)};\n  return x;\n}}\n'
+
+def gen_if(depth):
+    return f'int main(void) {{\n  int x;\n  x = 0;\n  {"if (x < 1) " * depth}x = 1;\n  return x;\n}}\n'
+
+def gen_block(depth):
+    return f'int main(void) {{\n  int x;\n  x = 0;\n  {"{ " * depth}x = 1; {"} " * depth}\n  return x;\n}}\n'
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def _parse(source):
+    ctx = Context()
+    ctx.parse(source)
+    if ctx.have_errors:
+        sys.exit(1)
+    return ctx.ast
+
+
+def _identity(n):
+    return n
+
+
+def main(argv):
+    depth = int(argv[1]) if len(argv) > 1 else 100_000
+    print(f'profundidad {depth} (límite de recursión {sys.getrecursionlimit()})')
+    print(f'{"programa":<8}{"parse":>9}{"compile":>9}{"dot":>9}{"pre":>9}{"post":>9}{"rewrite":>9}{"nodos":>10}')
+    for name, gen in (('expr', gen_expr), ('if', gen_if), ('block', gen_block)):
+        ast, t_parse = _timed(_parse, gen(depth))
+        _, t_compile = _timed(Compiler.compile, ast)
+        _, t_dot = _timed(DotRender.render, ast)
+        nodes, t_pre = _timed(lambda: sum(1 for _ in preorder(ast)))
+        _, t_post = _timed(lambda: sum(1 for _ in postorder(ast)))
+        _, t_rewrite = _timed(rewrite, ast, _identity)
+        print(f'{name:<8}{t_parse:>9.2f}{t_compile:>9.2f}{t_dot:>9.2f}'
+              f'{t_pre:>9.2f}{t_post:>9.2f}{t_rewrite:>9.2f}{nodes:>10}')
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,94 @@
+# bench_incremental.py
+'''
+Compilación incremental (mcquery) después de ediciones pequeñas.
+
+  python -m bench.bench_incremental [funciones]
+
+Compila con Context(incremental=True) un programa generado con muchas
+funciones (por defecto 2000; cada una llama a la anterior) y aplica una
+serie de ediciones. Para cada una reporta el tiempo de parse() + lower()
+y cuántas consultas se ejecutaron (split: declaraciones que se
+recorrieron otra vez para encontrar sus límites; relocate: funciones
+traducidas que se copiaron con otros índices de globales), y compara el
+resultado con una compilación completa del mismo código: los mismos
+tipos y spans en el AST, los mismos errores y la misma IR.
+
+  cuerpo      una constante dentro de una función: solo se verifica ella
+  comentario  un comentario con llaves dentro de una función
+  firma       el tipo de retorno de una función: también la que la llama
+  global      una variable nueva al inicio: todo se mueve, nada se verifica
+              ni se traduce otra vez
+  error       un error de sintaxis: se analiza el archivo completo
+'''
+import contextlib
+import io
+import sys
+import time
+
+from analizador_semantico.mcontext import Context
+from analizador_sintactico.mcast import Expression, preorder
+from interprete.mcir import dump
+from interprete.mcpasses import PassManager
+from .bench_check import generate
+
+
+def compile_source(ctx, source):
+    # (resultado comparable, segundos de parse() + lower()); los errores
+    # se capturan como texto
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        start = time.perf_counter()
+        ctx.parse(source)
+        module = None if ctx.have_errors else ctx.lower()
+        elapsed = time.perf_counter() - start
+    if module is None:
+        # Con errores el AST queda a medio verificar: solo se comparan los mensajes
+        return (None, out.getvalue(), None), elapsed
+    ir = dump(module)
+    nodes = list(preorder(ctx.ast))
+    annotated = [(type(n).__name__, n.span, n.type if isinstance(n, Expression) else None)
+                 for n in nodes]
+    return (annotated, out.getvalue(), ir), elapsed
+
+
+def edits(source, nfuncs):
+    middle = nfuncs // 2
+    body = source.replace(f'int f{middle}(int n, float v[]) {{\n  int i; int s; float x;\n  i = 0;',
+                          f'int f{middle}(int n, float v[]) {{\n  int i; int s; float x;\n  i = 1;')
+    signature = source.replace(f'int f{middle}(', f'float f{middle}(')
+    comment = source.replace(f'int f{middle}(int n, float v[]) {{\n',
+                             f'int f{middle}(int n, float v[]) {{ /* }} {{ */\n')
+    yield 'cuerpo', body
+    yield 'comentario', comment
+    yield 'original', source
+    yield 'firma', signature
+    yield 'original', source
+    yield 'global', 'int h;\n' + source
+    yield 'error', 'int h;\n' + source.replace(f'int f{middle}(', f'int f{middle}((')
+    yield 'original', source
+
+
+def main(argv):
+    nfuncs = int(argv[1]) if len(argv) > 1 else 2000
+    source = generate(nfuncs)
+    ctx = Context(passes=PassManager.level(1), incremental=True)
+    _, elapsed = compile_source(ctx, source)
+    print(f'{nfuncs} funciones, {source.count(chr(10))} líneas; compilación inicial: {elapsed:.3f} s')
+    print(f'{"edición":<12}{"s":>9}{"completa":>10}{"split":>7}{"parse":>7}{"check":>7}{"lower":>7}'
+          f'{"relocate":>10}')
+    failed = False
+    for name, text in edits(source, nfuncs):
+        result, elapsed = compile_source(ctx, text)
+        executed = ctx.queries.executed
+        expected, full = compile_source(Context(passes=PassManager.level(1)), text)
+        print(f'{name:<12}{elapsed:>9.3f}{full:>10.3f}{executed["split"]:>7}{executed["parse"]:>7}'
+              f'{executed["check"]:>7}{executed["lower"]:>7}{executed["relocate"]:>10}')
+        if result != expected:
+            print(f'{name}: el resultado difiere de la compilación completa')
+            failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,62 @@
+# bench_ir.py
+'''
+Escalabilidad de la traducción a la IR.
+
+  python -m bench.bench_ir [funciones]
+
+Genera programas con 1x, 2x, 4x y 8x funciones (por defecto 500 en el
+más chico), cada una con ciclos, condiciones con && y ||, arreglos y
+llamadas, y mide el tiempo de Lowering.lower (sin contar el análisis).
+Si la traducción es lineal, el tiempo por instrucción de la IR se
+mantiene constante al crecer el programa.
+'''
+import sys
+import time
+
+from analizador_semantico.mcontext import Context
+from interprete.mcir import Lowering
+
+_function = '''
+int f{i}(int n, float v[]) {{
+  int i; int s;
+  i = 0; s = 0;
+  while (i < n && i < v.size) {{
+    if (i % 3 == 0 || s > 100) s = s + i * 2; else s = s - 1;
+    v[i] = v[i] * 0.5 + s;
+    i = i + 1;
+  }}
+  return s + f{prev}(n - 1, v);
+}}
+'''
+
+
+def generate(nfuncs):
+    funcs = [_function.format(i=i, prev=max(i - 1, 0)) for i in range(nfuncs)]
+    return ''.join(funcs) + '''
+int main(void) {
+  float v[];
+  v = new float[10];
+  return f0(0, v);
+}
+'''
+
+
+def main(argv):
+    base = int(argv[1]) if len(argv) > 1 else 500
+    print(f'{"funciones":>10} {"instr":>10} {"bloques":>10} {"tiempo":>10} {"ns/instr":>10}')
+    for factor in (1, 2, 4, 8):
+        nfuncs = base * factor
+        ctx = Context()
+        ctx.parse(generate(nfuncs))
+        if ctx.have_errors:
+            sys.exit(1)
+        start = time.perf_counter()
+        module = Lowering.lower(ctx.ast)
+        elapsed = time.perf_counter() - start
+        size = module.size()
+        blocks = sum(len(f.blocks) for f in module.functions)
+        print(f'{nfuncs:>10} {size:>10} {blocks:>10} {elapsed:>10.3f} {elapsed / size * 1e9:>10.0f}')
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,126 @@
+# bench_lexer.py
+'''
+Comparación diferencial y benchmark de los motores léxicos.
+
+  python -m bench.bench_lexer [lineas]
+
+1. Verifica que FastLexer produzca exactamente los mismos tokens
+   (type, value, lineno, index, end) y los mismos mensajes de error que
+   el Lexer de sly, sobre los programas de test/, un conjunto de casos
+   borde y un programa generado (tests/test_lexer.py tiene más casos).
+2. Mide tokens por segundo de ambos motores sobre el programa generado
+   (por defecto ~200k líneas).
+'''
+from contextlib import redirect_stdout
+import glob
+import io
+import sys
+import time
+
+from analizador_lexico.mclex     import Lexer
+from analizador_lexico.mcfastlex import FastLexer
+
+_edge_cases = [
+    '',
+    'int x;',
+    'x=1;y=22 ;z = 0;',
+    '1.5 0.25 3e10 2E-3 1.0e+5 0.0',
+    '007 00.5 0e5',
+    '"hola\\n" "tab\\t" "comillas \\"x\\"" "malo \\q"',
+    'a "uno\ndos" b\nc',
+    '// comentario\nint a; /* multi\nlinea\n*/ int b;',
+    'a && b || !c == d != e <= f >= g < h > i',
+    'x.size new int[10] a[3] = 2;',
+    '@ # $ int ` x',
+    '/* sin cerrar',
+    'iffy whileloop return1 truefalse true false',
+    '\n\n\t  \n   x\n',
+    'a // comentario al final sin salto',
+]
+
+_template = '''\
+// funcion {n}
+float f{n}(float x0, float y0, int n) {{
+  float x; float y; float xtemp;
+  int v[];
+  /* bloque
+     de comentario */
+  x = 0.0; y = 1.5e-3;
+  v = new int[{n}];
+  while (n > 0 && x*x + y*y <= 4.0 || !(n == {n})) {{
+    xtemp = x*x - y*y + x0;
+    y = 2.0*x*y + y0;
+    x = xtemp; n = n - 1;
+    v[n % v.size] = {n};
+    if (x != y) {{ printf("%d\\t%f\\n", n, x); }} else {{ break; }}
+  }}
+  return x / 2;
+}}
+'''
+
+
+def generate(nlines):
+    lines_per = _template.count('\n')
+    return ''.join(_template.format(n=n) for n in range(max(1, nlines // lines_per)))
+
+
+def _run(lexer_cls, source):
+    out = io.StringIO()
+    with redirect_stdout(out):
+        toks = [(t.type, t.value, t.lineno, t.index, t.end)
+                for t in lexer_cls().tokenize(source)]
+    return toks, out.getvalue()
+
+
+def check(source, name):
+    expected = _run(Lexer, source)
+    actual = _run(FastLexer, source)
+    if expected != actual:
+        for i, (e, a) in enumerate(zip(expected[0], actual[0])):
+            if e != a:
+                print(f'{name}: token {i}: sly={e} fast={a}')
+                break
+        else:
+            print(f'{name}: difieren ({len(expected[0])} vs {len(actual[0])} tokens, '
+                  f'salida {expected[1]!r} vs {actual[1]!r})')
+        return False
+    return True
+
+
+def bench(lexer_cls, source):
+    best = None
+    for _ in range(3):
+        lex = lexer_cls()
+        start = time.perf_counter()
+        count = 0
+        for _ in lex.tokenize(source):
+            count += 1
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return count, best
+
+
+def main(argv):
+    nlines = int(argv[1]) if len(argv) > 1 else 200_000
+
+    ok = True
+    for fname in sorted(glob.glob('test/*.mcc')):
+        with open(fname, encoding='utf-8') as f:
+            ok &= check(f.read(), fname)
+    for i, source in enumerate(_edge_cases):
+        ok &= check(source, f'caso {i}')
+    source = generate(nlines)
+    ok &= check(source, 'generado')
+    print('tokens idénticos' if ok else 'LOS MOTORES DIFIEREN')
+
+    print(f'{source.count(chr(10))} líneas, {len(source)} caracteres')
+    print(f'{"motor":<12}{"tokens":>10}{"s":>10}{"tokens/s":>14}')
+    for lexer_cls in (Lexer, FastLexer):
+        count, elapsed = bench(lexer_cls, source)
+        print(f'{lexer_cls.__name__:<12}{count:>10}{elapsed:>10.3f}{count / elapsed:>14,.0f}')
+
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,68 @@
+# bench_opt.py
+'''
+Optimizaciones de la IR por nivel.
+
+  python -m bench.bench_opt [archivo.mcc ...]
+
+Para cada programa (por defecto test/mandel.mcc) y cada nivel de -O
+traduce a la IR con el PassManager del nivel, ejecuta la IR con mcirvm
+y reporta el tiempo de compilación (traducción y pasadas), el tamaño de
+la IR y el tiempo de ejecución; con -v también el tiempo y el cambio de
+tamaño de cada pasada. Si la salida o el valor de retorno de un nivel
+difiere del de -O0, lo reporta y termina con error.
+'''
+from contextlib import redirect_stdout
+import io
+import sys
+import time
+
+from analizador_semantico.mcontext import Context
+from interprete.mcirvm   import IRMachine
+from interprete.mcpasses import PassManager, levels
+
+_default = ['test/mandel.mcc']
+
+
+def execute(module):
+    out = io.StringIO()
+    with redirect_stdout(out):
+        start = time.perf_counter()
+        result = IRMachine(module).run()
+        elapsed = time.perf_counter() - start
+    return (result, out.getvalue()), elapsed
+
+
+def main(argv):
+    verbose = '-v' in argv
+    fnames = [a for a in argv[1:] if a != '-v'] or _default
+    failed = False
+
+    print(f'{"programa":<24}{"nivel":>6}{"compilar ms":>14}{"instr":>8}{"ejecutar s":>12}')
+    for fname in fnames:
+        with open(fname, encoding='utf-8') as f:
+            source = f.read()
+        reference = None
+        for level in sorted(levels):
+            ctx = Context('ir', PassManager.level(level))
+            ctx.parse(source)
+            if ctx.have_errors:
+                sys.exit(1)
+            module = ctx.lower()
+            compile_time = sum(r.seconds for r in ctx.passes.records)
+            result, elapsed = execute(module)
+            print(f'{fname:<24}{"-O" + str(level):>6}{compile_time * 1000:>14.2f}'
+                  f'{module.size():>8}{elapsed:>12.3f}')
+            if verbose:
+                print(ctx.passes.report())
+            if reference is None:
+                reference = result
+            elif result != reference:
+                print(f'{fname}: -O{level} difiere de -O0')
+                failed = True
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
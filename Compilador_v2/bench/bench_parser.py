@@ -0,0 +1,54 @@
+# bench_parser.py
+'''
+Benchmark de escalamiento del analizador sintáctico.
+
+  python -m bench.bench_parser [sentencias]
+
+Genera un main() con un bloque de N sentencias (y N/10 declaraciones
+locales y llamadas con N/100 argumentos) para N entre 1k y 100k, y mide
+solo el análisis sintáctico: los tokens se generan antes de medir. Con
+listas construidas en tiempo lineal el tiempo por sentencia debe
+mantenerse aproximadamente constante.
+'''
+import sys
+import time
+
+from analizador_lexico.mcfastlex   import FastLexer
+from analizador_sintactico.mcparser import Parser
+
+
+def generate(nstmts):
+    nlocals = max(1, nstmts // 10)
+    nargs = max(1, nstmts // 100)
+    params = ', '.join(f'int p{i}' for i in range(nargs))
+    args = ', '.join(f'x{i % nlocals}' for i in range(nargs))
+    decls = ''.join(f'  int x{i};\n' for i in range(nlocals))
+    stmts = ''.join(f'  x{i % nlocals} = x{(i + 1) % nlocals} + {i};\n' for i in range(nstmts - 1))
+    return (f'int f({params}) {{ return p0; }}\n'
+            f'void main(void) {{\n{decls}{stmts}  f({args});\n}}\n')
+
+
+def bench(nstmts):
+    tokens = list(FastLexer().tokenize(generate(nstmts)))
+    best = None
+    for _ in range(3):
+        start = time.perf_counter()
+        ast = Parser().parse(iter(tokens))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    assert len(ast.decls[1].body.stmt_list) == nstmts
+    return len(tokens), best
+
+
+def main(argv):
+    nmax = int(argv[1]) if len(argv) > 1 else 100_000
+    sizes = [n for n in (1_000, 2_000, 5_000, 10_000, 20_000, 50_000, 100_000) if n <= nmax]
+
+    print(f'{"sentencias":>12}{"tokens":>10}{"s":>10}{"µs/sentencia":>15}')
+    for n in sizes:
+        ntokens, elapsed = bench(n)
+        print(f'{n:>12}{ntokens:>10}{elapsed:>10.3f}{elapsed / n * 1e6:>15.2f}')
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,131 @@
+# bench_symtab.py
+'''
+Benchmark de la tabla de símbolos.
+
+  python -m bench.bench_symtab [locales]
+
+Compara SymbolTable (pila de declaraciones por nombre) con la tabla
+anterior basada en un ChainMap con un diccionario por símbolo local:
+
+1. Operaciones directas: declarar N locales en un ámbito y, después de
+   cada declaración, buscar el local recién declarado y una global.
+2. Checker completo sobre un main() con N locales (por defecto hasta
+   10k), donde cada sentencia lee el local anterior y una global.
+3. Búsqueda de una global desde bloques anidados a distinta profundidad.
+'''
+from collections import ChainMap
+import sys
+import time
+
+from analizador_semantico import mchecker
+from analizador_semantico.mchecker import Checker, SymbolTable
+from analizador_semantico.mcontext import Context
+
+
+class ChainMapTable:
+    '''
+    Tabla anterior: un diccionario nuevo por cada símbolo local y
+    búsqueda lineal sobre todos ellos.
+    '''
+    def __init__(self):
+        self.symbol_table = ChainMap()
+        self.marks = []
+
+    def enter_scope(self):
+        self.marks.append(len(self.symbol_table.maps))
+
+    def exit_scope(self):
+        del self.symbol_table.maps[self.marks.pop():]
+
+    def add_symbol(self, name, value, scope="global"):
+        if scope == "global":
+            self.symbol_table.maps[0][name] = value
+        else:
+            self.symbol_table.maps.append({name: value})
+
+    def lookup_symbol(self, name):
+        for map in reversed(self.symbol_table.maps):
+            if name in map:
+                return map[name]
+        return None
+
+    def is_global(self, name):
+        return name in self.symbol_table.maps[0]
+
+
+def bench_ops(table_cls, nlocals):
+    table = table_cls()
+    table.add_symbol('g', 'global', 'global')
+    start = time.perf_counter()
+    table.enter_scope()
+    for i in range(nlocals):
+        name = f'v{i}'
+        table.add_symbol(name, i, 'local')
+        table.lookup_symbol(name)
+        table.lookup_symbol('g')
+    table.exit_scope()
+    return time.perf_counter() - start
+
+
+def generate(nlocals):
+    decls = ''.join(f'  int v{i};\n' for i in range(nlocals))
+    stmts = ''.join(f'  v{i} = v{i - 1} + g;\n' for i in range(1, nlocals))
+    return f'int g;\nint main(void) {{\n{decls}  v0 = g;\n{stmts}  return v{nlocals - 1};\n}}\n'
+
+
+def generate_nested(depth):
+    opens = ''.join(f'{{ int v{i}; v{i} = g; ' for i in range(depth))
+    return f'int g;\nint main(void) {{\n{opens}g = g + 1; {"}" * depth}\n  return g;\n}}\n'
+
+
+def parse(source):
+    ctx = Context()
+    ctx.parse(source)
+    if ctx.have_errors:
+        sys.exit(1)
+    return ctx.ast
+
+
+def bench_checker(table_cls, ast):
+    original = mchecker.SymbolTable
+    mchecker.SymbolTable = table_cls
+    try:
+        start = time.perf_counter()
+        Checker.check(ast)
+        return time.perf_counter() - start
+    finally:
+        mchecker.SymbolTable = original
+
+
+def main(argv):
+    nmax = int(argv[1]) if len(argv) > 1 else 10_000
+    sizes = sorted({nmax // 8, nmax // 4, nmax // 2, nmax} - {0})
+
+    print('operaciones directas (declarar + 2 búsquedas por local)')
+    print(f'{"locales":>10}{"ChainMap s":>14}{"SymbolTable s":>16}{"ns/local":>12}')
+    for n in sizes:
+        old = bench_ops(ChainMapTable, n)
+        new = min(bench_ops(SymbolTable, n) for _ in range(3))
+        print(f'{n:>10}{old:>14.4f}{new:>16.4f}{new / n * 1e9:>12.0f}')
+    print()
+
+    print('Checker sobre main() con N locales')
+    print(f'{"locales":>10}{"ChainMap s":>14}{"SymbolTable s":>16}')
+    for n in sizes:
+        ast = parse(generate(n))
+        old = bench_checker(ChainMapTable, ast)
+        new = min(bench_checker(SymbolTable, ast) for _ in range(3))
+        print(f'{n:>10}{old:>14.4f}{new:>16.4f}')
+    print()
+
+    print('Checker con bloques anidados')
+    print(f'{"profundidad":>12}{"ChainMap s":>14}{"SymbolTable s":>16}')
+    for depth in (10, 50, 100, 200):
+        ast = parse(generate_nested(depth))
+        old = bench_checker(ChainMapTable, ast)
+        new = min(bench_checker(SymbolTable, ast) for _ in range(3))
+        print(f'{depth:>12}{old:>14.4f}{new:>16.4f}')
+
+
+if __name__ == '__main__':
+    main(sys.argv)
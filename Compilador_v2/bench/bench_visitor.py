@@ -0,0 +1,118 @@
+# bench_visitor.py
+'''
+Microbenchmark del despacho de visitantes.
+
+  python -m bench.bench_visitor [sentencias]
+
+Recorre el mismo AST con dos visitantes equivalentes que solo cuentan
+nodos y reporta visitas por segundo:
+
+- multimethod: los mismos visit() con el metaclass multimeta que usaba
+  mcast.Visitor (se omite si multimethod no está instalado).
+- Visitor: la tabla de despacho por clase de mcast.VisitorMeta, tanto
+  con n.accept(v) como con v.visit(n).
+
+Al final mide el Checker completo sobre el mismo AST.
+'''
+import sys
+import time
+from typing import Union
+
+from analizador_semantico.mchecker  import Checker
+from analizador_sintactico.mcast    import *
+from analizador_sintactico.mcparser import Parser
+from analizador_lexico.mcfastlex    import FastLexer
+
+from .bench_parser import generate
+
+try:
+    from multimethod import multimeta
+except ImportError:
+    multimeta = None
+
+
+def _counter(base, recurse):
+    '''
+    Crea una clase visitante con la metaclase de 'base' que cuenta los
+    nodos; recurse(v, hijo) es la forma de visitar cada hijo.
+    '''
+    class Counter(base):
+        count = 0
+
+        def visit(self, n: Program):
+            self.count += 1
+            for decl in n.decls:
+                recurse(self, decl)
+
+        def visit(self, n: FuncDeclStmt):
+            self.count += 1
+            for param in n.params:
+                recurse(self, param)
+            recurse(self, n.body)
+
+        def visit(self, n: CompoundStmt):
+            self.count += 1
+            for decl in n.local_decls:
+                recurse(self, decl)
+            for stmt in n.stmt_list:
+                recurse(self, stmt)
+
+        def visit(self, n: Union[ExprStmt, ReturnStmt]):
+            self.count += 1
+            recurse(self, n.expr)
+
+        def visit(self, n: VarAssignmentExpr):
+            self.count += 1
+            recurse(self, n.expr)
+
+        def visit(self, n: BinaryOpExpr):
+            self.count += 1
+            recurse(self, n.left)
+            recurse(self, n.right)
+
+        def visit(self, n: CallExpr):
+            self.count += 1
+            for arg in n.args:
+                recurse(self, arg)
+
+        def visit(self, n: Union[VarExpr, ConstExpr, Param, VarDeclStmt]):
+            self.count += 1
+
+    return Counter
+
+
+def bench(visitor_cls, ast):
+    best = None
+    for _ in range(3):
+        v = visitor_cls()
+        start = time.perf_counter()
+        v.visit(ast)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return v.count, best
+
+
+def main(argv):
+    nstmts = int(argv[1]) if len(argv) > 1 else 50_000
+    ast = Parser().parse(FastLexer().tokenize(generate(nstmts)))
+
+    counters = []
+    if multimeta is not None:
+        class MultiBase(metaclass=multimeta):
+            pass
+        counters.append(('multimethod', _counter(MultiBase, lambda v, n: v.visit(n))))
+    counters.append(('Visitor n.accept(v)', _counter(Visitor, lambda v, n: n.accept(v))))
+    counters.append(('Visitor v.visit(n)', _counter(Visitor, lambda v, n: v.visit(n))))
+
+    print(f'{"despacho":<22}{"nodos":>10}{"s":>10}{"visitas/s":>14}')
+    for name, cls in counters:
+        count, elapsed = bench(cls, ast)
+        print(f'{name:<22}{count:>10}{elapsed:>10.3f}{count / elapsed:>14,.0f}')
+
+    start = time.perf_counter()
+    Checker.check(ast)
+    print(f'\nChecker: {time.perf_counter() - start:.3f} s')
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,132 @@
+# bench_vm.py
+'''
+Benchmark de la máquina virtual de bytecode.
+
+  python -m bench.bench_vm [archivo.mcc]
+
+1. Ejecuta el programa (por defecto test/mandel.mcc) con la salida
+   descartada y mide el tiempo total.
+2. Repite la ejecución contando cada instrucción despachada para
+   obtener el histograma de opcodes y el tiempo medio por instrucción.
+3. Mide ciclos sintéticos que ejercitan un opcode a la vez y reporta
+   los nanosegundos por instrucción de cada uno.
+'''
+from contextlib import redirect_stdout
+from collections import Counter
+import io
+import sys
+import time
+
+from analizador_semantico.mcontext import Context
+from interprete import mcvm
+from interprete.mcbytecode import *
+from interprete.mcvm import VM
+
+
+def compile_file(fname):
+    ctx = Context()
+    with open(fname, encoding='utf-8') as f:
+        ctx.parse(f.read())
+    if ctx.have_errors:
+        sys.exit(1)
+    return Compiler.compile(ctx.ast)
+
+
+def run_silent(module):
+    with redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        VM().run(module)
+        return time.perf_counter() - start
+
+
+class _CountingCode(list):
+    # Cuenta cada instrucción despachada
+    hist = Counter()
+
+    def __getitem__(self, i):
+        instr = list.__getitem__(self, i)
+        self.hist[instr[0]] += 1
+        return instr
+
+
+def count_opcodes(module):
+    original = mcvm._code
+    mcvm._code = lambda func: _CountingCode(original(func))
+    _CountingCode.hist.clear()
+    try:
+        run_silent(module)
+    finally:
+        mcvm._code = original
+    return Counter(_CountingCode.hist)
+
+
+def synthetic(body, nlocals=4, iterations=20_000, repeat=50):
+    '''
+    Construye main() { while (i < iterations) { body*repeat; i = i + 1 } }
+    '''
+    func = Function('main', 0)
+    func.consts = [0, 1, iterations, 2.5, None]
+    func.locals = [0, 3, 2.5, True][:nlocals]
+    code = func.code
+    code.extend([JUMP, 0])
+    start = len(code) // 2
+    for _ in range(repeat):
+        for op, arg in body:
+            code.extend([op, arg])
+    code.extend([LOAD_LOCAL, 0, ADD_CONST, 1, STORE_LOCAL, 0])
+    cond = len(code) // 2
+    code.extend([LOAD_LOCAL, 0, CONST, 2, LT, 0, JUMP_IF_TRUE, start])
+    code.extend([CONST, 4, RETURN, 0])
+    code[1] = cond
+    module = Module()
+    module.functions.append(func)
+    module.main = 0
+    return module, iterations * (len(body) * repeat + 7)
+
+
+_cases = [
+    ('LOAD_LOCAL/POP',   [(LOAD_LOCAL, 1), (POP, 0)]),
+    ('CONST/POP',        [(CONST, 1), (POP, 0)]),
+    ('LOAD/STORE_LOCAL', [(LOAD_LOCAL, 1), (STORE_LOCAL, 1)]),
+    ('DUP/POP',          [(LOAD_LOCAL, 1), (DUP, 0), (POP, 0), (POP, 0)]),
+    ('ADD',              [(LOAD_LOCAL, 1), (LOAD_LOCAL, 1), (ADD, 0), (POP, 0)]),
+    ('ADD_LOCAL',        [(LOAD_LOCAL, 1), (ADD_LOCAL, 1), (POP, 0)]),
+    ('MUL_CONST',        [(LOAD_LOCAL, 2), (MUL_CONST, 3), (POP, 0)]),
+    ('MUL (float)',      [(LOAD_LOCAL, 2), (LOAD_LOCAL, 2), (MUL, 0), (POP, 0)]),
+    ('DIV (float)',      [(LOAD_LOCAL, 2), (LOAD_LOCAL, 2), (DIV, 0), (POP, 0)]),
+    ('IDIV',             [(LOAD_LOCAL, 1), (LOAD_LOCAL, 1), (IDIV, 0), (POP, 0)]),
+    ('LT',               [(LOAD_LOCAL, 1), (LOAD_LOCAL, 1), (LT, 0), (POP, 0)]),
+    ('EQ',               [(LOAD_LOCAL, 1), (LOAD_LOCAL, 1), (EQ, 0), (POP, 0)]),
+    ('NEG',              [(LOAD_LOCAL, 1), (NEG, 0), (POP, 0)]),
+    ('NOT',              [(LOAD_LOCAL, 3), (NOT, 0), (POP, 0)]),
+]
+
+
+def bench_opcodes():
+    print(f'{"opcode":<20}{"ns/instr":>10}')
+    for name, body in _cases:
+        module, executed = synthetic(body)
+        elapsed = min(run_silent(module) for _ in range(3))
+        print(f'{name:<20}{elapsed / executed * 1e9:>10.1f}')
+
+
+def main(argv):
+    fname = argv[1] if len(argv) > 1 else 'test/mandel.mcc'
+    module = compile_file(fname)
+
+    elapsed = min(run_silent(module) for _ in range(3))
+    hist = count_opcodes(module)
+    total = sum(hist.values())
+
+    print(f'{fname}: {elapsed:.3f} s, {total} instrucciones, '
+          f'{elapsed / total * 1e9:.1f} ns/instr, {total / elapsed / 1e6:.2f} Minstr/s')
+    print()
+    print(f'{"opcode":<22}{"count":>12}{"%":>8}')
+    for op, count in hist.most_common():
+        print(f'{opnames[op]:<22}{count:>12}{100 * count / total:>8.1f}')
+    print()
+    bench_opcodes()
+
+
+if __name__ == '__main__':
+    main(sys.argv)
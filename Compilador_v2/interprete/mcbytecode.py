@@ -0,0 +1,399 @@
+# mcbytecode.py
+'''
+Compilador a Bytecode
+---------------------
+
+Traduce el AST (ya verificado por el Checker) a un bytecode compacto
+para la máquina de pila de mcvm.py.
+
+Cada función se compila a un objeto Function con:
+
+  code    : array('i') de pares (opcode, argumento)
+  consts  : pool de constantes de la función
+  locals  : valor inicial de cada slot local (los parámetros ocupan
+            los primeros slots)
+
+Las variables globales se resuelven a un índice en Module.globals y
+las llamadas a un índice en Module.functions, de modo que la máquina
+nunca busca un nombre en tiempo de ejecución. Los saltos usan como
+offset el número de instrucción destino.
+
+Al emitir se fusionan las secuencias más frecuentes en superinstrucciones
+(por ejemplo LOAD_LOCAL x; MUL -> MUL_LOCAL x) para reducir el número de
+instrucciones despachadas.
+
+Los visit() que recorren hijos son generadores ('yield hijo', ver
+mcast._drive), así que la profundidad del AST no depende de la pila de
+Python.
+'''
+from array       import array
+import math
+
+from analizador_sintactico.mcast import *
+from analizador_semantico.mchecker import SymbolTable
+from .mcruntime  import zero_values
+
+# =====================================================================
+# Opcodes
+# =====================================================================
+opnames = [
+    'CONST',          # push consts[arg]
+    'LOAD_LOCAL',     # push locals[arg]
+    'STORE_LOCAL',    # locals[arg] = pop
+    'LOAD_GLOBAL',    # push globals[arg]
+    'STORE_GLOBAL',   # globals[arg] = pop
+    'DUP',
+    'POP',
+
+    'ADD', 'SUB', 'MUL', 'DIV', 'IDIV', 'IMOD',
+    'LT', 'LE', 'GT', 'GE', 'EQ', 'NE',
+    'NEG', 'NOT', 'TO_FLOAT',
+
+    'JUMP',                 # pc = arg
+    'JUMP_IF_FALSE',        # if not pop: pc = arg
+    'JUMP_IF_TRUE',         # if pop: pc = arg
+    'JUMP_IF_FALSE_OR_POP', # &&
+    'JUMP_IF_TRUE_OR_POP',  # ||
+
+    'CALL',           # llama a functions[arg]
+    'RETURN',
+
+    'NEW_ARRAY',      # arg = índice del tipo en array_types
+    'ALOAD',          # arr, idx -> arr[idx]
+    'ASTORE',         # idx, val, arr -> (val si arg != 0)
+    'ALEN',
+
+    'PRINTF',         # arg = número de argumentos
+    'IREAD',
+
+    # Superinstrucciones: operación con el operando derecho en un slot local
+    # o en el pool de constantes
+    'ADD_LOCAL', 'SUB_LOCAL', 'MUL_LOCAL',
+    'ADD_CONST', 'SUB_CONST', 'MUL_CONST',
+]
+
+for _i, _name in enumerate(opnames):
+    globals()[_name] = _i
+
+# Tipos de elemento de NEW_ARRAY
+array_types = ['int', 'float', 'bool']
+
+_fused = {
+    (LOAD_LOCAL, ADD) : ADD_LOCAL,
+    (LOAD_LOCAL, SUB) : SUB_LOCAL,
+    (LOAD_LOCAL, MUL) : MUL_LOCAL,
+    (CONST, ADD) : ADD_CONST,
+    (CONST, SUB) : SUB_CONST,
+    (CONST, MUL) : MUL_CONST,
+}
+
+_binops = {
+    '+' : ADD, '-' : SUB, '*' : MUL, '/' : DIV,
+    '<' : LT, '<=' : LE, '>' : GT, '>=' : GE, '==' : EQ, '!=' : NE,
+}
+
+
+class Function:
+    def __init__(self, name, nparams):
+        self.name    = name
+        self.nparams = nparams
+        self.code    = array('i')
+        self.consts  = []
+        self.locals  = []
+
+    @property
+    def nlocals(self):
+        return len(self.locals)
+
+    def __repr__(self):
+        return f'<Function {self.name}/{self.nparams}>'
+
+
+class Module:
+    def __init__(self):
+        self.functions = []     # Function, en orden de declaración
+        self.globals   = []     # valor inicial de cada global
+        self.gnames    = []     # nombre de cada global
+        self.main      = None   # índice de main en functions
+
+
+def disassemble(func: Function):
+    '''
+    Retorna el listado legible del bytecode de una función.
+    '''
+    lines = [f'{func.name}: params={func.nparams} locals={func.nlocals}']
+    code = func.code
+    for pc in range(0, len(code) // 2):
+        op, arg = code[2 * pc], code[2 * pc + 1]
+        extra = f'  ({func.consts[arg]!r})' if op in (CONST, ADD_CONST, SUB_CONST, MUL_CONST) else ''
+        lines.append(f'{pc:6d}  {opnames[op]:<22}{arg}{extra}')
+    return '\n'.join(lines)
+
+
+class Compiler(Visitor):
+    '''
+    Genera el bytecode de un Program verificado.
+    '''
+
+    @classmethod
+    def compile(cls, n: Program):
+        compiler = cls()
+        n.accept(compiler)
+        return compiler.module
+
+    def __init__(self):
+        self.module = Module()
+        self.scope  = SymbolTable()
+        self.func   = None
+        self.loops  = []        # (continue_patches, break_patches)
+        self.label  = 0         # última posición que es destino de un salto
+        self.blocks = 0         # profundidad de bloques en la función actual
+
+    # -----------------------------------------------------------------
+    # Emisión
+    # -----------------------------------------------------------------
+    def emit(self, op, arg=0):
+        code = self.func.code
+        pc = len(code) // 2
+
+        # No se fusiona si la nueva instrucción es destino de un salto
+        if pc > self.label:
+            fused = _fused.get((code[-2], op))
+            if fused is not None:
+                code[-2] = fused
+                return pc - 1
+
+        code.append(op)
+        code.append(arg)
+        return pc
+
+    def here(self):
+        self.label = len(self.func.code) // 2
+        return self.label
+
+    def patch(self, pc, target):
+        self.func.code[2 * pc + 1] = target
+
+    def const(self, value):
+        # 1, 1.0 y True son iguales como claves, así que se distingue el
+        # tipo; 0.0 y -0.0 también, así que se agrega el signo
+        if isinstance(value, float):
+            key = (float, value, math.copysign(1.0, value))
+        else:
+            key = (type(value), value)
+        consts = self.func.consts
+        if key not in self._const_index:
+            self._const_index[key] = len(consts)
+            consts.append(value)
+        return self._const_index[key]
+
+    def emit_load(self, ident):
+        kind, index = self.scope.lookup_symbol(ident)
+        self.emit(LOAD_LOCAL if kind == 'local' else LOAD_GLOBAL, index)
+
+    def emit_store(self, ident):
+        kind, index = self.scope.lookup_symbol(ident)
+        self.emit(STORE_LOCAL if kind == 'local' else STORE_GLOBAL, index)
+
+    def add_local(self, ident, value):
+        self.scope.add_symbol(ident, ('local', self.func.nlocals), 'local')
+        self.func.locals.append(value)
+
+    # -----------------------------------------------------------------
+    # Declaraciones
+    # -----------------------------------------------------------------
+    def visit(self, n: Program):
+        for decl in n.decls:
+            yield decl
+
+    def visit(self, n: VarDeclStmt):
+        value = None if n.is_array else zero_values[n.type_spec]
+        if self.func is None:
+            self.scope.add_symbol(n.ident, ('global', len(self.module.globals)))
+            self.module.globals.append(value)
+            self.module.gnames.append(n.ident)
+        else:
+            self.add_local(n.ident, value)
+            if self.blocks > 1:
+                # Las locales de un bloque interno vuelven a su valor
+                # inicial cada vez que se entra al bloque (como en mcinterp)
+                self.emit(CONST, self.const(value))
+                self.emit(STORE_LOCAL, self.func.nlocals - 1)
+
+    def visit(self, n: FuncDeclStmt):
+        index = len(self.module.functions)
+        self.func = Function(n.name, len(n.params))
+        self.module.functions.append(self.func)
+        self.scope.add_symbol(n.name, ('function', index))
+        if n.name == 'main':
+            self.module.main = index
+
+        self._const_index = { }
+        self.label = 0
+        self.scope.enter_scope()
+        for p in n.params:
+            self.add_local(p.ident, None if p.is_array else zero_values[p.type_spec])
+
+        yield n.body
+
+        # Retorno implícito al final de la función
+        value = zero_values.get(n.return_type)
+        self.emit(CONST, self.const(value))
+        self.emit(RETURN)
+
+        self.scope.exit_scope()
+        self.func = None
+
+    # -----------------------------------------------------------------
+    # Sentencias
+    # -----------------------------------------------------------------
+    def visit(self, n: CompoundStmt):
+        self.scope.enter_scope()
+        self.blocks += 1
+        for decl in n.local_decls:
+            yield decl
+        for stmt in n.stmt_list:
+            yield stmt
+        self.blocks -= 1
+        self.scope.exit_scope()
+
+    def visit(self, n: ExprStmt):
+        expr = n.expr
+        # Las asignaciones usadas como sentencia no necesitan dejar su valor
+        if isinstance(expr, VarAssignmentExpr):
+            yield expr.expr
+            self.emit_store(expr.ident)
+        elif isinstance(expr, ArrayAssignmentExpr):
+            yield expr.index
+            yield expr.expr
+            self.emit_load(expr.ident)
+            self.emit(ASTORE, 0)
+        else:
+            yield expr
+            self.emit(POP)
+
+    def visit(self, n: NullStmt):
+        pass
+
+    def visit(self, n: IfStmt):
+        yield n.condition
+        jelse = self.emit(JUMP_IF_FALSE)
+        yield n.then_stmt
+        if n.else_stmt:
+            jend = self.emit(JUMP)
+            self.patch(jelse, self.here())
+            yield n.else_stmt
+            self.patch(jend, self.here())
+        else:
+            self.patch(jelse, self.here())
+
+    def visit(self, n: WhileStmt):
+        # La condición se evalúa al final para usar un solo salto por iteración
+        jcond = self.emit(JUMP)
+        body = self.here()
+        self.loops.append(([], []))
+        yield n.body
+        continues, breaks = self.loops.pop()
+
+        cond = self.here()
+        self.patch(jcond, cond)
+        for pos in continues:
+            self.patch(pos, cond)
+        yield n.condition
+        self.emit(JUMP_IF_TRUE, body)
+
+        for pos in breaks:
+            self.patch(pos, self.here())
+
+    def visit(self, n: BreakStmt):
+        self.loops[-1][1].append(self.emit(JUMP))
+
+    def visit(self, n: ContinueStmt):
+        self.loops[-1][0].append(self.emit(JUMP))
+
+    def visit(self, n: ReturnStmt):
+        if n.expr:
+            yield n.expr
+        else:
+            self.emit(CONST, self.const(None))
+        self.emit(RETURN)
+
+    # -----------------------------------------------------------------
+    # Expresiones
+    # -----------------------------------------------------------------
+    def visit(self, n: ConstExpr):
+        self.emit(CONST, self.const(n.value))
+
+    def visit(self, n: VarExpr):
+        self.emit_load(n.ident)
+
+    def visit(self, n: VarAssignmentExpr):
+        yield n.expr
+        self.emit(DUP)
+        self.emit_store(n.ident)
+
+    def visit(self, n: ArrayAssignmentExpr):
+        # El arreglo se lee después del índice y del valor, como en mcinterp
+        yield n.index
+        yield n.expr
+        self.emit_load(n.ident)
+        self.emit(ASTORE, 1)
+
+    def visit(self, n: ArrayLookupExpr):
+        self.emit_load(n.ident)
+        yield n.index
+        self.emit(ALOAD)
+
+    def visit(self, n: ArraySizeExpr):
+        self.emit_load(n.ident)
+        self.emit(ALEN)
+
+    def visit(self, n: NewArrayExpr):
+        yield n.expr
+        self.emit(NEW_ARRAY, array_types.index(n._type))
+
+    def visit(self, n: IntToFloatExpr):
+        yield n.expr
+        self.emit(TO_FLOAT)
+
+    def visit(self, n: BinaryOpExpr):
+        yield n.left
+        if n.opr in ('&&', '||'):
+            # Evaluación en corto circuito
+            jump = self.emit(JUMP_IF_FALSE_OR_POP if n.opr == '&&' else JUMP_IF_TRUE_OR_POP)
+            yield n.right
+            self.patch(jump, self.here())
+            return
+
+        yield n.right
+        integer = n.left.type == 'int' and n.right.type == 'int'
+        if n.opr == '/' and integer:
+            self.emit(IDIV)
+        elif n.opr == '%':
+            self.emit(IMOD)
+        else:
+            self.emit(_binops[n.opr])
+
+    def visit(self, n: UnaryOpExpr):
+        yield n.expr
+        if n.opr == '-':
+            self.emit(NEG)
+        elif n.opr == '!':
+            self.emit(NOT)
+
+    def visit(self, n: CallExpr):
+        if n.ident == 'printf':
+            for arg in n.args:
+                yield arg
+            self.emit(PRINTF, len(n.args))
+        elif n.ident == 'iread':
+            self.emit(IREAD)
+        elif n.ident == 'scanf':
+            self.emit(IREAD)
+            self.emit_store(n.args[0].ident)
+            self.emit(CONST, self.const(None))
+        else:
+            for arg in n.args:
+                yield arg
+            kind, index = self.scope.lookup_symbol(n.ident)
+            self.emit(CALL, index)
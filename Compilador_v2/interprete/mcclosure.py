@@ -0,0 +1,409 @@
+# mcclosure.py
+'''
+Compilación a Closures
+----------------------
+
+Traduce cada nodo del AST (ya verificado) una sola vez a una función de
+Python especializada. Al ejecutar ya no hay despacho por tipo de nodo:
+cada closure llama directamente a las closures de sus hijos.
+
+Todas las closures reciben el marco de la llamada actual 'f', una lista
+con los parámetros y las locales de la función (resueltos a un índice
+al compilar, como en mcbytecode). Las globales están en la lista 'g'
+que comparten todas las closures.
+
+Las expresiones se compilan a un operando (tipo, valor):
+
+  ('const',  valor)     constante
+  ('local',  slot)      f[slot]
+  ('global', índice)    g[índice]
+  ('expr',   closure)   closure(f)
+
+y los operadores unarios y binarios se especializan según el tipo de
+sus operandos: 'x * 2.0' con x local es 'lambda f: f[x] * 2.0', sin
+llamadas intermedias. Cada combinación se genera (con exec) la primera
+vez que se usa y queda en caché.
+
+Las sentencias retornan None para continuar o BREAK, CONTINUE, RETURN
+como en mcinterp; el valor de return queda en el último slot del marco.
+'''
+import sys
+
+from analizador_sintactico.mcast import *
+from analizador_semantico.mchecker import SymbolTable
+from .mcruntime  import (RunError, zero_values, idiv, imod, new_array, printf, iread,
+                         check_array, aload, astore)
+from .mcinterp   import BREAK, CONTINUE, RETURN
+
+
+# =====================================================================
+# Especialización de operadores
+# =====================================================================
+_operand = {
+    'const' : '{}',
+    'local' : 'f[{}]',
+    'global': 'g[{}]',
+    'expr'  : '{}(f)',
+}
+
+_binary = {
+    '+' : '{} + {}',   '-' : '{} - {}',   '*' : '{} * {}',   '/' : '{} / {}',
+    '//': 'idiv({}, {})',                 '%' : 'imod({}, {})',
+    '<' : '{} < {}',   '<=': '{} <= {}',  '>' : '{} > {}',   '>=': '{} >= {}',
+    '==': '{} == {}',  '!=': '{} != {}',
+    '&&': '{} and {}', '||': '{} or {}',
+}
+
+_unary = {
+    '-' : '-{}',
+    '!' : 'not {}',
+    'float': 'float({})',
+}
+
+_makers = { }
+
+def _make(body: str):
+    '''
+    Retorna make(a, b, g) -> lambda f: body, compilada una sola vez por
+    cada texto distinto de body.
+    '''
+    make = _makers.get(body)
+    if make is None:
+        namespace = {'idiv': idiv, 'imod': imod}
+        exec(f'def make(a, b, g):\n    return lambda f: {body}', namespace)
+        make = _makers[body] = namespace['make']
+    return make
+
+
+# =====================================================================
+# Programa compilado
+# =====================================================================
+class Function:
+    def __init__(self, name, nparams, return_type):
+        self.name    = name
+        self.nparams = nparams
+        self.default = zero_values.get(return_type)
+        self.body    = None     # closure del cuerpo
+        self.locals  = []       # valor inicial de los slots después de los parámetros
+        self.ret     = 0        # slot donde queda el valor de return
+
+    def __repr__(self):
+        return f'<Function {self.name}/{self.nparams}>'
+
+
+class Module:
+    recursion_limit = 200_000
+
+    def __init__(self):
+        self.functions = []
+        self.globals   = []     # lista compartida por las closures
+        self.initial   = []     # valor inicial de cada global
+        self.main      = None
+
+    def run(self):
+        if self.main is None:
+            raise RunError("El programa no tiene función 'main'")
+        self.globals[:] = self.initial
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(max(limit, self.recursion_limit))
+        try:
+            main = self.functions[self.main]
+            frame = main.locals[:]
+            if main.body(frame) is RETURN:
+                return frame[main.ret]
+            return main.default
+        except ZeroDivisionError:
+            raise RunError("División por cero")
+        except RecursionError:
+            raise RunError("Recursión demasiado profunda")
+        finally:
+            sys.setrecursionlimit(limit)
+
+
+# =====================================================================
+# Compilador
+# =====================================================================
+class ClosureCompiler(Visitor):
+    '''
+    Genera las closures de un Program verificado.
+    '''
+
+    @classmethod
+    def compile(cls, n: Node):
+        compiler = cls()
+        n.accept(compiler)
+        return compiler.program
+
+    def __init__(self):
+        self.program = Module()
+        self.scope   = SymbolTable()
+        self.func    = None
+        self.blocks  = 0        # profundidad de bloques en la función actual
+
+    def closure(self, operand):
+        '''
+        Convierte un operando en una closure f -> valor
+        '''
+        kind, value = operand
+        if kind == 'expr':
+            return value
+        return _make(_operand[kind].format('a'))(value, None, self.program.globals)
+
+    def unary(self, template, operand):
+        kind, value = operand
+        body = template.format(_operand[kind].format('a'))
+        return 'expr', _make(body)(value, None, self.program.globals)
+
+    def binary(self, opr, left, right):
+        (lkind, a), (rkind, b) = left, right
+        body = _binary[opr].format(_operand[lkind].format('a'), _operand[rkind].format('b'))
+        return 'expr', _make(body)(a, b, self.program.globals)
+
+    # -----------------------------------------------------------------
+    # Declaraciones
+    # -----------------------------------------------------------------
+    def visit(self, n: Program):
+        for decl in n.decls:
+            yield decl
+
+    def visit(self, n: VarDeclStmt):
+        value = None if n.is_array else zero_values[n.type_spec]
+        if self.func is None:
+            program = self.program
+            self.scope.add_symbol(n.ident, ('global', len(program.initial)))
+            program.initial.append(value)
+            program.globals.append(value)
+        else:
+            self.add_local(n.ident, value)
+
+    def add_local(self, ident, value):
+        func = self.func
+        self.scope.add_symbol(ident, ('local', func.nparams + len(func.locals)), 'local')
+        func.locals.append(value)
+
+    def visit(self, n: FuncDeclStmt):
+        index = len(self.program.functions)
+        self.func = Function(n.name, len(n.params), n.return_type)
+        self.program.functions.append(self.func)
+        self.scope.add_symbol(n.name, ('function', self.func))
+        if n.name == 'main':
+            self.program.main = index
+
+        self.scope.enter_scope()
+        for slot, p in enumerate(n.params):
+            self.scope.add_symbol(p.ident, ('local', slot), 'local')
+        self.func.body = yield n.body
+        self.scope.exit_scope()
+
+        # El último slot guarda el valor de return
+        self.func.ret = self.func.nparams + len(self.func.locals)
+        self.func.locals.append(None)
+        self.func = None
+
+    # -----------------------------------------------------------------
+    # Sentencias
+    # -----------------------------------------------------------------
+    def visit(self, n: CompoundStmt):
+        self.scope.enter_scope()
+        self.blocks += 1
+        func = self.func
+        start = func.nparams + len(func.locals)
+        for decl in n.local_decls:
+            yield decl
+        stmts = [ ]
+        if self.blocks > 1 and n.local_decls:
+            # Las locales de un bloque interno vuelven a su valor inicial
+            # cada vez que se entra al bloque (como en mcinterp)
+            end = func.nparams + len(func.locals)
+            initial = func.locals[start - func.nparams:]
+            def reset(f):
+                f[start:end] = initial
+            stmts.append(reset)
+        for stmt in n.stmt_list:
+            stmts.append((yield stmt))
+        self.blocks -= 1
+        self.scope.exit_scope()
+
+        if len(stmts) == 1:
+            return stmts[0]
+
+        def block(f):
+            for stmt in stmts:
+                status = stmt(f)
+                if status is not None:
+                    return status
+        return block
+
+    def visit(self, n: ExprStmt):
+        # Una sentencia retorna None, así que el valor de la expresión se descarta
+        expr = n.expr
+        if isinstance(expr, VarAssignmentExpr):
+            kind, slot = self.scope.lookup_symbol(expr.ident)
+            value = self.closure((yield expr.expr))
+            if kind == 'local':
+                def assign(f):
+                    f[slot] = value(f)
+            else:
+                g = self.program.globals
+                def assign(f):
+                    g[slot] = value(f)
+            return assign
+
+        value = self.closure((yield expr))
+        def stmt(f):
+            value(f)
+        return stmt
+
+    def visit(self, n: NullStmt):
+        return _nothing
+
+    def visit(self, n: IfStmt):
+        cond = self.closure((yield n.condition))
+        then = yield n.then_stmt
+        if n.else_stmt is None:
+            def if_stmt(f):
+                if cond(f):
+                    return then(f)
+        else:
+            other = yield n.else_stmt
+            def if_stmt(f):
+                if cond(f):
+                    return then(f)
+                return other(f)
+        return if_stmt
+
+    def visit(self, n: WhileStmt):
+        cond = self.closure((yield n.condition))
+        body = yield n.body
+        def while_stmt(f):
+            while cond(f):
+                status = body(f)
+                if status is not None:
+                    if status is BREAK:
+                        break
+                    if status is RETURN:
+                        return status
+        return while_stmt
+
+    def visit(self, n: BreakStmt):
+        return _break
+
+    def visit(self, n: ContinueStmt):
+        return _continue
+
+    def visit(self, n: ReturnStmt):
+        # func.ret se conoce al terminar de compilar la función
+        func = self.func
+        if n.expr is None:
+            def return_stmt(f):
+                f[func.ret] = None
+                return RETURN
+        else:
+            value = self.closure((yield n.expr))
+            def return_stmt(f):
+                f[func.ret] = value(f)
+                return RETURN
+        return return_stmt
+
+    # -----------------------------------------------------------------
+    # Expresiones
+    # -----------------------------------------------------------------
+    def visit(self, n: ConstExpr):
+        return 'const', n.value
+
+    def visit(self, n: VarExpr):
+        return self.scope.lookup_symbol(n.ident)
+
+    def visit(self, n: VarAssignmentExpr):
+        kind, slot = self.scope.lookup_symbol(n.ident)
+        value = self.closure((yield n.expr))
+        if kind == 'local':
+            def assign(f):
+                f[slot] = result = value(f)
+                return result
+        else:
+            g = self.program.globals
+            def assign(f):
+                g[slot] = result = value(f)
+                return result
+        return 'expr', assign
+
+    def visit(self, n: ArrayLookupExpr):
+        arr = self.closure(self.scope.lookup_symbol(n.ident))
+        index = self.closure((yield n.index))
+        return 'expr', lambda f: aload(arr(f), index(f))
+
+    def visit(self, n: ArrayAssignmentExpr):
+        arr = self.closure(self.scope.lookup_symbol(n.ident))
+        index = self.closure((yield n.index))
+        value = self.closure((yield n.expr))
+        def assign(f):
+            # El índice se evalúa antes que el valor, como en mcinterp
+            i = index(f)
+            result = value(f)
+            astore(arr(f), i, result)
+            return result
+        return 'expr', assign
+
+    def visit(self, n: ArraySizeExpr):
+        arr = self.closure(self.scope.lookup_symbol(n.ident))
+        return 'expr', lambda f: len(check_array(arr(f)))
+
+    def visit(self, n: NewArrayExpr):
+        size = self.closure((yield n.expr))
+        type_spec = n._type
+        return 'expr', lambda f: new_array(type_spec, size(f))
+
+    def visit(self, n: IntToFloatExpr):
+        return self.unary(_unary['float'], (yield n.expr))
+
+    def visit(self, n: UnaryOpExpr):
+        operand = yield n.expr
+        if n.opr == '+':
+            return operand
+        return self.unary(_unary[n.opr], operand)
+
+    def visit(self, n: BinaryOpExpr):
+        left = yield n.left
+        right = yield n.right
+        opr = n.opr
+        if opr == '/' and n.type == 'int':
+            opr = '//'
+        return self.binary(opr, left, right)
+
+    def visit(self, n: CallExpr):
+        if n.ident == 'printf':
+            args = [ ]
+            for arg in n.args:
+                args.append(self.closure((yield arg)))
+            return 'expr', lambda f: printf(*[arg(f) for arg in args])
+        if n.ident == 'iread':
+            return 'expr', lambda f: iread()
+        if n.ident == 'scanf':
+            kind, slot = self.scope.lookup_symbol(n.args[0].ident)
+            g = self.program.globals
+            def scanf(f):
+                (f if kind == 'local' else g)[slot] = iread()
+            return 'expr', scanf
+
+        args = [ ]
+        for arg in n.args:
+            args.append(self.closure((yield arg)))
+        _, callee = self.scope.lookup_symbol(n.ident)
+        def call(f):
+            frame = [arg(f) for arg in args]
+            frame += callee.locals
+            if callee.body(frame) is RETURN:
+                return frame[callee.ret]
+            return callee.default
+        return 'expr', call
+
+
+def _nothing(f):
+    pass
+
+def _break(f):
+    return BREAK
+
+def _continue(f):
+    return CONTINUE
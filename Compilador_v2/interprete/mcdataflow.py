@@ -0,0 +1,248 @@
+# mcdataflow.py
+'''
+Análisis de Flujo de Datos
+--------------------------
+
+Resolvedor genérico por lista de trabajo sobre el CFG de una
+mcir.Function. Los conjuntos son enteros de Python usados como vectores
+de bits: el elemento i está en el conjunto si el bit i está encendido,
+así que la unión es |, la intersección & y la diferencia & ~. Un
+conjunto de miles de registros ocupa unos pocos cientos de bytes y cada
+operación trabaja sobre palabras de 30 bits, en vez de un objeto por
+elemento como set o dict.
+
+Cada problema da por bloque gen y kill, y la función de transferencia
+es siempre
+
+    salida = gen | (entrada & ~kill)
+
+en la dirección del análisis. Sobre solve() están:
+
+  liveness               registros vivos (hacia atrás, unión)
+  reaching_definitions   definiciones que alcanzan cada bloque (hacia
+                         adelante, unión)
+  available_expressions  expresiones ya calculadas en todos los caminos
+                         (hacia adelante, intersección)
+
+Las tres entienden la forma SSA: una phi define su registro al inicio
+del bloque y usa cada argumento al final del predecesor respectivo.
+'''
+from collections import namedtuple
+import heapq
+
+from .mcir       import *
+
+# Conjuntos al inicio (ins) y al final (outs) de cada bloque y número de
+# veces que se aplicó una función de transferencia
+Solution = namedtuple('Solution', ['ins', 'outs', 'visits'])
+
+
+def members(bits):
+    '''
+    Índices de los bits encendidos, de menor a mayor
+    '''
+    result = []
+    while bits:
+        low = bits & -bits
+        result.append(low.bit_length() - 1)
+        bits ^= low
+    return result
+
+
+def solve(func: Function, gen, kill, forward=True, union=True, boundary=0,
+          universe=0, extra=None):
+    '''
+    Punto fijo del problema. boundary es el valor en la entrada (hacia
+    adelante) o en los bloques sin sucesores (hacia atrás); universe es
+    el conjunto completo, valor inicial de las intersecciones. extra[b]
+    se une al valor que llega a b antes de su transferencia (los usos de
+    las phi al final de los predecesores en liveness).
+    '''
+    blocks = func.blocks
+    n = len(blocks)
+    init = 0 if union else universe
+    ins = [init] * n
+    outs = [init] * n
+    if forward:
+        sources = [b.preds for b in blocks]
+        targets = [b.succs for b in blocks]
+        before, after = ins, outs
+        sign = 1
+    else:
+        sources = [b.succs for b in blocks]
+        targets = [b.preds for b in blocks]
+        before, after = outs, ins
+        sign = -1
+
+    # La lista de trabajo sale en orden posterior inverso (hacia adelante)
+    # o en orden posterior (hacia atrás), así un bloque se procesa después
+    # de sus fuentes salvo en los ciclos; con una cola FIFO el número de
+    # visitas crece con el largo de la función
+    pending = [sign * b for b in range(n)]
+    heapq.heapify(pending)
+    queued = bytearray(b'\x01') * n
+    visits = 0
+    while pending:
+        b = sign * heapq.heappop(pending)
+        queued[b] = 0
+        visits += 1
+
+        src = sources[b]
+        if not src:
+            value = boundary
+        elif union:
+            value = 0
+            for s in src:
+                value |= after[s]
+        else:
+            value = universe
+            for s in src:
+                value &= after[s]
+        if forward and b == 0 and src:
+            # La entrada también recibe el valor de frontera
+            value = value | boundary if union else value & boundary
+        if extra is not None:
+            value |= extra[b]
+        before[b] = value
+
+        new = gen[b] | (value & ~kill[b])
+        if new != after[b]:
+            after[b] = new
+            for t in targets[b]:
+                if not queued[t]:
+                    queued[t] = 1
+                    heapq.heappush(pending, sign * t)
+    return Solution(ins, outs, visits)
+
+
+# =====================================================================
+# Registros vivos
+# =====================================================================
+def liveness(func: Function):
+    '''
+    ins[b]: registros vivos al inicio de b; outs[b]: al final
+    '''
+    blocks = func.blocks
+    use = [0] * len(blocks)
+    defs = [0] * len(blocks)
+    phi_uses = [0] * len(blocks)
+    for block in blocks:
+        u = d = 0
+        for dst, args in block.phis:
+            d |= 1 << dst
+            for a, p in zip(args, block.preds):
+                if a >= 0:
+                    phi_uses[p] |= 1 << a
+        for op, x, y, z in block:
+            sig = signatures[op]
+            for c, v in zip(sig, (x, y, z)):
+                if c == 'r' and not d >> v & 1:
+                    u |= 1 << v
+            if sig[0] == 'd':
+                d |= 1 << x
+        use[block.index] = u
+        defs[block.index] = d
+    return solve(func, use, defs, forward=False, extra=phi_uses)
+
+
+# =====================================================================
+# Definiciones que alcanzan
+# =====================================================================
+def reaching_definitions(func: Function):
+    '''
+    Retorna (solución, sitios): el bit i de los conjuntos es la
+    definición sites[i] = (bloque, posición), con posición negativa para
+    las phi (~k) y bloque -1 para los parámetros (que se definen al
+    entrar a la función).
+    '''
+    blocks = func.blocks
+    sites = [(-1, r) for r in range(func.nparams)]
+    defs_of = [0] * len(func.types)         # definiciones de cada registro
+    block_defs = []                         # [(registro, definición)] por bloque
+    for r in range(func.nparams):
+        defs_of[r] |= 1 << r
+    for block in blocks:
+        local = []
+        for k, (dst, _) in enumerate(block.phis):
+            local.append((dst, len(sites)))
+            sites.append((block.index, ~k))
+        for i, (op, x, y, z) in enumerate(block):
+            if signatures[op][0] == 'd':
+                local.append((x, len(sites)))
+                sites.append((block.index, i))
+        for reg, d in local:
+            defs_of[reg] |= 1 << d
+        block_defs.append(local)
+
+    gen = [0] * len(blocks)
+    kill = [0] * len(blocks)
+    for b, local in enumerate(block_defs):
+        last = { }
+        k = 0
+        for reg, d in local:
+            last[reg] = d
+            k |= defs_of[reg]
+        g = 0
+        for d in last.values():
+            g |= 1 << d
+        gen[b] = g
+        kill[b] = k
+    params = (1 << func.nparams) - 1
+    return solve(func, gen, kill, boundary=params), sites
+
+
+# =====================================================================
+# Expresiones disponibles
+# =====================================================================
+# Operaciones cuyo resultado depende solo de sus operandos
+_expressions = {ADD, SUB, MUL, DIV, IDIV, IMOD, LT, LE, GT, GE, EQ, NE, NEG, NOT, I2F, ALEN}
+_commutative = {ADD, MUL, EQ, NE}
+
+
+def _expression_key(op, y, z):
+    if signatures[op] == 'dr':
+        return op, y, 0
+    if op in _commutative and y > z:
+        y, z = z, y
+    return op, y, z
+
+
+def available_expressions(func: Function):
+    '''
+    Retorna (solución, expresiones): el bit i es la expresión
+    expressions[i] = (op, y, z), disponible si ya se calculó en todos
+    los caminos y ninguno de sus operandos cambió después.
+    '''
+    blocks = func.blocks
+    index = { }
+    expressions = []
+    uses_of = [0] * len(func.types)         # expresiones que usan cada registro
+    for block in blocks:
+        for op, x, y, z in block:
+            if op in _expressions:
+                key = _expression_key(op, y, z)
+                if key not in index:
+                    bit = 1 << len(expressions)
+                    index[key] = len(expressions)
+                    expressions.append(key)
+                    uses_of[y] |= bit
+                    if signatures[op] == 'drr':
+                        uses_of[z] |= bit
+
+    gen = [0] * len(blocks)
+    kill = [0] * len(blocks)
+    for block in blocks:
+        g = k = 0
+        for dst, _ in block.phis:
+            k |= uses_of[dst]
+        for op, x, y, z in block:
+            if op in _expressions:
+                g |= 1 << index[_expression_key(op, y, z)]
+            if signatures[op][0] == 'd':
+                # x = x + 1 calcula la expresión y la invalida
+                g &= ~uses_of[x]
+                k |= uses_of[x]
+        gen[block.index] = g
+        kill[block.index] = k
+    universe = (1 << len(expressions)) - 1
+    return solve(func, gen, kill, union=False, universe=universe), expressions
@@ -0,0 +1,205 @@
+# mcfold.py
+'''
+Plegado de Constantes
+---------------------
+
+Pasada del AST (mcpasses.ast_passes['fold']) sobre el Program
+verificado. Con mcast.rewrite recorre el árbol en post-orden, así que
+cuando llega a un nodo sus hijos ya están simplificados:
+
+- BinaryOpExpr y UnaryOpExpr con operandos ConstExpr se reemplazan por
+  su valor, con el tipo de resultado de mctypesys.binary_type y
+  unary_type (1 + 2.5 es float, 1 < 2.5 es bool). IntToFloatExpr de
+  una constante es la constante float.
+- Identidades que no cambian el valor ni el tipo: x + 0, x - 0, x * 1,
+  x / 1, -(-x), !!b, true && b, false || b; y x * 0, b && false,
+  b || true cuando x o b no tienen efectos ni pueden fallar. Con float,
+  por el signo del cero, solo x - 0.0 y x + (-0.0).
+- if con condición constante se reemplaza por la rama que se ejecuta y
+  while (false) por una sentencia vacía.
+
+La semántica es la de mcinterp (la referencia): división y módulo
+enteros de C, y nada que falle en ejecución se pliega (división por
+cero). Tampoco los valores que el backend de C no puede escribir como
+literales (int fuera de 64 bits, inf y nan).
+'''
+import math
+import operator
+
+from analizador_sintactico.mcast import *
+from analizador_semantico.mctypesys import INT, FLOAT, BOOL, binary_type, unary_type
+from .mcruntime  import idiv, imod
+
+_binops = {
+    '+' : operator.add,
+    '-' : operator.sub,
+    '*' : operator.mul,
+    '<' : operator.lt,
+    '<=': operator.le,
+    '>' : operator.gt,
+    '>=': operator.ge,
+    '==': operator.eq,
+    '!=': operator.ne,
+    '&&': lambda a, b: a and b,
+    '||': lambda a, b: a or b,
+}
+
+_unops = {
+    '+': lambda a: a,
+    '-': operator.neg,
+    '!': operator.not_,
+}
+
+_coerce = {
+    'int'  : int,
+    'float': float,
+    'bool' : bool,
+}
+
+# Negación de las comparaciones enteras: !(a < b) es a >= b
+_negated = {'<': '>=', '<=': '>', '>': '<=', '>=': '<', '==': '!=', '!=': '=='}
+
+_int_range = (-2**63 + 1, 2**63 - 1)
+
+
+def fold(n: Program) -> Program:
+    return rewrite(n, _simplify)
+
+
+def _simplify(n: Node):
+    rule = _rules.get(n.__class__)
+    return rule(n) if rule else None
+
+
+def _const(value, type_name, n: Node):
+    return ConstExpr(value, type=type_name, span=n.span)
+
+
+def _is_const(n):
+    return isinstance(n, ConstExpr) and not isinstance(n.value, str)
+
+
+def _representable(value):
+    if isinstance(value, bool):
+        return True
+    if isinstance(value, int):
+        return _int_range[0] <= value <= _int_range[1]
+    return math.isfinite(value)
+
+
+def _pure(n: Node):
+    '''
+    True si evaluar n no tiene efectos y no puede fallar
+    '''
+    for c in preorder(n):
+        if isinstance(c, BinaryOpExpr):
+            if c.opr in ('/', '%'):
+                return False
+        elif not isinstance(c, (ConstExpr, VarExpr, UnaryOpExpr, IntToFloatExpr)):
+            return False
+    return True
+
+
+def _evaluate(opr, left, right, type_name):
+    if opr == '/':
+        if right == 0:
+            return None
+        return idiv(left, right) if type_name == 'int' else left / right
+    if opr == '%':
+        return None if right == 0 else imod(left, right)
+    return _binops[opr](left, right)
+
+
+def _binary(n: BinaryOpExpr):
+    left, right, opr = n.left, n.right, n.opr
+    if _is_const(left) and _is_const(right):
+        type_name = binary_type(opr, left.type, right.type)
+        if type_name is not None:
+            value = _evaluate(opr, left.value, right.value, type_name)
+            if value is not None and _representable(value):
+                return _const(_coerce[type_name](value), type_name, n)
+        return None
+
+    # Identidades: solo si el operando que queda ya tiene el tipo del resultado
+    if opr in ('&&', '||'):
+        return _logical(n)
+    if _is_const(right):
+        if right.value == 0 and opr in ('+', '-') and left.type == n.type:
+            # Con float solo x - 0.0 y x + (-0.0): -0.0 + 0.0 y
+            # -0.0 - (-0.0) son 0.0
+            if n.type == 'int' or (math.copysign(1.0, right.value) > 0) == (opr == '-'):
+                return left
+        if right.value == 1 and opr in ('*', '/') and left.type == n.type:
+            return left
+    if _is_const(left) and left.value == 1 and opr == '*' and right.type == n.type:
+        return right
+    if _is_const(left) and left.value == 0 and opr == '+' and n.type == 'int' and right.type == 'int':
+        return right
+    if opr == '*' and n.type == 'int':
+        # x * 0 = 0 solo con enteros (con float, inf * 0 es nan)
+        for zero, other in ((right, left), (left, right)):
+            if _is_const(zero) and zero.value == 0 and _pure(other):
+                return _const(0, INT, n)
+    return None
+
+
+def _logical(n: BinaryOpExpr):
+    left, right = n.left, n.right
+    absorbing = n.opr == '||'           # true || b es true; false && b es false
+    if _is_const(left):
+        return left if left.value == absorbing else right
+    if _is_const(right):
+        if right.value != absorbing:
+            return left                 # b && true, b || false
+        if _pure(left):
+            return right                # b && false, b || true
+    return None
+
+
+def _unary(n: UnaryOpExpr):
+    expr, opr = n.expr, n.opr
+    if _is_const(expr):
+        type_name = unary_type(opr, expr.type)
+        if type_name is not None:
+            value = _unops[opr](expr.value)
+            if _representable(value):
+                return _const(_coerce[type_name](value), type_name, n)
+        return None
+    if opr == '+':
+        return expr
+    if isinstance(expr, UnaryOpExpr) and expr.opr == opr and opr in ('-', '!'):
+        return expr.expr
+    if opr == '!' and isinstance(expr, BinaryOpExpr) and expr.opr in _negated \
+            and expr.left.type == expr.right.type == 'int':
+        # Con float no: !(x < y) es true si alguno es nan
+        return BinaryOpExpr(_negated[expr.opr], expr.left, expr.right, type=BOOL, span=n.span)
+    return None
+
+
+def _int_to_float(n: IntToFloatExpr):
+    if _is_const(n.expr):
+        return _const(float(n.expr.value), FLOAT, n)
+    return None
+
+
+def _if(n: IfStmt):
+    if _is_const(n.condition):
+        if n.condition.value:
+            return n.then_stmt
+        return n.else_stmt or NullStmt(span=n.span)
+    return None
+
+
+def _while(n: WhileStmt):
+    if _is_const(n.condition) and not n.condition.value:
+        return NullStmt(span=n.span)
+    return None
+
+
+_rules = {
+    BinaryOpExpr  : _binary,
+    UnaryOpExpr   : _unary,
+    IntToFloatExpr: _int_to_float,
+    IfStmt        : _if,
+    WhileStmt     : _while,
+}
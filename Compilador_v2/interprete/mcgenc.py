@@ -0,0 +1,553 @@
+# mcgenc.py
+'''
+Generación de C
+---------------
+
+Traduce un Program verificado a C99 portable y lo compila con el
+compilador de C del sistema (cc, gcc o clang, o el indicado en la
+variable de entorno CC) para obtener un ejecutable nativo o una
+biblioteca compartida.
+
+Tipos:
+
+  int    -> long long       (64 bits; printf agrega 'll' a %d, %x, ...)
+  float  -> double
+  bool   -> bool            (<stdbool.h>)
+  T[]    -> mc_T_array *    (tamaño + elementos, con verificación de rango)
+
+Los nombres se prefijan (g_ globales, l_ locales, f_ funciones) para
+no chocar con palabras reservadas ni con la biblioteca de C. Una local
+que oculta a un parámetro u otra local se renombra (l_x_1), como en
+mcpycode: en C los parámetros y el bloque de la función comparten el
+alcance. printf usa
+el printf de libc: los argumentos se convierten al tipo que espera cada
+conversión del formato, igual que hace el operador % de Python en los
+otros backends (por ejemplo %f con un int). scanf e iread leen un
+entero con scanf("%d").
+
+Los errores de ejecución (índices, división por cero, arreglos sin
+inicializar) escriben el mensaje en stderr y terminan con código 1.
+
+Los int de los otros backends son enteros de Python sin límite (solo
+un int[] exige que el valor quepa en 64 bits). Aquí un resultado que no
+cabe en 64 bits da la vuelta (se compila con -fwrapv) en lugar de
+seguir creciendo: es la única diferencia en la aritmética entera.
+'''
+import math
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from analizador_sintactico.mcast import *
+from analizador_semantico.mchecker import SymbolTable
+from .mcruntime  import RunError
+
+# Valor de retorno de una función que termina sin return
+_zeros = {
+    'int'  : '0',
+    'float': '0.0',
+    'bool' : 'false',
+}
+
+_ctypes = {
+    'int'  : 'long long',
+    'float': 'double',
+    'bool' : 'bool',
+    'void' : 'void',
+}
+
+_prelude = r'''#include <math.h>
+#include <stdbool.h>
+#include <stdio.h>
+#include <stdlib.h>
+
+static void mc_error(const char *msg, long value, int has_value)
+{
+    fflush(stdout);
+    if (has_value)
+        fprintf(stderr, msg, value);
+    else
+        fputs(msg, stderr);
+    fputc('\n', stderr);
+    exit(1);
+}
+
+#define MC_ARRAY(T, NAME)                                                  \
+    typedef struct { long size; T data[]; } mc_##NAME##_array;             \
+                                                                           \
+    static mc_##NAME##_array *mc_new_##NAME(long size)                     \
+    {                                                                      \
+        mc_##NAME##_array *a;                                              \
+        if (size < 0)                                                      \
+            mc_error("Tamaño de arreglo negativo: %ld", size, 1);          \
+        a = calloc(1, sizeof(*a) + (size_t) size * sizeof(T));             \
+        if (!a)                                                            \
+            mc_error("Memoria insuficiente", 0, 0);                        \
+        a->size = size;                                                    \
+        return a;                                                          \
+    }                                                                      \
+                                                                           \
+    static T *mc_##NAME##_at(mc_##NAME##_array *a, long i)                 \
+    {                                                                      \
+        if (!a)                                                            \
+            mc_error("Arreglo no inicializado", 0, 0);                     \
+        if (i < 0 || i >= a->size)                                         \
+            mc_error("Índice %ld fuera de rango", i, 1);                   \
+        return &a->data[i];                                                \
+    }                                                                      \
+                                                                           \
+    static long long mc_##NAME##_size(mc_##NAME##_array *a)                \
+    {                                                                      \
+        if (!a)                                                            \
+            mc_error("Arreglo no inicializado", 0, 0);                     \
+        return a->size;                                                    \
+    }
+
+MC_ARRAY(long long, int)
+MC_ARRAY(double, float)
+MC_ARRAY(bool, bool)
+
+static long long mc_idiv(long long a, long long b)
+{
+    if (b == 0)
+        mc_error("División entera por cero", 0, 0);
+    return a / b;
+}
+
+static long long mc_imod(long long a, long long b)
+{
+    if (b == 0)
+        mc_error("División entera por cero", 0, 0);
+    return a % b;
+}
+
+static double mc_fdiv(double a, double b)
+{
+    if (b == 0.0)
+        mc_error("División por cero", 0, 0);
+    return a / b;
+}
+
+static long long mc_iread(void)
+{
+    long long value;
+    fflush(stdout);
+    if (scanf("%lld", &value) != 1)
+        mc_error("iread: se esperaba un entero", 0, 0);
+    return value;
+}
+'''
+
+# Conversión de printf -> tipo al que se convierte su argumento
+_conversion = re.compile(r'%[-+ #0]*(?:\*|\d+)?(?:\.(?:\*|\d+))?([a-zA-Z%])')
+_casts = (dict.fromkeys('di', 'long long') | dict.fromkeys('c', 'int') |
+          dict.fromkeys('ouxX', 'unsigned long long') | dict.fromkeys('eEfFgG', 'double'))
+
+
+def _format_casts(fmt):
+    '''
+    Retorna (formato de C, tipo de cada argumento): las conversiones
+    enteras llevan 'll' porque los int son long long
+    '''
+    casts = []
+    def convert(m):
+        conv = m.group(1)
+        if conv == '%':
+            return m.group(0)
+        if conv not in _casts:
+            raise RunError(f"printf: conversión '%{conv}' no soportada en C")
+        casts.append(_casts[conv])
+        return m.group(0)[:-1] + 'll' + conv if _casts[conv].endswith('long long') else m.group(0)
+    return _conversion.sub(convert, fmt), casts
+
+
+def c_string(text: str):
+    '''
+    Literal de C con el texto en UTF-8
+    '''
+    out = ['"']
+    for byte in text.encode('utf-8'):
+        ch = chr(byte)
+        if ch in '"\\':
+            out.append('\\' + ch)
+        elif ch == '\n':
+            out.append('\\n')
+        elif ch == '\t':
+            out.append('\\t')
+        elif 32 <= byte < 127 and ch != '?':
+            out.append(ch)
+        else:
+            out.append(f'\\{byte:03o}')
+    out.append('"')
+    return ''.join(out)
+
+
+def _c_type(type_spec, is_array=False):
+    if is_array:
+        return f'mc_{type_spec}_array *'
+    return _ctypes[type_spec] + ' '
+
+
+def _value_type(type_name):
+    # Tipo de C de una expresión según el checker ('int', 'array<float>', ...)
+    if type_name.startswith('array<'):
+        return _c_type(type_name[6:-1], True)
+    return _c_type(type_name)
+
+
+def _sequence(prefix, expr):
+    return f'({", ".join(prefix)}, {expr})' if prefix else expr
+
+
+class CGenerator(Visitor):
+    '''
+    Genera el código C de un Program verificado. Las expresiones
+    retornan su texto; las sentencias agregan líneas.
+    '''
+
+    @classmethod
+    def generate(cls, n: Program):
+        gen = cls()
+        n.accept(gen)
+        return '\n'.join(gen.lines) + '\n'
+
+    def __init__(self):
+        self.lines  = [_prelude]
+        self.indent = ''
+        self.scope  = SymbolTable()
+        self.main   = None      # FuncDeclStmt de main
+        self.temps  = []        # declaraciones de temporales de la función actual
+        self.locals = None      # nombres de C usados en la función actual
+        self.effects = 0        # expresiones con efectos generadas hasta ahora
+
+    def emit(self, line):
+        self.lines.append(self.indent + line)
+
+    def temp(self, type_name):
+        name = f't{len(self.temps) + 1}'
+        self.temps.append(f'{_value_type(type_name)}{name};')
+        return name
+
+    def operands(self, nodes):
+        '''
+        Genera los operandos en orden y retorna (prefijo, textos). C no
+        fija el orden de evaluación de los argumentos ni de los operandos
+        de un operador; si un operando tiene efectos (asignaciones o
+        llamadas), los anteriores se guardan antes en temporales, de
+        izquierda a derecha como en los otros backends: (t1 = a, t1 + f()).
+        Si después del último operando con efectos hay otros, ese también
+        se guarda, porque los siguientes pueden leer lo que asigna:
+        (t1 = (x = 1), t1 + x).
+        '''
+        texts, last = [], -1
+        for i, node in enumerate(nodes):
+            before = self.effects
+            texts.append((yield node))
+            if self.effects != before:
+                last = i
+
+        # Se guardan los operandos hasta el último con efectos, incluido
+        # si no es el último operando
+        spilled = last + 1 if last < len(nodes) - 1 else last
+
+        prefix = []
+        for i, node in enumerate(nodes[:spilled]):
+            if not isinstance(node, ConstExpr) and node.type not in (None, 'void'):
+                t = self.temp(node.type)
+                prefix.append(f'{t} = {texts[i]}')
+                texts[i] = t
+        return prefix, texts
+
+    def name(self, ident):
+        return self.scope.lookup_symbol(ident)[0]
+
+    def add_local(self, ident, elem):
+        # Un bloque anidado puede declarar otra vez el mismo nombre
+        name = f'l_{ident}'
+        count = 0
+        while name in self.locals:
+            count += 1
+            name = f'l_{ident}_{count}'
+        self.locals.add(name)
+        self.scope.add_symbol(ident, (name, elem), 'local')
+        return name
+
+    def array_type(self, ident):
+        return self.scope.lookup_symbol(ident)[1]
+
+    def array_var(self, ident):
+        # Lectura del arreglo como operando, para ordenarla con operands()
+        return VarExpr(ident, type=f'array<{self.array_type(ident)}>')
+
+    # -----------------------------------------------------------------
+    # Declaraciones
+    # -----------------------------------------------------------------
+    def visit(self, n: Program):
+        # Prototipos de todas las funciones
+        for decl in n.decls:
+            if isinstance(decl, FuncDeclStmt):
+                self.emit(self.signature(decl) + ';')
+        self.emit('')
+
+        for decl in n.decls:
+            yield decl
+
+        if self.main is not None:
+            self.emit('int main(void)')
+            self.emit('{')
+            if self.main.return_type == 'int':
+                self.emit('    return f_main();')
+            else:
+                self.emit('    f_main();')
+                self.emit('    return 0;')
+            self.emit('}')
+
+    def signature(self, n: FuncDeclStmt):
+        # Los parámetros no se repiten entre sí, así que no se renombran
+        params = ', '.join(f'{_c_type(p.type_spec, p.is_array)}l_{p.ident}' for p in n.params)
+        return f'static {_c_type(n.return_type)}f_{n.name}({params or "void"})'
+
+    def visit(self, n: VarDeclStmt):
+        elem = n.type_spec if n.is_array else None
+        if not self.scope.scopes:
+            name = f'g_{n.ident}'
+            self.scope.add_symbol(n.ident, (name, elem))
+            self.emit(f'static {_c_type(n.type_spec, n.is_array)}{name};')
+        else:
+            name = self.add_local(n.ident, elem)
+            self.emit(f'{_c_type(n.type_spec, n.is_array)}{name} = {"NULL" if n.is_array else "0"};')
+
+    def visit(self, n: FuncDeclStmt):
+        self.scope.add_symbol(n.name, (f'f_{n.name}', None))
+        if n.name == 'main':
+            self.main = n
+
+        self.scope.enter_scope()
+        self.locals = set()
+        for p in n.params:
+            self.add_local(p.ident, p.type_spec if p.is_array else None)
+        self.emit('')
+        self.emit(self.signature(n))
+        start = len(self.lines) + 1         # primera línea después de '{'
+        self.temps = []
+        yield n.body
+        if n.return_type != 'void':
+            # Retorno implícito al final de la función, como en los otros backends
+            self.lines.insert(len(self.lines) - 1, f'    return {_zeros[n.return_type]};')
+        self.lines[start:start] = ['    ' + decl for decl in self.temps]
+        self.locals = None
+        self.scope.exit_scope()
+
+    # -----------------------------------------------------------------
+    # Sentencias
+    # -----------------------------------------------------------------
+    def visit(self, n: CompoundStmt):
+        self.emit('{')
+        outer = self.indent
+        self.indent += '    '
+        self.scope.enter_scope()
+        for decl in n.local_decls:
+            yield decl
+        for stmt in n.stmt_list:
+            yield stmt
+        self.scope.exit_scope()
+        self.indent = outer
+        self.emit('}')
+
+    def block(self, n: Statement):
+        # Cuerpo de if/else/while indentado un nivel (los bloques { } van al mismo nivel)
+        if isinstance(n, CompoundStmt):
+            yield n
+            return
+        self.indent += '    '
+        yield n
+        self.indent = self.indent[:-4]
+
+    def visit(self, n: ExprStmt):
+        self.emit(f'{(yield n.expr)};')
+
+    def visit(self, n: NullStmt):
+        self.emit(';')
+
+    def visit(self, n: IfStmt):
+        self.emit(f'if ({(yield n.condition)})')
+        yield from self.block(n.then_stmt)
+        if n.else_stmt:
+            self.emit('else')
+            yield from self.block(n.else_stmt)
+
+    def visit(self, n: WhileStmt):
+        self.emit(f'while ({(yield n.condition)})')
+        yield from self.block(n.body)
+
+    def visit(self, n: BreakStmt):
+        self.emit('break;')
+
+    def visit(self, n: ContinueStmt):
+        self.emit('continue;')
+
+    def visit(self, n: ReturnStmt):
+        if n.expr:
+            self.emit(f'return {(yield n.expr)};')
+        else:
+            self.emit('return;')
+
+    # -----------------------------------------------------------------
+    # Expresiones
+    # -----------------------------------------------------------------
+    def visit(self, n: ConstExpr):
+        value = n.value
+        if isinstance(value, bool):
+            return 'true' if value else 'false'
+        if isinstance(value, str):
+            return c_string(value)
+        if isinstance(value, float) and not math.isfinite(value):
+            # 1e400 es un literal válido que no cabe en un double; C no
+            # tiene literales para inf ni nan
+            if math.isnan(value):
+                return 'NAN'
+            return 'HUGE_VAL' if value > 0 else '(-HUGE_VAL)'
+        # Las constantes negativas vienen del plegado (mcfold): entre
+        # paréntesis para que -(-1) no se escriba --1
+        text = repr(value)
+        return f'({text})' if text[0] == '-' else text
+
+    def visit(self, n: VarExpr):
+        return self.name(n.ident)
+
+    def visit(self, n: VarAssignmentExpr):
+        value = yield n.expr
+        self.effects += 1
+        return f'({self.name(n.ident)} = {value})'
+
+    def visit(self, n: ArrayLookupExpr):
+        # Como en mcinterp: el arreglo se lee antes que el índice
+        prefix, (arr, index) = yield from self.operands([self.array_var(n.ident), n.index])
+        return _sequence(prefix, f'(*mc_{self.array_type(n.ident)}_at({arr}, {index}))')
+
+    def visit(self, n: ArrayAssignmentExpr):
+        # y después del índice y del valor al asignar
+        prefix, (index, value, arr) = yield from self.operands([n.index, n.expr, self.array_var(n.ident)])
+        self.effects += 1
+        return _sequence(prefix, f'(*mc_{self.array_type(n.ident)}_at({arr}, {index}) = {value})')
+
+    def visit(self, n: ArraySizeExpr):
+        return f'mc_{self.array_type(n.ident)}_size({self.name(n.ident)})'
+
+    def visit(self, n: NewArrayExpr):
+        return f'mc_new_{n._type}({(yield n.expr)})'
+
+    def visit(self, n: IntToFloatExpr):
+        return f'((double) {(yield n.expr)})'
+
+    def visit(self, n: UnaryOpExpr):
+        expr = yield n.expr
+        return f'({n.opr}{expr})'
+
+    def visit(self, n: BinaryOpExpr):
+        if n.opr in ('&&', '||'):
+            # Ya tienen un punto de secuencia entre los operandos
+            left = yield n.left
+            right = yield n.right
+            return f'({left} {n.opr} {right})'
+
+        prefix, (left, right) = yield from self.operands([n.left, n.right])
+        if n.opr == '/':
+            expr = f'mc_{"idiv" if n.type == "int" else "fdiv"}({left}, {right})'
+        elif n.opr == '%':
+            expr = f'mc_imod({left}, {right})'
+        else:
+            expr = f'({left} {n.opr} {right})'
+        return _sequence(prefix, expr)
+
+    def visit(self, n: CallExpr):
+        prefix, args = yield from self.operands(n.args)
+        self.effects += 1
+        return _sequence(prefix, self.call(n, args))
+
+    def call(self, n: CallExpr, args):
+        if n.ident == 'printf':
+            fmt = n.args[0]
+            if not isinstance(fmt, ConstExpr) or not isinstance(fmt.value, str):
+                raise RunError("printf: el formato debe ser una cadena constante")
+            text, casts = _format_casts(fmt.value)
+            if len(casts) != len(args) - 1:
+                raise RunError("printf: el número de argumentos no coincide con el formato")
+            args[0] = c_string(text)
+            args[1:] = [f'({cast}) {arg}' for cast, arg in zip(casts, args[1:])]
+            return f'printf({", ".join(args)})'
+        if n.ident == 'iread':
+            return 'mc_iread()'
+        if n.ident == 'scanf':
+            return f'({args[0]} = mc_iread())'
+        return f'{self.name(n.ident)}({", ".join(args)})'
+
+
+# =====================================================================
+# Compilación con el compilador de C del sistema
+# =====================================================================
+def find_compiler():
+    '''
+    Ruta del compilador de C: $CC, cc, gcc o clang (None si no hay)
+    '''
+    for name in (os.environ.get('CC'), 'cc', 'gcc', 'clang'):
+        if name:
+            path = shutil.which(name)
+            if path:
+                return path
+    return None
+
+
+def build(source: str, out: str, shared=False, cflags=('-O2', '-fwrapv')):
+    '''
+    Compila el código C en 'out': un ejecutable o, con shared=True, una
+    biblioteca compartida.
+    '''
+    cc = find_compiler()
+    if cc is None:
+        raise RunError("No se encontró un compilador de C (cc, gcc o clang)")
+    with tempfile.TemporaryDirectory() as tmp:
+        cfile = os.path.join(tmp, 'program.c')
+        with open(cfile, 'w', encoding='utf-8') as f:
+            f.write(source)
+        cmd = [cc, '-std=c99', *cflags]
+        if shared:
+            cmd += ['-shared', '-fPIC']
+        proc = subprocess.run(cmd + ['-o', out, cfile], capture_output=True, text=True)
+    if proc.returncode:
+        raise RunError(f"El compilador de C falló:\n{proc.stderr}")
+
+
+class Native:
+    '''
+    Programa compilado a un ejecutable temporal.
+    '''
+    def __init__(self, source: str, returns_int: bool):
+        self.source = source
+        self.returns_int = returns_int
+
+    @classmethod
+    def compile(cls, n: Program):
+        main = next((d for d in n.decls if isinstance(d, FuncDeclStmt) and d.name == 'main'), None)
+        if main is None:
+            raise RunError("El programa no tiene función 'main'")
+        return cls(CGenerator.generate(n), main.return_type == 'int')
+
+    def run(self):
+        '''
+        Compila y ejecuta. La salida del programa se copia a sys.stdout y
+        la entrada estándar se hereda. Retorna el código de salida si
+        main es int (el sistema operativo solo conserva los 8 bits bajos).
+        '''
+        with tempfile.TemporaryDirectory() as tmp:
+            exe = os.path.join(tmp, 'program')
+            build(self.source, exe)
+            sys.stdout.flush()
+            proc = subprocess.run([exe], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        sys.stdout.write(proc.stdout.decode('utf-8', 'replace'))
+        if proc.returncode and proc.stderr:
+            raise RunError(proc.stderr.decode('utf-8', 'replace').strip())
+        return proc.returncode if self.returns_int else None
@@ -0,0 +1,333 @@
+# mcinterp.py
+'''
+Intérprete del AST
+------------------
+
+Ejecuta directamente el árbol verificado por el Checker. Es la
+implementación de referencia con la que se comparan los otros
+backends, así que prefiere la claridad a la velocidad, pero tampoco
+busca nombres en tiempo de ejecución:
+
+1. Resolver recorre el programa una vez y anota cada uso de una
+   variable (VarExpr, VarAssignmentExpr, ArrayLookupExpr,
+   ArrayAssignmentExpr, ArraySizeExpr) con (depth, slot) y cada
+   llamada con el índice de la función.
+
+2. En una llamada el entorno es una lista de marcos:
+
+     env[0]   variables globales (compartido por todas las llamadas)
+     env[1]   parámetros
+     env[k]   locales del bloque de profundidad k
+
+   de modo que leer una variable es env[n.depth][n.slot].
+
+Las sentencias retornan None para continuar o uno de BREAK, CONTINUE,
+RETURN; el valor de return queda en Interpreter.retval. Así el control
+de flujo no usa excepciones de Python.
+'''
+import operator
+import sys
+
+from analizador_sintactico.mcast import *
+from analizador_semantico.mchecker import SymbolTable
+from .mcruntime  import (RunError, zero_values, idiv, imod, new_array, printf, iread,
+                         check_array, aload, astore)
+
+# Resultado de ejecutar una sentencia (None = siguiente sentencia)
+BREAK, CONTINUE, RETURN = 'break', 'continue', 'return'
+
+
+def _zero(decl):
+    return None if decl.is_array else zero_values[decl.type_spec]
+
+
+class Resolver(Visitor):
+    '''
+    Anota (depth, slot) en cada referencia a una variable y reúne las
+    funciones y variables globales del programa.
+    '''
+
+    @classmethod
+    def resolve(cls, n: Program):
+        resolver = cls()
+        n.accept(resolver)
+        return resolver
+
+    def __init__(self):
+        self.scope     = SymbolTable()
+        self.functions = []     # FuncDeclStmt, en orden de declaración
+        self.globals   = []     # valor inicial de cada global
+        self.gnames    = []     # nombre de cada global
+        self.main      = None   # índice de main en functions
+        self.depth     = 0      # profundidad del marco actual
+        self.frames    = []     # marcos abiertos en la función actual
+
+    def bind(self, n):
+        n.depth, n.slot = self.scope.lookup_symbol(n.ident)
+
+    def visit(self, n: Program):
+        for decl in n.decls:
+            yield decl
+
+    def visit(self, n: VarDeclStmt):
+        if not self.frames:
+            self.scope.add_symbol(n.ident, (0, len(self.globals)))
+            self.globals.append(_zero(n))
+            self.gnames.append(n.ident)
+        else:
+            frame = self.frames[-1]
+            self.scope.add_symbol(n.ident, (self.depth, len(frame)), 'local')
+            frame.append(_zero(n))
+
+    def visit(self, n: FuncDeclStmt):
+        self.scope.add_symbol(n.name, len(self.functions))
+        if n.name == 'main':
+            self.main = len(self.functions)
+        self.functions.append(n)
+
+        self.scope.enter_scope()
+        self.depth = 1
+        self.frames.append([])
+        for p in n.params:
+            self.scope.add_symbol(p.ident, (1, len(self.frames[-1])), 'local')
+            self.frames[-1].append(None)
+        yield n.body
+        self.frames.pop()
+        self.scope.exit_scope()
+
+    def visit(self, n: CompoundStmt):
+        self.scope.enter_scope()
+        self.depth += 1
+        n.depth = self.depth
+        n.frame = [ ]
+        self.frames.append(n.frame)
+        for decl in n.local_decls:
+            yield decl
+        for stmt in n.stmt_list:
+            yield stmt
+        self.frames.pop()
+        self.depth -= 1
+        self.scope.exit_scope()
+
+    def visit(self, n: Union[VarExpr, ArraySizeExpr]):
+        self.bind(n)
+
+    def visit(self, n: VarAssignmentExpr):
+        self.bind(n)
+        yield n.expr
+
+    def visit(self, n: Union[UnaryOpExpr, NewArrayExpr, IntToFloatExpr, ExprStmt]):
+        yield n.expr
+
+    def visit(self, n: ArrayLookupExpr):
+        self.bind(n)
+        yield n.index
+
+    def visit(self, n: ArrayAssignmentExpr):
+        self.bind(n)
+        yield n.index
+        yield n.expr
+
+    def visit(self, n: BinaryOpExpr):
+        yield n.left
+        yield n.right
+
+    def visit(self, n: CallExpr):
+        n.slot = self.scope.lookup_symbol(n.ident)
+        for arg in n.args:
+            yield arg
+
+    def visit(self, n: IfStmt):
+        yield n.condition
+        yield n.then_stmt
+        if n.else_stmt:
+            yield n.else_stmt
+
+    def visit(self, n: WhileStmt):
+        yield n.condition
+        yield n.body
+
+    def visit(self, n: ReturnStmt):
+        if n.expr:
+            yield n.expr
+
+    def visit(self, n: Union[NullStmt, BreakStmt, ContinueStmt, ConstExpr]):
+        pass
+
+
+class Interpreter(Visitor):
+    '''
+    Ejecuta un Program verificado. Con keep_globals=True los valores de
+    las variables globales se conservan (por nombre) entre una ejecución
+    y la siguiente, como en el REPL de mcc.
+    '''
+
+    recursion_limit = 200_000
+
+    def __init__(self, keep_globals=False):
+        self.keep_globals = keep_globals
+        self.session   = { }    # nombre -> valor de las globales de la ejecución anterior
+        self.functions = []
+        self.globals   = []
+        self.retval    = None
+
+    def run(self, n: Program):
+        program = Resolver.resolve(n)
+        if program.main is None:
+            raise RunError("El programa no tiene función 'main'")
+        self.functions = program.functions
+        self.globals = list(program.globals)
+        if self.keep_globals:
+            for i, name in enumerate(program.gnames):
+                if name in self.session:
+                    self.globals[i] = self.session[name]
+        # Cada llamada de Mini-C usa varios marcos de Python
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(max(limit, self.recursion_limit))
+        try:
+            return self.call(self.functions[program.main], [])
+        except RecursionError:
+            raise RunError("Recursión demasiado profunda")
+        finally:
+            sys.setrecursionlimit(limit)
+            if self.keep_globals:
+                self.session.update(zip(program.gnames, self.globals))
+
+    def eval(self, n: Node, env):
+        # Como n.accept(self, env), pero con un número fijo de argumentos:
+        # CPython ejecuta la llamada sin recursión en C, así que la
+        # profundidad solo está limitada por sys.getrecursionlimit()
+        return self._visit_table[n.__class__](self, n, env)
+
+    def call(self, func: FuncDeclStmt, args):
+        if self.eval(func.body, [self.globals, args]) is RETURN:
+            return self.retval
+        return zero_values.get(func.return_type)
+
+    # -----------------------------------------------------------------
+    # Sentencias
+    # -----------------------------------------------------------------
+    def visit(self, n: CompoundStmt, env):
+        env.append(n.frame[:])
+        status = None
+        for stmt in n.stmt_list:
+            status = self.eval(stmt, env)
+            if status is not None:
+                break
+        env.pop()
+        return status
+
+    def visit(self, n: ExprStmt, env):
+        self.eval(n.expr, env)
+
+    def visit(self, n: NullStmt, env):
+        pass
+
+    def visit(self, n: IfStmt, env):
+        if self.eval(n.condition, env):
+            return self.eval(n.then_stmt, env)
+        if n.else_stmt:
+            return self.eval(n.else_stmt, env)
+
+    def visit(self, n: WhileStmt, env):
+        condition, body = n.condition, n.body
+        while self.eval(condition, env):
+            status = self.eval(body, env)
+            if status is BREAK:
+                break
+            if status is RETURN:
+                return status
+
+    def visit(self, n: BreakStmt, env):
+        return BREAK
+
+    def visit(self, n: ContinueStmt, env):
+        return CONTINUE
+
+    def visit(self, n: ReturnStmt, env):
+        self.retval = self.eval(n.expr, env) if n.expr else None
+        return RETURN
+
+    # -----------------------------------------------------------------
+    # Expresiones
+    # -----------------------------------------------------------------
+    def visit(self, n: ConstExpr, env):
+        return n.value
+
+    def visit(self, n: VarExpr, env):
+        return env[n.depth][n.slot]
+
+    def visit(self, n: VarAssignmentExpr, env):
+        value = env[n.depth][n.slot] = self.eval(n.expr, env)
+        return value
+
+    def visit(self, n: ArrayLookupExpr, env):
+        return aload(env[n.depth][n.slot], self.eval(n.index, env))
+
+    def visit(self, n: ArrayAssignmentExpr, env):
+        index = self.eval(n.index, env)
+        value = self.eval(n.expr, env)
+        astore(env[n.depth][n.slot], index, value)
+        return value
+
+    def visit(self, n: ArraySizeExpr, env):
+        return len(check_array(env[n.depth][n.slot]))
+
+    def visit(self, n: NewArrayExpr, env):
+        return new_array(n._type, self.eval(n.expr, env))
+
+    def visit(self, n: IntToFloatExpr, env):
+        return float(self.eval(n.expr, env))
+
+    def visit(self, n: BinaryOpExpr, env):
+        opr = n.opr
+        left = self.eval(n.left, env)
+        # Evaluación en corto circuito
+        if opr == '&&':
+            return left and self.eval(n.right, env)
+        if opr == '||':
+            return left or self.eval(n.right, env)
+        right = self.eval(n.right, env)
+        if opr == '/':
+            if n.type == 'int':
+                return idiv(left, right)
+            try:
+                return left / right
+            except ZeroDivisionError:
+                raise RunError("División por cero")
+        return _binops[opr](left, right)
+
+    def visit(self, n: UnaryOpExpr, env):
+        value = self.eval(n.expr, env)
+        if n.opr == '-':
+            return -value
+        if n.opr == '!':
+            return not value
+        return value
+
+    def visit(self, n: CallExpr, env):
+        ident = n.ident
+        if ident == 'printf':
+            printf(*[self.eval(arg, env) for arg in n.args])
+        elif ident == 'iread':
+            return iread()
+        elif ident == 'scanf':
+            var = n.args[0]
+            env[var.depth][var.slot] = iread()
+        else:
+            args = [self.eval(arg, env) for arg in n.args]
+            return self.call(self.functions[n.slot], args)
+
+
+_binops = {
+    '+' : operator.add,
+    '-' : operator.sub,
+    '*' : operator.mul,
+    '%' : imod,
+    '<' : operator.lt,
+    '<=': operator.le,
+    '>' : operator.gt,
+    '>=': operator.ge,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
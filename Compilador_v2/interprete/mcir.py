@@ -0,0 +1,720 @@
+# mcir.py
+'''
+Representación Intermedia
+-------------------------
+
+Código de tres direcciones tipado, organizado en bloques básicos con
+las aristas del grafo de flujo de control (CFG) explícitas. Es la etapa
+común de las optimizaciones (mcopt) y de los backends que la usen.
+
+Cada instrucción ocupa cuatro enteros (op, x, y, z) seguidos en el
+array('i') de su bloque. La firma del opcode (ver opcodes) dice qué es
+cada uno de los campos x, y, z:
+
+  d   registro que la instrucción define
+  r   registro que la instrucción usa
+  k   índice en el pool de constantes de la función
+  g   índice de una variable global
+  f   índice de una función
+  n   número de argumentos (las instrucciones PARAM anteriores)
+  t   tipo de elemento de un arreglo (índice en array_types)
+  b   índice de un bloque
+
+Todos los operandos son registros virtuales; las constantes se cargan
+con CONST. Los parámetros ocupan los primeros registros y cada variable
+local tiene su propio registro (se reasigna con MOV o CONST). Las
+globales y los elementos de los arreglos están en memoria (LOADG/STOREG,
+ALOAD/ASTORE) porque una llamada puede modificarlos.
+
+Cada bloque termina en JUMP, BRANCH o RET y son las únicas instrucciones
+que cambian el flujo; Block.succs y Block.preds son las aristas del CFG
+(ver build_cfg). Los bloques inalcanzables se eliminan.
+
+En forma SSA (ver mcopt) cada bloque tiene además sus funciones phi en
+Block.phis: [registro, argumentos], con un argumento por predecesor en
+el orden de Block.preds (-1 si el valor no está definido en ese camino).
+
+La traducción (Lowering) recorre el AST una sola vez y cada nodo emite
+un número acotado de instrucciones, así que el tiempo y el tamaño de la
+IR son lineales en el tamaño del programa (ver bench/bench_ir.py).
+'''
+from array       import array
+import math
+
+from analizador_sintactico.mcast import *
+from analizador_semantico.mchecker import SymbolTable
+from .mcruntime  import zero_values
+
+# =====================================================================
+# Opcodes
+# =====================================================================
+opcodes = [
+    ('CONST' , 'dk'),       # x = consts[y]
+    ('MOV'   , 'dr'),       # x = y
+
+    ('ADD'   , 'drr'),      # x = y + z
+    ('SUB'   , 'drr'),
+    ('MUL'   , 'drr'),
+    ('DIV'   , 'drr'),      # división de float
+    ('IDIV'  , 'drr'),      # división entera (trunca hacia cero)
+    ('IMOD'  , 'drr'),
+    ('LT'    , 'drr'),
+    ('LE'    , 'drr'),
+    ('GT'    , 'drr'),
+    ('GE'    , 'drr'),
+    ('EQ'    , 'drr'),
+    ('NE'    , 'drr'),
+    ('NEG'   , 'dr'),
+    ('NOT'   , 'dr'),
+    ('I2F'   , 'dr'),       # int -> float
+
+    ('LOADG' , 'dg'),       # x = globals[y]
+    ('STOREG', 'gr'),       # globals[x] = y
+
+    ('NEWARR', 'drt'),      # x = nuevo arreglo de y elementos de tipo z
+    ('ALOAD' , 'drr'),      # x = y[z]
+    ('ASTORE', 'rrr'),      # x[y] = z
+    ('ALEN'  , 'dr'),       # x = tamaño del arreglo y
+
+    ('PARAM' , 'r'),        # argumento de la siguiente CALL o PRINTF
+    ('CALL'  , 'dfn'),      # x = functions[y](z argumentos)
+    ('PRINTF', 'n'),        # printf(x argumentos)
+    ('IREAD' , 'd'),        # x = entero leído de la entrada
+
+    ('JUMP'  , 'b'),        # goto x
+    ('BRANCH', 'rbb'),      # if x goto y else goto z
+    ('RET'   , 'r'),        # return x
+]
+
+opnames    = [name for name, _ in opcodes]
+signatures = [sig for _, sig in opcodes]
+
+for _i, _name in enumerate(opnames):
+    globals()[_name] = _i
+
+terminators = {JUMP, BRANCH, RET}
+
+# Tipos de elemento de NEWARR
+array_types = ['int', 'float', 'bool']
+
+_binops = {
+    '+' : ADD, '-' : SUB, '*' : MUL,
+    '<' : LT, '<=' : LE, '>' : GT, '>=' : GE, '==' : EQ, '!=' : NE,
+}
+
+
+def uses(op, x, y, z):
+    '''
+    Registros que usa la instrucción
+    '''
+    return [v for c, v in zip(signatures[op], (x, y, z)) if c == 'r']
+
+
+def targets(op, x, y, z):
+    '''
+    Bloques destino de un terminador
+    '''
+    return [v for c, v in zip(signatures[op], (x, y, z)) if c == 'b']
+
+
+# =====================================================================
+# Bloques, funciones y módulo
+# =====================================================================
+class Block:
+    __slots__ = ('index', 'code', 'succs', 'preds', 'phis')
+
+    def __init__(self, index):
+        self.index = index
+        self.code  = array('i')     # (op, x, y, z) por instrucción
+        self.succs = []             # índices de los bloques sucesores
+        self.preds = []             # índices de los bloques predecesores
+        self.phis  = []             # [registro, argumentos] en forma SSA
+
+    def __len__(self):
+        return len(self.code) // 4
+
+    def __iter__(self):
+        code = self.code
+        for i in range(0, len(code), 4):
+            yield code[i], code[i + 1], code[i + 2], code[i + 3]
+
+    def emit(self, op, x=0, y=0, z=0):
+        self.code.extend((op, x, y, z))
+
+    @property
+    def terminated(self):
+        return len(self.code) > 0 and self.code[-4] in terminators
+
+    def __repr__(self):
+        return f'<Block B{self.index}: {len(self)} instrucciones>'
+
+
+def const_key(value):
+    '''
+    Clave de una constante en el pool: 1, 1.0 y True son iguales como
+    claves y 0.0 == -0.0, así que se agregan el tipo y el signo
+    '''
+    if isinstance(value, float):
+        return (float, value, math.copysign(1.0, value))
+    return (type(value), value)
+
+
+class Function:
+    def __init__(self, name, nparams, return_type):
+        self.name        = name
+        self.nparams     = nparams
+        self.return_type = return_type
+        self.blocks      = []       # Block; blocks[0] es la entrada
+        self.consts      = []       # pool de constantes
+        self.types       = []       # tipo de cada registro
+        self.names       = []       # nombre de la variable de cada registro ('' = temporal)
+        self.ssa         = False    # True entre mcopt.to_ssa y mcopt.from_ssa
+        self._const_index = { }
+
+    def new_reg(self, type_name, name=''):
+        self.types.append(type_name)
+        self.names.append(name)
+        return len(self.types) - 1
+
+    def const(self, value):
+        key = const_key(value)
+        index = self._const_index.get(key)
+        if index is None:
+            index = self._const_index[key] = len(self.consts)
+            self.consts.append(value)
+        return index
+
+    def new_block(self):
+        block = Block(len(self.blocks))
+        self.blocks.append(block)
+        return block
+
+    def size(self):
+        '''
+        Número de instrucciones de la función (incluidas las phi)
+        '''
+        return sum(len(b.code) // 4 + len(b.phis) for b in self.blocks)
+
+    def __repr__(self):
+        return f'<Function {self.name}/{self.nparams}: {len(self.blocks)} bloques>'
+
+
+class Module:
+    def __init__(self):
+        self.functions = []     # Function, en orden de declaración
+        self.globals   = []     # valor inicial de cada global
+        self.gnames    = []     # nombre de cada global
+        self.gtypes    = []     # tipo de cada global
+        self.main      = None   # índice de main en functions
+
+    def size(self):
+        return sum(f.size() for f in self.functions)
+
+
+def relocate(func: Function, gmap, fmap):
+    '''
+    Copia de func en la que los índices de globales (LOADG, STOREG) y
+    de funciones (CALL) se cambian según gmap y fmap (índice anterior ->
+    nuevo). mcquery la usa para reutilizar una función ya traducida en
+    un módulo donde las declaraciones quedaron en otras posiciones.
+    '''
+    copy = Function(func.name, func.nparams, func.return_type)
+    copy.consts = list(func.consts)
+    copy.types  = list(func.types)
+    copy.names  = list(func.names)
+    copy.ssa    = func.ssa
+    copy._const_index = dict(func._const_index)
+    for block in func.blocks:
+        new = Block(block.index)
+        new.succs = list(block.succs)
+        new.preds = list(block.preds)
+        new.phis  = [[dst, list(args)] for dst, args in block.phis]
+        code = new.code = array('i', block.code)
+        for i in range(0, len(code), 4):
+            op = code[i]
+            if op == LOADG:
+                code[i + 2] = gmap[code[i + 2]]
+            elif op == STOREG:
+                code[i + 1] = gmap[code[i + 1]]
+            elif op == CALL:
+                code[i + 2] = fmap[code[i + 2]]
+        copy.blocks.append(new)
+    return copy
+
+
+def build_cfg(func: Function):
+    '''
+    Elimina los bloques inalcanzables desde la entrada, los ordena en
+    orden posterior inverso (cada bloque antes que sus sucesores, salvo
+    en los ciclos) y recalcula succs y preds a partir de los
+    terminadores. Los argumentos de las phi siguen a su predecesor.
+    '''
+    blocks = func.blocks
+    # Predecesor (el bloque, no su índice) de cada argumento de las phi
+    incoming = { }
+    for block in blocks:
+        if block.phis:
+            incoming[block] = [blocks[p] for p in block.preds]
+    seen = [False] * len(blocks)
+    seen[0] = True
+    postorder = []
+    # Recorrido en profundidad sin recursión: (bloque, sucesores pendientes)
+    stack = [(blocks[0], _pending(blocks[0]))]
+    while stack:
+        block, pending = stack[-1]
+        if pending:
+            t = pending.pop()
+            if not seen[t]:
+                seen[t] = True
+                stack.append((blocks[t], _pending(blocks[t])))
+        else:
+            stack.pop()
+            postorder.append(block)
+
+    live = postorder[::-1]
+    renumber = {block.index: i for i, block in enumerate(live)}
+    for i, block in enumerate(live):
+        block.index = i
+        block.preds = []
+        code = block.code
+        op = code[-4]
+        if op == JUMP:
+            code[-3] = renumber[code[-3]]
+        elif op == BRANCH:
+            code[-2] = renumber[code[-2]]
+            code[-1] = renumber[code[-1]]
+        block.succs = targets(op, code[-3], code[-2], code[-1])
+
+    for block in live:
+        for s in block.succs:
+            live[s].preds.append(block.index)
+    func.blocks = live
+
+    alive = set(map(id, live))
+    for block, old in incoming.items():
+        if id(block) not in alive:
+            continue
+        for phi in block.phis:
+            arg = {id(pred): a for pred, a in zip(old, phi[1])}
+            phi[1] = [arg.get(id(live[p]), -1) for p in block.preds]
+
+
+def _pending(block):
+    # pop() visita primero el último destino, así que en el orden
+    # inverso el 'then' queda antes que el 'else'
+    code = block.code
+    return targets(code[-4], code[-3], code[-2], code[-1])
+
+
+# =====================================================================
+# Texto de la IR
+# =====================================================================
+def reg_name(func: Function, reg):
+    if reg < 0:
+        return 'undef'
+    name = func.names[reg]
+    return f'%{name}' if name else f'%t{reg}'
+
+
+def format_instr(module: Module, func: Function, op, x, y, z):
+    fields = []
+    dst = None
+    for c, v in zip(signatures[op], (x, y, z)):
+        if c == 'd':
+            dst = f'{reg_name(func, v)}:{func.types[v]}'
+        elif c == 'r':
+            fields.append(reg_name(func, v))
+        elif c == 'k':
+            fields.append(repr(func.consts[v]))
+        elif c == 'g':
+            fields.append(f'@{module.gnames[v]}')
+        elif c == 'f':
+            fields.append(module.functions[v].name)
+        elif c == 't':
+            fields.append(array_types[v])
+        elif c == 'b':
+            fields.append(f'B{v}')
+        else:
+            fields.append(str(v))
+    text = f'{opnames[op].lower()} {", ".join(fields)}'.rstrip()
+    return f'{dst} = {text}' if dst else text
+
+
+def dump_function(module: Module, func: Function):
+    params = ', '.join(f'{reg_name(func, r)}:{func.types[r]}' for r in range(func.nparams))
+    lines = [f'function {func.name}({params}) -> {func.return_type}']
+    for block in func.blocks:
+        preds = ', '.join(f'B{p}' for p in block.preds) or '-'
+        lines.append(f'  B{block.index}:'.ljust(40) + f'; preds: {preds}')
+        for dst, args in block.phis:
+            incoming = ', '.join(f'[{reg_name(func, a)}, B{p}]' for a, p in zip(args, block.preds))
+            lines.append(f'    {reg_name(func, dst)}:{func.types[dst]} = phi {incoming}')
+        for instr in block:
+            lines.append('    ' + format_instr(module, func, *instr))
+    return '\n'.join(lines)
+
+
+def dump(module: Module):
+    '''
+    Retorna el texto de la IR de todo el módulo
+    '''
+    lines = []
+    for name, type_name, value in zip(module.gnames, module.gtypes, module.globals):
+        init = '' if value is None else f' = {value!r}'
+        lines.append(f'global @{name}:{type_name}{init}')
+    for func in module.functions:
+        if lines:
+            lines.append('')
+        lines.append(dump_function(module, func))
+    return '\n'.join(lines) + '\n'
+
+
+# =====================================================================
+# Traducción del AST a la IR
+# =====================================================================
+def _var_type(decl):
+    return f'array<{decl.type_spec}>' if decl.is_array else decl.type_spec
+
+
+class Lowering(Visitor):
+    '''
+    Traduce un Program verificado a la IR. Las expresiones retornan el
+    registro con su valor; las sentencias agregan instrucciones al
+    bloque actual (self.block, None después de un terminador).
+    '''
+
+    @classmethod
+    def lower(cls, n: Program, reuse=None):
+        '''
+        reuse: id(FuncDeclStmt) -> Function ya traducida (mcquery); esas
+        funciones se agregan al módulo sin volver a traducirlas
+        '''
+        lowering = cls(reuse)
+        n.accept(lowering)
+        return lowering.module
+
+    def __init__(self, reuse=None):
+        self.reuse   = reuse or { }
+        self.module  = Module()
+        self.scope   = SymbolTable()
+        self.func    = None
+        self.block   = None
+        self.loops   = []       # (bloque de continue, bloque de break)
+        self.vnames  = None     # nombres de variables usados en la función actual
+        self.effects = 0        # asignaciones a registros de variables hasta ahora
+
+    # -----------------------------------------------------------------
+    # Emisión
+    # -----------------------------------------------------------------
+    def emit(self, op, x=0, y=0, z=0):
+        if self.block is None:
+            # Código después de return, break o continue: queda en un
+            # bloque inalcanzable que build_cfg elimina
+            self.block = self.func.new_block()
+        self.block.emit(op, x, y, z)
+        if op in terminators:
+            self.block = None
+
+    def start(self, block):
+        # Continúa en 'block'; el bloque actual pasa a él si no terminó
+        if self.block is not None:
+            self.emit(JUMP, block.index)
+        self.block = block
+
+    def temp(self, type_name):
+        return self.func.new_reg(type_name)
+
+    def const(self, value, type_name, reg=None):
+        if reg is None:
+            reg = self.temp(type_name)
+        self.emit(CONST, reg, self.func.const(value))
+        return reg
+
+    def add_var(self, ident, type_name):
+        # Un bloque anidado puede declarar otra vez el mismo nombre
+        name = ident
+        count = 0
+        while name in self.vnames:
+            count += 1
+            name = f'{ident}_{count}'
+        self.vnames.add(name)
+        reg = self.func.new_reg(type_name, name)
+        self.scope.add_symbol(ident, ('local', reg), 'local')
+        return reg
+
+    def load(self, ident):
+        # Registro con el valor de la variable
+        kind, index = self.scope.lookup_symbol(ident)
+        if kind == 'local':
+            return index
+        reg = self.temp(self.module.gtypes[index])
+        self.emit(LOADG, reg, index)
+        return reg
+
+    def store(self, ident, value):
+        kind, index = self.scope.lookup_symbol(ident)
+        if kind == 'local':
+            self.emit(MOV, index, value)
+            self.effects += 1
+        else:
+            self.emit(STOREG, index, value)
+
+    def mark(self):
+        if self.block is None:
+            self.block = self.func.new_block()
+        return self.block, len(self.block.code), self.effects
+
+    def protect(self, reg, mark):
+        '''
+        'reg' se leyó en 'mark'. Si es el registro de una variable y
+        después se le pudo asignar otro valor (x + (x = 1)), se copia
+        en una temporal justo después de leerlo.
+        '''
+        block, pos, effects = mark
+        if self.effects == effects or not self.func.names[reg]:
+            return reg
+        t = self.temp(self.func.types[reg])
+        block.code[pos:pos] = array('i', (MOV, t, reg, 0))
+        return t
+
+    def operands(self, nodes):
+        '''
+        Evalúa las expresiones en orden y retorna sus registros
+        '''
+        regs, marks = [], []
+        for node in nodes:
+            regs.append((yield node))
+            marks.append(self.mark())
+        # De atrás hacia adelante para no mover las posiciones pendientes
+        for i in range(len(regs) - 2, -1, -1):
+            regs[i] = self.protect(regs[i], marks[i])
+        return regs
+
+    # -----------------------------------------------------------------
+    # Declaraciones
+    # -----------------------------------------------------------------
+    def visit(self, n: Program):
+        for decl in n.decls:
+            yield decl
+
+    def visit(self, n: VarDeclStmt):
+        value = None if n.is_array else zero_values[n.type_spec]
+        if self.func is None:
+            module = self.module
+            self.scope.add_symbol(n.ident, ('global', len(module.globals)))
+            module.globals.append(value)
+            module.gnames.append(n.ident)
+            module.gtypes.append(_var_type(n))
+        else:
+            reg = self.add_var(n.ident, _var_type(n))
+            self.const(value, _var_type(n), reg)
+
+    def visit(self, n: FuncDeclStmt):
+        index = len(self.module.functions)
+        self.scope.add_symbol(n.name, ('function', index))
+        if n.name == 'main':
+            self.module.main = index
+        reused = self.reuse.get(id(n))
+        if reused is not None:
+            self.module.functions.append(reused)
+            return
+        self.func = Function(n.name, len(n.params), n.return_type)
+        self.module.functions.append(self.func)
+
+        self.scope.enter_scope()
+        self.vnames = set()
+        for p in n.params:
+            self.add_var(p.ident, _var_type(p))
+        self.block = self.func.new_block()
+
+        yield n.body
+
+        if self.block is not None:
+            # Retorno implícito al final de la función
+            self.emit(RET, self.const(zero_values.get(n.return_type), n.return_type))
+        self.scope.exit_scope()
+        build_cfg(self.func)
+        self.func = None
+
+    # -----------------------------------------------------------------
+    # Sentencias
+    # -----------------------------------------------------------------
+    def visit(self, n: CompoundStmt):
+        self.scope.enter_scope()
+        for decl in n.local_decls:
+            yield decl
+        for stmt in n.stmt_list:
+            yield stmt
+        self.scope.exit_scope()
+
+    def visit(self, n: ExprStmt):
+        yield n.expr
+
+    def visit(self, n: NullStmt):
+        pass
+
+    def branch(self, n: Expression, true, false):
+        '''
+        Salta a 'true' o a 'false' según la condición; && y || y ! se
+        traducen a saltos sin calcular el valor bool intermedio.
+        '''
+        if isinstance(n, BinaryOpExpr) and n.opr in ('&&', '||'):
+            right = self.func.new_block()
+            if n.opr == '&&':
+                yield from self.branch(n.left, right, false)
+            else:
+                yield from self.branch(n.left, true, right)
+            self.block = right
+            yield from self.branch(n.right, true, false)
+        elif isinstance(n, UnaryOpExpr) and n.opr == '!':
+            yield from self.branch(n.expr, false, true)
+        else:
+            cond = yield n
+            self.emit(BRANCH, cond, true.index, false.index)
+
+    def visit(self, n: IfStmt):
+        then = self.func.new_block()
+        join = self.func.new_block()
+        other = self.func.new_block() if n.else_stmt else join
+        yield from self.branch(n.condition, then, other)
+        self.block = then
+        yield n.then_stmt
+        if n.else_stmt:
+            self.start(join)
+            self.block = other
+            yield n.else_stmt
+        self.start(join)
+
+    def visit(self, n: WhileStmt):
+        header = self.func.new_block()
+        body = self.func.new_block()
+        exit = self.func.new_block()
+        self.start(header)
+        yield from self.branch(n.condition, body, exit)
+        self.block = body
+        self.loops.append((header, exit))
+        yield n.body
+        self.loops.pop()
+        self.start(header)
+        self.block = exit
+
+    def visit(self, n: BreakStmt):
+        self.emit(JUMP, self.loops[-1][1].index)
+
+    def visit(self, n: ContinueStmt):
+        self.emit(JUMP, self.loops[-1][0].index)
+
+    def visit(self, n: ReturnStmt):
+        if n.expr:
+            value = yield n.expr
+        else:
+            value = self.const(None, 'void')
+        self.emit(RET, value)
+
+    # -----------------------------------------------------------------
+    # Expresiones
+    # -----------------------------------------------------------------
+    def visit(self, n: ConstExpr):
+        return self.const(n.value, n.type)
+
+    def visit(self, n: VarExpr):
+        return self.load(n.ident)
+
+    def visit(self, n: VarAssignmentExpr):
+        value = yield n.expr
+        self.store(n.ident, value)
+        kind, index = self.scope.lookup_symbol(n.ident)
+        return index if kind == 'local' else value
+
+    def visit(self, n: ArrayLookupExpr):
+        arr = self.load(n.ident)
+        mark = self.mark()
+        index = yield n.index
+        reg = self.temp(n.type)
+        self.emit(ALOAD, reg, self.protect(arr, mark), index)
+        return reg
+
+    def visit(self, n: ArrayAssignmentExpr):
+        # El arreglo se lee después del índice y del valor, como en mcinterp
+        index, value = yield from self.operands([n.index, n.expr])
+        self.emit(ASTORE, self.load(n.ident), index, value)
+        return value
+
+    def visit(self, n: ArraySizeExpr):
+        reg = self.temp('int')
+        self.emit(ALEN, reg, self.load(n.ident))
+        return reg
+
+    def visit(self, n: NewArrayExpr):
+        size = yield n.expr
+        reg = self.temp(n.type)
+        self.emit(NEWARR, reg, size, array_types.index(n._type))
+        return reg
+
+    def visit(self, n: IntToFloatExpr):
+        value = yield n.expr
+        reg = self.temp('float')
+        self.emit(I2F, reg, value)
+        return reg
+
+    def visit(self, n: UnaryOpExpr):
+        value = yield n.expr
+        if n.opr == '+':
+            return value
+        reg = self.temp(n.type)
+        self.emit(NOT if n.opr == '!' else NEG, reg, value)
+        return reg
+
+    def boolean(self, n: BinaryOpExpr):
+        # Valor bool de && y ||: se traducen a saltos
+        reg = self.temp('bool')
+        true, false, join = self.func.new_block(), self.func.new_block(), self.func.new_block()
+        yield from self.branch(n, true, false)
+        self.block = true
+        self.const(True, 'bool', reg)
+        self.start(join)
+        self.block = false
+        self.const(False, 'bool', reg)
+        self.start(join)
+        return reg
+
+    def visit(self, n: BinaryOpExpr):
+        if n.opr in ('&&', '||'):
+            return (yield from self.boolean(n))
+        left, right = yield from self.operands([n.left, n.right])
+        if n.opr == '/':
+            op = IDIV if n.type == 'int' else DIV
+        elif n.opr == '%':
+            op = IMOD
+        else:
+            op = _binops[n.opr]
+        reg = self.temp(n.type)
+        self.emit(op, reg, left, right)
+        return reg
+
+    def visit(self, n: CallExpr):
+        if n.ident == 'iread':
+            reg = self.temp('int')
+            self.emit(IREAD, reg)
+            return reg
+        if n.ident == 'scanf':
+            kind, index = self.scope.lookup_symbol(n.args[0].ident)
+            if kind == 'local':
+                self.emit(IREAD, index)
+                self.effects += 1
+            else:
+                reg = self.temp('int')
+                self.emit(IREAD, reg)
+                self.emit(STOREG, index, reg)
+            return None
+
+        args = yield from self.operands(n.args)
+        for arg in args:
+            self.emit(PARAM, arg)
+        if n.ident == 'printf':
+            self.emit(PRINTF, len(args))
+            return None
+        _, index = self.scope.lookup_symbol(n.ident)
+        reg = self.temp(n.type)
+        self.emit(CALL, reg, index, len(args))
+        return reg
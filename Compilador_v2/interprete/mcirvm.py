@@ -0,0 +1,129 @@
+# mcirvm.py
+'''
+Ejecución de la IR
+------------------
+
+Ejecuta directamente un mcir.Module, bloque por bloque. No busca ser
+rápido: sirve para comparar la IR (antes y después de optimizarla) con
+los otros backends en bench/bench_backends.py.
+
+Cada llamada tiene su lista de registros; los argumentos ocupan los
+primeros. Las llamadas del programa usan la recursión de Python. Las
+phi (forma SSA) se asignan al entrar al bloque, todas a la vez.
+'''
+import operator
+import sys
+
+from .mcir       import *
+from .mcruntime  import RunError, idiv, imod, new_array, printf, iread, check_array, aload, astore
+
+_binary = {
+    ADD : operator.add,
+    SUB : operator.sub,
+    MUL : operator.mul,
+    IDIV: idiv,
+    IMOD: imod,
+    LT  : operator.lt,
+    LE  : operator.le,
+    GT  : operator.gt,
+    GE  : operator.ge,
+    EQ  : operator.eq,
+    NE  : operator.ne,
+}
+
+
+class IRMachine:
+    recursion_limit = 100_000
+
+    def __init__(self, module: Module):
+        self.module  = module
+        self.globals = []
+
+    def run(self):
+        module = self.module
+        if module.main is None:
+            raise RunError("El programa no tiene función 'main'")
+        self.globals = list(module.globals)
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(max(limit, self.recursion_limit))
+        try:
+            return self.call(module.functions[module.main], [])
+        except RecursionError:
+            raise RunError("Recursión demasiado profunda")
+        finally:
+            sys.setrecursionlimit(limit)
+
+    def call(self, func: Function, args):
+        regs = [None] * len(func.types)
+        regs[:len(args)] = args
+        consts = func.consts
+        blocks = func.blocks
+        gvars = self.globals
+        params = []
+        binary = _binary
+
+        block = 0
+        code = blocks[0].code
+        pc = 0
+        while True:
+            op, x, y, z = code[pc:pc + 4]
+            pc += 4
+
+            if op in binary:
+                regs[x] = binary[op](regs[y], regs[z])
+            elif op == MOV:
+                regs[x] = regs[y]
+            elif op == CONST:
+                regs[x] = consts[y]
+            elif op == BRANCH or op == JUMP:
+                target = blocks[x if op == JUMP else y if regs[x] else z]
+                if target.phis:
+                    _enter(target, block, regs)
+                block = target.index
+                code = target.code
+                pc = 0
+            elif op == DIV:
+                try:
+                    regs[x] = regs[y] / regs[z]
+                except ZeroDivisionError:
+                    raise RunError("División por cero")
+            elif op == NEG:
+                regs[x] = -regs[y]
+            elif op == NOT:
+                regs[x] = not regs[y]
+            elif op == I2F:
+                regs[x] = float(regs[y])
+            elif op == LOADG:
+                regs[x] = gvars[y]
+            elif op == STOREG:
+                gvars[x] = regs[y]
+            elif op == ALOAD:
+                regs[x] = aload(regs[y], regs[z])
+            elif op == ASTORE:
+                astore(regs[x], regs[y], regs[z])
+            elif op == ALEN:
+                regs[x] = len(check_array(regs[y]))
+            elif op == NEWARR:
+                regs[x] = new_array(array_types[z], regs[y])
+            elif op == PARAM:
+                params.append(regs[x])
+            elif op == CALL:
+                # Las PARAM de una llamada van justo antes de ella
+                args, params = params, []
+                regs[x] = self.call(self.module.functions[y], args)
+            elif op == PRINTF:
+                printf(*params)
+                params = []
+            elif op == IREAD:
+                regs[x] = iread()
+            elif op == RET:
+                return regs[x]
+            else:
+                raise RunError(f"Opcode desconocido {op}")
+
+
+def _enter(target: Block, source, regs):
+    j = target.preds.index(source)
+    values = [regs[args[j]] if args[j] >= 0 else None for _, args in target.phis]
+    for (dst, _), value in zip(target.phis, values):
+        regs[dst] = value
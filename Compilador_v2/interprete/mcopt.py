@@ -0,0 +1,681 @@
+# mcopt.py
+'''
+Optimizaciones de la IR en Forma SSA
+------------------------------------
+
+Pasadas sobre una mcir.Function, en el orden en que se usan:
+
+  to_ssa     construye la forma SSA: dominadores (Cooper, Harvey y
+             Kennedy), fronteras de dominancia, phi en la frontera
+             iterada de las definiciones de cada registro que vive entre
+             bloques (SSA semi-podada) y renombrado recorriendo el árbol
+             de dominadores.
+  sccp       propagación de constantes condicional dispersa (Wegman y
+             Zadeck): solo sigue las aristas que pueden ejecutarse, así
+             que los saltos con condición constante se vuelven JUMP y
+             los bloques que no se alcanzan se eliminan.
+  dce        eliminación de código muerto: marca las instrucciones con
+             efectos y lo que usan, y borra el resto.
+  cse        eliminación de subexpresiones comunes global: numeración de
+             valores recorriendo el árbol de dominadores. También propaga
+             las copias (MOV) y elimina las phi triviales.
+  from_ssa   sale de la forma SSA: parte las aristas críticas y cambia
+             cada phi por copias al final de sus predecesores, ordenadas
+             como copias paralelas.
+  simplify_cfg
+             une cada bloque que termina en JUMP con su destino cuando
+             este no tiene otro predecesor (las cadenas de bloques vacíos
+             que dejan sccp y la traducción de if y while).
+
+sccp, dce y cse necesitan la forma SSA. Cada pasada retorna cuántas
+instrucciones eliminó (negativo si agregó, como to_ssa con las phi).
+Los recorridos usan pilas explícitas, así que la profundidad del árbol
+de dominadores no está limitada por la pila de Python.
+'''
+import math
+
+from .mcir       import *
+from .mcruntime  import RunError, idiv, imod
+
+# Instrucciones puras (sin efectos y sin errores de ejecución)
+_pure = {CONST, MOV, ADD, SUB, MUL, LT, LE, GT, GE, EQ, NE, NEG, NOT, I2F}
+
+# Divisiones: puras si el divisor es una constante distinta de cero
+_division = {DIV, IDIV, IMOD}
+
+_commutative = {ADD, MUL, EQ, NE}
+
+_fold = {
+    ADD : lambda a, b: a + b,
+    SUB : lambda a, b: a - b,
+    MUL : lambda a, b: a * b,
+    DIV : lambda a, b: a / b,
+    IDIV: idiv,
+    IMOD: imod,
+    LT  : lambda a, b: a < b,
+    LE  : lambda a, b: a <= b,
+    GT  : lambda a, b: a > b,
+    GE  : lambda a, b: a >= b,
+    EQ  : lambda a, b: a == b,
+    NE  : lambda a, b: a != b,
+    NEG : lambda a: -a,
+    NOT : lambda a: not a,
+    I2F : float,
+}
+
+
+# =====================================================================
+# Dominadores
+# =====================================================================
+def dominators(func: Function):
+    '''
+    Dominador inmediato de cada bloque (idom[0] == 0). Los bloques
+    deben estar en orden posterior inverso (ver mcir.build_cfg).
+    '''
+    blocks = func.blocks
+    idom = [None] * len(blocks)
+    idom[0] = 0
+    changed = True
+    while changed:
+        changed = False
+        for block in blocks[1:]:
+            new = None
+            for p in block.preds:
+                if idom[p] is not None:
+                    new = p if new is None else _intersect(idom, p, new)
+            if idom[block.index] != new:
+                idom[block.index] = new
+                changed = True
+    return idom
+
+
+def _intersect(idom, a, b):
+    # En orden posterior inverso el dominador tiene un índice menor
+    while a != b:
+        while a > b:
+            a = idom[a]
+        while b > a:
+            b = idom[b]
+    return a
+
+
+def dominator_tree(idom):
+    children = [[] for _ in idom]
+    for b in range(1, len(idom)):
+        children[idom[b]].append(b)
+    return children
+
+
+def frontiers(func: Function, idom):
+    '''
+    Frontera de dominancia de cada bloque
+    '''
+    df = [set() for _ in func.blocks]
+    for block in func.blocks:
+        if len(block.preds) > 1:
+            for p in set(block.preds):
+                runner = p
+                while runner != idom[block.index]:
+                    df[runner].add(block.index)
+                    runner = idom[runner]
+    return df
+
+
+# =====================================================================
+# Construcción de la forma SSA
+# =====================================================================
+def to_ssa(func: Function):
+    if func.ssa:
+        return 0
+    before = func.size()
+    blocks = func.blocks
+    nregs = len(func.types)
+    idom = dominators(func)
+    children = dominator_tree(idom)
+    df = frontiers(func, idom)
+
+    # Bloques que definen cada registro y registros que se usan en un
+    # bloque antes de definirse en él (los únicos que necesitan phi)
+    defblocks = [[] for _ in range(nregs)]
+    crossing = [False] * nregs
+    for r in range(func.nparams):
+        defblocks[r].append(0)
+    for block in blocks:
+        defined = set()
+        for op, x, y, z in block:
+            sig = signatures[op]
+            for c, v in zip(sig, (x, y, z)):
+                if c == 'r' and v not in defined:
+                    crossing[v] = True
+            if sig[0] == 'd':
+                defined.add(x)
+                if not defblocks[x] or defblocks[x][-1] != block.index:
+                    defblocks[x].append(block.index)
+
+    # Phi en la frontera de dominancia iterada
+    phi_vars = [[] for _ in blocks]     # registro original de cada phi
+    for reg in range(nregs):
+        if not crossing[reg] or len(defblocks[reg]) == 0:
+            continue
+        has_phi = set()
+        work = list(defblocks[reg])
+        queued = set(work)
+        while work:
+            b = work.pop()
+            for d in df[b]:
+                if d not in has_phi:
+                    has_phi.add(d)
+                    blocks[d].phis.append([reg, [reg] * len(blocks[d].preds)])
+                    phi_vars[d].append(reg)
+                    if d not in queued:
+                        queued.add(d)
+                        work.append(d)
+
+    # Renombrado: cada definición recibe un registro nuevo (la primera
+    # conserva el original) y cada uso el de la definición que lo domina
+    stacks = [[] for _ in range(nregs)]
+    versions = [0] * nregs
+    for r in range(func.nparams):
+        stacks[r].append(r)
+        versions[r] = 1
+
+    def fresh(reg):
+        count = versions[reg]
+        versions[reg] = count + 1
+        if count == 0:
+            new = reg
+        else:
+            name = func.names[reg]
+            new = func.new_reg(func.types[reg], f'{name}.{count}' if name else '')
+        stacks[reg].append(new)
+        return new
+
+    def current(reg):
+        stack = stacks[reg]
+        return stack[-1] if stack else -1
+
+    # (bloque, registros a sacar de las pilas al salir); None = salida
+    work = [0]
+    pushed = []
+    while work:
+        b = work.pop()
+        if b is None:
+            for reg in pushed.pop():
+                stacks[reg].pop()
+            continue
+        block = blocks[b]
+        defs = []
+        for phi, reg in zip(block.phis, phi_vars[b]):
+            phi[0] = fresh(reg)
+            defs.append(reg)
+
+        code = block.code
+        for i in range(0, len(code), 4):
+            sig = signatures[code[i]]
+            for k, c in enumerate(sig, 1):
+                if c == 'r':
+                    new = current(code[i + k])
+                    if new >= 0:
+                        code[i + k] = new
+            if sig[0] == 'd':
+                reg = code[i + 1]
+                code[i + 1] = fresh(reg)
+                defs.append(reg)
+
+        for s in set(block.succs):
+            succ = blocks[s]
+            for j, p in enumerate(succ.preds):
+                if p == b:
+                    for phi, reg in zip(succ.phis, phi_vars[s]):
+                        phi[1][j] = current(reg)
+
+        pushed.append(defs)
+        work.append(None)
+        work.extend(reversed(children[b]))
+
+    func.ssa = True
+    return before - func.size()
+
+
+# =====================================================================
+# Propagación de constantes condicional dispersa
+# =====================================================================
+_TOP, _BOTTOM = 'top', 'bottom'     # sin valor aún / no es constante
+
+
+def _meet(a, b):
+    if a is _TOP:
+        return b
+    if b is _TOP or a == b:
+        return a
+    return _BOTTOM
+
+
+def _const(value):
+    # (tipo, valor[, signo]) para que 1, 1.0 y True, y 0.0 y -0.0, sean
+    # constantes distintas (ver mcir.const_key)
+    if isinstance(value, float) and math.isnan(value):
+        return _BOTTOM
+    return const_key(value)
+
+
+def sccp(func: Function):
+    assert func.ssa, 'sccp necesita la forma SSA'
+    before = func.size()
+    blocks = func.blocks
+    consts = func.consts
+    nregs = len(func.types)
+
+    value = [_TOP] * nregs
+    for r in range(func.nparams):
+        value[r] = _BOTTOM
+
+    # Usos de cada registro: (bloque, posición); las phi con posición negativa
+    users = [[] for _ in range(nregs)]
+    for block in blocks:
+        for k, (_, args) in enumerate(block.phis):
+            for a in args:
+                if a >= 0:
+                    users[a].append((block.index, ~k))
+        for i, (op, x, y, z) in enumerate(block):
+            for c, v in zip(signatures[op], (x, y, z)):
+                if c == 'r':
+                    users[v].append((block.index, i))
+
+    executable = [False] * len(blocks)
+    edges = set()
+    cfg_work = [(-1, 0)]
+    ssa_work = []
+
+    def update(reg, new):
+        if new != value[reg]:
+            value[reg] = new
+            ssa_work.append(reg)
+
+    def visit_phi(block, k):
+        dst, args = block.phis[k]
+        new = _TOP
+        for a, p in zip(args, block.preds):
+            if (p, block.index) in edges and a >= 0:
+                new = _meet(new, value[a])
+        update(dst, new)
+
+    def visit(block, i):
+        code = block.code
+        op, x, y, z = code[4 * i: 4 * i + 4]
+        if op == JUMP:
+            cfg_work.append((block.index, x))
+        elif op == BRANCH:
+            cond = value[x]
+            if cond is _BOTTOM:
+                cfg_work.append((block.index, y))
+                cfg_work.append((block.index, z))
+            elif cond is not _TOP:
+                cfg_work.append((block.index, y if cond[1] else z))
+        elif signatures[op][0] == 'd':
+            update(x, _evaluate(op, y, z, value, consts))
+
+    while cfg_work or ssa_work:
+        while cfg_work:
+            edge = cfg_work.pop()
+            if edge in edges:
+                continue
+            edges.add(edge)
+            block = blocks[edge[1]]
+            for k in range(len(block.phis)):
+                visit_phi(block, k)
+            if not executable[block.index]:
+                executable[block.index] = True
+                for i in range(len(block)):
+                    visit(block, i)
+        while ssa_work:
+            reg = ssa_work.pop()
+            for b, pos in users[reg]:
+                if executable[b]:
+                    if pos < 0:
+                        visit_phi(blocks[b], ~pos)
+                    else:
+                        visit(blocks[b], pos)
+
+    # Reescritura: constantes, saltos con condición conocida y phi constantes
+    for block in blocks:
+        if not executable[block.index]:
+            continue
+        code = block.code
+        prefix = array('i')
+        phis = []
+        for dst, args in block.phis:
+            v = value[dst]
+            if v is _TOP or v is _BOTTOM:
+                phis.append([dst, args])
+            else:
+                prefix.extend((CONST, dst, func.const(v[1]), 0))
+        block.phis = phis
+
+        for i in range(0, len(code), 4):
+            op, x = code[i], code[i + 1]
+            if op == BRANCH:
+                cond = value[x]
+                if cond is not _TOP and cond is not _BOTTOM:
+                    code[i: i + 4] = array('i', (JUMP, code[i + 2] if cond[1] else code[i + 3], 0, 0))
+            elif op != CONST and (op in _pure or op in _division):
+                v = value[x]
+                if v is not _TOP and v is not _BOTTOM:
+                    code[i: i + 4] = array('i', (CONST, x, func.const(v[1]), 0))
+        if prefix:
+            block.code = prefix + code
+
+    # Los bloques que no se ejecutan quedan inalcanzables
+    build_cfg(func)
+    return before - func.size()
+
+
+def _evaluate(op, y, z, value, consts):
+    if op == CONST:
+        return _const(consts[y])
+    if op == MOV:
+        return value[y]
+    if op not in _fold:
+        return _BOTTOM
+    sig = signatures[op]
+    operands = [value[y]] if sig == 'dr' else [value[y], value[z]]
+    if _BOTTOM in operands:
+        return _BOTTOM
+    if _TOP in operands:
+        return _TOP
+    try:
+        return _const(_fold[op](*(v[1] for v in operands)))
+    except (ZeroDivisionError, RunError, OverflowError):
+        # El error ocurre al ejecutar
+        return _BOTTOM
+
+
+# =====================================================================
+# Eliminación de código muerto
+# =====================================================================
+def _definitions(func: Function):
+    # Registro -> (bloque, posición); las phi con posición negativa
+    defs = { }
+    for block in func.blocks:
+        for k, (dst, _) in enumerate(block.phis):
+            defs[dst] = (block.index, ~k)
+        for i, (op, x, y, z) in enumerate(block):
+            if signatures[op][0] == 'd':
+                defs[x] = (block.index, i)
+    return defs
+
+
+def _nonzero(func: Function):
+    # Registros que son una constante distinta de cero
+    return {x for block in func.blocks for op, x, y, _ in block
+            if op == CONST and func.consts[y] != 0}
+
+
+def _removable(op, z, nonzero):
+    # Una instrucción sin efectos que se puede borrar si no se usa
+    return op in _pure or (op in _division and z in nonzero)
+
+
+def dce(func: Function):
+    assert func.ssa, 'dce necesita la forma SSA'
+    before = func.size()
+    blocks = func.blocks
+    defs = _definitions(func)
+    nonzero = _nonzero(func)
+
+    live_code = [bytearray(len(b)) for b in blocks]
+    live_phis = [bytearray(len(b.phis)) for b in blocks]
+    work = []
+
+    def mark(reg):
+        site = defs.get(reg)
+        if site is None:
+            return
+        b, pos = site
+        if pos < 0:
+            if not live_phis[b][~pos]:
+                live_phis[b][~pos] = 1
+                work.append(site)
+        elif not live_code[b][pos]:
+            live_code[b][pos] = 1
+            work.append(site)
+
+    for block in blocks:
+        for i, (op, x, y, z) in enumerate(block):
+            if not _removable(op, z, nonzero):
+                live_code[block.index][i] = 1
+                work.append((block.index, i))
+
+    while work:
+        b, pos = work.pop()
+        block = blocks[b]
+        if pos < 0:
+            for a in block.phis[~pos][1]:
+                if a >= 0:
+                    mark(a)
+        else:
+            code = block.code
+            op = code[4 * pos]
+            for k, c in enumerate(signatures[op], 1):
+                if c == 'r':
+                    mark(code[4 * pos + k])
+
+    for block in blocks:
+        live = live_code[block.index]
+        if not all(live):
+            code = block.code
+            block.code = array('i', [v for i in range(len(live)) if live[i]
+                                       for v in code[4 * i: 4 * i + 4]])
+        block.phis = [phi for phi, alive in zip(block.phis, live_phis[block.index]) if alive]
+    return before - func.size()
+
+
+# =====================================================================
+# Eliminación de subexpresiones comunes
+# =====================================================================
+def cse(func: Function):
+    assert func.ssa, 'cse necesita la forma SSA'
+    before = func.size()
+    blocks = func.blocks
+    children = dominator_tree(dominators(func))
+    repl = list(range(len(func.types)))     # registro -> registro equivalente
+
+    def find(reg):
+        while reg >= 0 and repl[reg] != reg:
+            repl[reg] = repl[repl[reg]]
+            reg = repl[reg]
+        return reg
+
+    # Tabla de valores con alcance: al salir de un bloque se quitan las
+    # expresiones que agregó, así solo se reemplaza lo que está dominado
+    table = { }
+    work = [0]
+    added = []
+    while work:
+        b = work.pop()
+        if b is None:
+            for key in added.pop():
+                del table[key]
+            continue
+        block = blocks[b]
+        keys = []
+        code = block.code
+        kept = array('i')
+        for i in range(0, len(code), 4):
+            op, x, y, z = code[i: i + 4]
+            sig = signatures[op]
+            if sig[1:2] == 'r':
+                y = find(y)
+            if sig[2:3] == 'r':
+                z = find(z)
+            if sig[0] == 'r':
+                x = find(x)
+
+            if op == MOV:
+                repl[x] = y
+                continue
+            # Una división o ALEN repetida no falla si la anterior (que
+            # la domina, con los mismos operandos) no falló
+            if op in _pure or op in _division or op == ALEN:
+                if op in _commutative and y > z:
+                    y, z = z, y
+                key = (op, y, z if len(sig) > 2 else 0)
+                same = table.get(key)
+                if same is not None:
+                    repl[x] = same
+                    continue
+                table[key] = x
+                keys.append(key)
+            kept.extend((op, x, y, z))
+        block.code = kept
+        added.append(keys)
+        work.append(None)
+        work.extend(reversed(children[b]))
+
+    # Argumentos de las phi (pueden venir de bloques visitados después)
+    # y phi triviales: todos sus argumentos son el mismo valor
+    changed = True
+    while changed:
+        changed = False
+        for block in blocks:
+            phis = []
+            for dst, args in block.phis:
+                args[:] = [find(a) for a in args]
+                values = {a for a in args if a != dst and a >= 0}
+                if len(values) == 1:
+                    repl[dst] = values.pop()
+                    changed = True
+                else:
+                    phis.append([dst, args])
+            block.phis = phis
+
+    # Los reemplazos de las phi eliminadas pueden afectar a cualquier uso
+    for block in blocks:
+        code = block.code
+        for i in range(0, len(code), 4):
+            for k, c in enumerate(signatures[code[i]], 1):
+                if c == 'r':
+                    code[i + k] = find(code[i + k])
+        for phi in block.phis:
+            phi[1] = [find(a) for a in phi[1]]
+    return before - func.size()
+
+
+# =====================================================================
+# Salida de la forma SSA
+# =====================================================================
+def from_ssa(func: Function):
+    if not func.ssa:
+        return 0
+    before = func.size()
+    blocks = func.blocks
+
+    for block in list(blocks):
+        if not block.phis:
+            continue
+        done = set()
+        for j, p in enumerate(block.preds):
+            if p in done:
+                continue        # BRANCH con los dos destinos iguales
+            done.add(p)
+            copies = [(dst, args[j]) for dst, args in block.phis]
+            pred = blocks[p]
+            if len(pred.succs) > 1:
+                # Arista crítica: las copias van en un bloque nuevo
+                split = func.new_block()
+                code = pred.code
+                for k in (-2, -1):
+                    if code[k] == block.index:
+                        code[k] = split.index
+                pred = split
+                pred.emit(JUMP, block.index)
+            moves = array('i')
+            for dst, src in _sequence(func, copies):
+                moves.extend((MOV, dst, src, 0))
+            pred.code[-4:-4] = moves
+        block.phis = []
+
+    func.ssa = False
+    build_cfg(func)
+    return before - func.size()
+
+
+def _sequence(func: Function, copies):
+    '''
+    Ordena copias paralelas (todas leen antes de que alguna escriba):
+    primero las que escriben un registro que ninguna otra lee; los
+    ciclos (a <- b, b <- a) se rompen con una temporal.
+    '''
+    pending = {dst: src for dst, src in copies if src >= 0 and src != dst}
+    moves = []
+    while pending:
+        sources = set(pending.values())
+        ready = [dst for dst in pending if dst not in sources]
+        if ready:
+            for dst in ready:
+                moves.append((dst, pending.pop(dst)))
+            continue
+        dst = next(iter(pending))
+        t = func.new_reg(func.types[dst])
+        moves.append((t, dst))
+        for d, s in pending.items():
+            if s == dst:
+                pending[d] = t
+    return moves
+
+
+# =====================================================================
+# Simplificación del CFG
+# =====================================================================
+def simplify_cfg(func: Function):
+    before = func.size()
+    blocks = func.blocks
+    merged = [False] * len(blocks)
+    for block in blocks:
+        if merged[block.index]:
+            continue
+        while block.code[-4] == JUMP:
+            succ = blocks[block.code[-3]]
+            if succ is block or succ.index == 0 or len(succ.preds) != 1:
+                break
+            # Con un solo predecesor cada phi es una copia
+            moves = array('i')
+            for dst, args in succ.phis:
+                if args[0] >= 0:
+                    moves.extend((MOV, dst, args[0], 0))
+            block.code = block.code[:-4] + moves + succ.code
+            for t in set(succ.succs):
+                target = blocks[t]
+                target.preds = [block.index if p == succ.index else p for p in target.preds]
+            block.succs = succ.succs
+            succ.phis = []
+            merged[succ.index] = True
+    build_cfg(func)
+    return before - func.size()
+
+
+# =====================================================================
+# Pipeline
+# =====================================================================
+passes = {
+    'ssa'  : to_ssa,
+    'sccp' : sccp,
+    'dce'  : dce,
+    'cse'  : cse,
+    'unssa': from_ssa,
+    'cfg'  : simplify_cfg,
+}
+
+default_pipeline = ['ssa', 'sccp', 'dce', 'cse', 'dce', 'unssa', 'cfg']
+
+
+def optimize(module: Module, pipeline=default_pipeline):
+    '''
+    Aplica las pasadas a todas las funciones. Retorna [(pasada,
+    instrucciones eliminadas)] sumando todas las funciones.
+    '''
+    report = []
+    for name in pipeline:
+        run = passes[name]
+        report.append((name, sum(run(func) for func in module.functions)))
+    return report
@@ -0,0 +1,138 @@
+# mcpasses.py
+'''
+Administrador de Pasadas
+------------------------
+
+Ejecuta en orden las pasadas de optimización elegidas con -O o con
+--passes y registra, para cada una, el tiempo que tomó y el tamaño del
+programa antes y después (nodos del AST o instrucciones de la IR).
+
+Hay dos tipos de pasadas:
+
+  ast   reciben el Program verificado y retornan el Program (el mismo u
+        otro); se aplican a todos los backends
+  ir    reciben una mcir.Function; se aplican a la IR (mcc -I y
+        --backend ir) y están en mcopt.passes
+
+Las pasadas del AST van antes que las de la IR. sccp, dce y cse
+necesitan la forma SSA: si la función no está en SSA el administrador
+agrega 'ssa' antes, así --passes=sccp,dce es válido.
+'''
+from collections import namedtuple
+import time
+
+from analizador_sintactico.mcast import Node, preorder
+from .mcfold     import fold
+from .mcir       import Lowering, Module
+from .mcopt      import passes as ir_passes
+
+# nombre -> función(Program) -> Program
+ast_passes = {
+    'fold': fold,       # plegado de constantes y simplificaciones
+}
+
+_needs_ssa = {'sccp', 'dce', 'cse'}
+
+# Pipeline de cada nivel de -O
+levels = {
+    0: [],
+    1: ['fold', 'ssa', 'sccp', 'dce', 'unssa', 'cfg'],
+    2: ['fold', 'ssa', 'sccp', 'dce', 'cse', 'dce', 'unssa', 'cfg'],
+    3: ['fold', 'ssa', 'sccp', 'dce', 'cse', 'sccp', 'dce', 'unssa', 'cfg'],
+}
+
+# Tiempo de una pasada y tamaño del programa antes y después
+PassRecord = namedtuple('PassRecord', ['name', 'seconds', 'before', 'after'])
+
+
+def ast_size(n: Node):
+    return sum(1 for _ in preorder(n))
+
+
+def _size(value):
+    # Nodos del AST o instrucciones de la IR
+    return ast_size(value) if isinstance(value, Node) else value.size()
+
+
+class PassManager:
+
+    def __init__(self, pipeline=()):
+        for name in pipeline:
+            if name not in ast_passes and name not in ir_passes:
+                known = ', '.join(sorted({*ast_passes, *ir_passes}))
+                raise ValueError(f"Pasada desconocida '{name}' (disponibles: {known})")
+        self.pipeline = list(pipeline)
+        self.records  = []
+
+    @classmethod
+    def level(cls, n):
+        return cls(levels[n])
+
+    @classmethod
+    def parse(cls, spec: str):
+        '''
+        Pipeline de --passes: nombres separados por comas
+        '''
+        return cls([name.strip() for name in spec.split(',') if name.strip()])
+
+    def timed(self, name, run, size, value):
+        before = size(value)
+        start = time.perf_counter()
+        result = run(value)
+        elapsed = time.perf_counter() - start
+        self.records.append(PassRecord(name, elapsed, before, size(result)))
+        return result
+
+    def run_ast(self, n: Node):
+        for name in self.pipeline:
+            if name in ast_passes:
+                n = self.timed(name, ast_passes[name], _size, n)
+        return n
+
+    def lower(self, n: Node, reuse=None) -> Module:
+        '''
+        Traduce a la IR y aplica las pasadas de la IR. Las funciones de
+        reuse (ver Lowering.lower) ya pasaron por este pipeline y no se
+        vuelven a optimizar.
+        '''
+        if not reuse:
+            module = self.timed('lower', Lowering.lower, _size, n)
+            functions = module.functions
+        else:
+            # El tamaño y las pasadas solo cuentan lo que se traduce
+            reused = {id(f) for f in reuse.values()}
+            def size(value):
+                if isinstance(value, Node):
+                    return sum(ast_size(d) for d in value.decls if id(d) not in reuse)
+                return sum(f.size() for f in value.functions if id(f) not in reused)
+            module = self.timed('lower', lambda n: Lowering.lower(n, reuse), size, n)
+            functions = [f for f in module.functions if id(f) not in reused]
+        for name in self.pipeline:
+            if name not in ir_passes:
+                continue
+            if name in _needs_ssa and not all(f.ssa for f in functions):
+                self.run_ir('ssa', module, functions)
+            self.run_ir(name, module, functions)
+        return module
+
+    def run_ir(self, name, module: Module, functions=None):
+        run = ir_passes[name]
+        if functions is None:
+            functions = module.functions
+        def apply(module):
+            for func in functions:
+                run(func)
+            return module
+        return self.timed(name, apply, lambda module: sum(f.size() for f in functions), module)
+
+    def report(self):
+        '''
+        Tabla con el tiempo y el cambio de tamaño de cada pasada
+        '''
+        lines = [f'{"pasada":<10}{"ms":>10}{"antes":>10}{"después":>10}{"cambio":>10}']
+        for r in self.records:
+            lines.append(f'{r.name:<10}{r.seconds * 1000:>10.2f}{r.before:>10}{r.after:>10}'
+                         f'{r.after - r.before:>+10}')
+        total = sum(r.seconds for r in self.records)
+        lines.append(f'{"total":<10}{total * 1000:>10.2f}')
+        return '\n'.join(lines)
@@ -0,0 +1,365 @@
+# mcpycode.py
+'''
+Compilación a Código de Python
+------------------------------
+
+Traduce cada FuncDeclStmt verificado a una función de Python (como
+texto) y compila el programa completo con compile(), de modo que lo
+ejecuta el intérprete de CPython, con su especialización adaptativa en
+3.11+:
+
+- Las locales y parámetros son variables locales de Python (l_x); las
+  locales de bloques anidados que ocultan a otra se renombran (l_x_1).
+- Las globales son atributos del módulo generado (g_x) y las funciones
+  también (f_nombre).
+- Los arreglos son los buffers tipados de mcruntime.new_array:
+  array('q') para int, array('d') para float y array('b') para bool.
+- if, while, break, continue y return se traducen directamente.
+
+Los índices negativos se rechazan antes de indexar (en Python serían
+válidos); los demás errores de arreglos y la división por cero llegan
+como excepciones de Python y se convierten en RunError al ejecutar. Para
+que el error de un índice fuera de rango diga el índice, cada acceso lo
+guarda antes en la local _ix.
+
+compile() no acepta más de 200 paréntesis anidados y su recursión tiene
+un límite, así que una expresión con más de _max_nesting paréntesis se
+mueve a una función auxiliar anidada (_e1, _e2, ...) que se llama en el
+mismo lugar: el orden de evaluación y los && y || no cambian. Las
+auxiliares se definen al inicio de la función y declaran nonlocal las
+locales que asignan.
+'''
+import math
+import re
+import sys
+import types
+
+from analizador_sintactico.mcast import *
+from analizador_semantico.mchecker import SymbolTable
+from .mcruntime  import RunError, zero_values, idiv, imod, printf, iread, new_array
+
+def bad_index(index):
+    raise RunError(f"Índice {index} fuera de rango")
+
+
+def astore_value(index, value, arr):
+    # Asignación a un arreglo usada como expresión; el arreglo va al
+    # final porque se lee después del índice y del valor (como en mcinterp)
+    if index < 0 or index >= len(arr):
+        bad_index(index)
+    arr[index] = value
+    return value
+
+
+# Nombres disponibles para el código generado
+_runtime = {
+    'idiv'         : idiv,
+    'imod'         : imod,
+    'printf'       : printf,
+    'iread'        : iread,
+    'new_array'    : new_array,
+    'bad_index'    : bad_index,
+    'astore_value' : astore_value,
+}
+
+_binops = {'&&': 'and', '||': 'or'}
+
+# Paréntesis y corchetes que puede tener una expresión generada
+_max_nesting = 100
+
+# Variables asignadas dentro del texto de una expresión
+_assigned = re.compile(r'\b([lg]_\w+) :=')
+
+
+def _failed_index(exc):
+    # Cada acceso a un arreglo guarda su índice en _ix justo antes de
+    # indexar, así que el del acceso que falló es el _ix del marco más
+    # interno (una función generada o una auxiliar)
+    tb = exc.__traceback__
+    while tb.tb_next:
+        tb = tb.tb_next
+    return tb.tb_frame.f_locals['_ix']
+
+
+class PyModule:
+    recursion_limit = 100_000
+
+    def __init__(self, source, main):
+        self.source = source    # texto de Python generado
+        self.main   = main      # nombre de la función main (o None)
+        self.code   = compile(source, '<minic>', 'exec')
+
+    def run(self):
+        if self.main is None:
+            raise RunError("El programa no tiene función 'main'")
+        # Cada ejecución usa un módulo nuevo con las globales en cero
+        module = types.ModuleType('minic')
+        vars(module).update(_runtime)
+        exec(self.code, vars(module))
+
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(max(limit, self.recursion_limit))
+        try:
+            return getattr(module, self.main)()
+        except ZeroDivisionError:
+            raise RunError("División por cero")
+        except IndexError as e:
+            raise RunError(f"Índice {_failed_index(e)} fuera de rango")
+        except TypeError:
+            raise RunError("Arreglo no inicializado")
+        except OverflowError:
+            raise RunError("Valor fuera del rango del arreglo")
+        except RecursionError:
+            raise RunError("Recursión demasiado profunda")
+        finally:
+            sys.setrecursionlimit(limit)
+
+
+class PyCompiler(Visitor):
+    '''
+    Genera el código de Python de un Program verificado. Las
+    expresiones retornan su texto; las sentencias agregan líneas.
+    '''
+
+    @classmethod
+    def compile(cls, n: Program):
+        compiler = cls()
+        n.accept(compiler)
+        return PyModule('\n'.join(compiler.lines) + '\n', compiler.main)
+
+    def __init__(self):
+        self.lines   = []
+        self.indent  = ''
+        self.scope   = SymbolTable()
+        self.gnames  = []       # nombres de Python de las globales
+        self.locals  = None     # nombres de Python usados en la función actual
+        self.temps   = 0
+        self.helpers = None     # líneas de cada auxiliar de la función actual
+        self.effects = 0        # asignaciones y llamadas generadas hasta ahora
+        self.main    = None
+
+    def emit(self, line):
+        self.lines.append(self.indent + line)
+
+    def name(self, ident):
+        return self.scope.lookup_symbol(ident)
+
+    def temp(self):
+        self.temps += 1
+        return f'_t{self.temps}'
+
+    def nested(self, expr):
+        '''
+        Texto de la expresión o, si anida demasiados paréntesis, la
+        llamada a una auxiliar que la calcula
+        '''
+        if expr.count('(') + expr.count('[') <= _max_nesting:
+            return expr
+        name = f'_e{len(self.helpers) + 1}'
+        assigned = set(_assigned.findall(expr))
+        local = sorted(v for v in assigned if v.startswith('l_'))
+        glob  = sorted(assigned.difference(local))
+        lines = [f'def {name}():']
+        if local:
+            lines.append(f'    nonlocal {", ".join(local)}')
+        if glob:
+            lines.append(f'    global {", ".join(glob)}')
+        lines.append(f'    return {expr}')
+        self.helpers.append(lines)
+        return f'{name}()'
+
+    def index(self, expr):
+        '''
+        Texto del índice con la verificación de índices negativos. El
+        índice queda en _ix para el mensaje de error si está fuera de rango
+        '''
+        if expr.isdigit():
+            return f'(_ix := {expr})'
+        return f'_ix if (_ix := {expr}) >= 0 else bad_index(_ix)'
+
+    # -----------------------------------------------------------------
+    # Declaraciones
+    # -----------------------------------------------------------------
+    def visit(self, n: Program):
+        for decl in n.decls:
+            yield decl
+
+    def visit(self, n: VarDeclStmt):
+        value = None if n.is_array else zero_values[n.type_spec]
+        if self.locals is None:
+            name = f'g_{n.ident}'
+            self.scope.add_symbol(n.ident, name)
+            self.gnames.append(name)
+        else:
+            name = self.add_local(n.ident)
+        self.emit(f'{name} = {value!r}')
+
+    def add_local(self, ident):
+        # Un bloque anidado puede declarar otra vez el mismo nombre
+        name = f'l_{ident}'
+        count = 0
+        while name in self.locals:
+            count += 1
+            name = f'l_{ident}_{count}'
+        self.locals.add(name)
+        self.scope.add_symbol(ident, name, 'local')
+        return name
+
+    def visit(self, n: FuncDeclStmt):
+        fname = f'f_{n.name}'
+        self.scope.add_symbol(n.name, fname)
+        if n.name == 'main':
+            self.main = fname
+
+        self.scope.enter_scope()
+        self.locals = set()
+        self.temps = 0
+        self.helpers = []
+        params = [self.add_local(p.ident) for p in n.params]
+
+        self.emit(f'def {fname}({", ".join(params)}):')
+        self.indent = '    '
+        if self.gnames:
+            self.emit(f'global {", ".join(self.gnames)}')
+        start = len(self.lines)
+        yield n.body
+        self.emit(f'return {zero_values.get(n.return_type)!r}')
+        self.indent = ''
+        self.emit('')
+        self.lines[start:start] = ['    ' + line for lines in self.helpers for line in lines]
+
+        self.locals = None
+        self.helpers = None
+        self.scope.exit_scope()
+
+    # -----------------------------------------------------------------
+    # Sentencias
+    # -----------------------------------------------------------------
+    def visit(self, n: CompoundStmt):
+        self.scope.enter_scope()
+        for decl in n.local_decls:
+            yield decl
+        for stmt in n.stmt_list:
+            yield stmt
+        self.scope.exit_scope()
+
+    def block(self, n: Statement):
+        # Cuerpo indentado de if/else/while; 'pass' si no genera líneas
+        outer = self.indent
+        start = len(self.lines)
+        self.indent = outer + '    '
+        yield n
+        if len(self.lines) == start:
+            self.emit('pass')
+        self.indent = outer
+
+    def visit(self, n: ExprStmt):
+        expr = n.expr
+        if isinstance(expr, VarAssignmentExpr):
+            value = yield expr.expr
+            self.emit(f'{self.name(expr.ident)} = {value}')
+        elif isinstance(expr, ArrayAssignmentExpr):
+            effects = self.effects
+            index = yield expr.index
+            value = yield expr.expr
+            if self.effects != effects and not index.isdigit():
+                # Python evalúa el valor antes que el índice; si alguno de
+                # los dos puede cambiar una variable el índice se calcula antes
+                t = self.temp()
+                self.emit(f'{t} = {index}')
+                index = t
+            self.emit(f'{self.name(expr.ident)}[{self.index(index)}] = {value}')
+        else:
+            self.emit((yield expr))
+
+    def visit(self, n: NullStmt):
+        pass
+
+    def visit(self, n: IfStmt):
+        self.emit(f'if {(yield n.condition)}:')
+        yield from self.block(n.then_stmt)
+        if n.else_stmt:
+            self.emit('else:')
+            yield from self.block(n.else_stmt)
+
+    def visit(self, n: WhileStmt):
+        self.emit(f'while {(yield n.condition)}:')
+        yield from self.block(n.body)
+
+    def visit(self, n: BreakStmt):
+        self.emit('break')
+
+    def visit(self, n: ContinueStmt):
+        self.emit('continue')
+
+    def visit(self, n: ReturnStmt):
+        if n.expr:
+            self.emit(f'return {(yield n.expr)}')
+        else:
+            self.emit('return None')
+
+    # -----------------------------------------------------------------
+    # Expresiones
+    # -----------------------------------------------------------------
+    def visit(self, n: ConstExpr):
+        value = n.value
+        if isinstance(value, float) and not math.isfinite(value):
+            # repr() da inf o nan, que no son literales de Python
+            return f"float('{value}')"
+        return repr(value)
+
+    def visit(self, n: VarExpr):
+        return self.name(n.ident)
+
+    def visit(self, n: VarAssignmentExpr):
+        value = yield n.expr
+        self.effects += 1
+        return self.nested(f'({self.name(n.ident)} := {value})')
+
+    def visit(self, n: ArrayLookupExpr):
+        index = yield n.index
+        return self.nested(f'{self.name(n.ident)}[{self.index(index)}]')
+
+    def visit(self, n: ArrayAssignmentExpr):
+        index = yield n.index
+        value = yield n.expr
+        self.effects += 1
+        return self.nested(f'astore_value({index}, {value}, {self.name(n.ident)})')
+
+    def visit(self, n: ArraySizeExpr):
+        return f'len({self.name(n.ident)})'
+
+    def visit(self, n: NewArrayExpr):
+        return self.nested(f'new_array({n._type!r}, {(yield n.expr)})')
+
+    def visit(self, n: IntToFloatExpr):
+        return self.nested(f'float({(yield n.expr)})')
+
+    def visit(self, n: UnaryOpExpr):
+        expr = yield n.expr
+        if n.opr == '!':
+            return self.nested(f'(not {expr})')
+        if n.opr == '-':
+            return self.nested(f'(-{expr})')
+        return expr
+
+    def visit(self, n: BinaryOpExpr):
+        left = yield n.left
+        right = yield n.right
+        if n.opr == '/' and n.type == 'int':
+            return self.nested(f'idiv({left}, {right})')
+        if n.opr == '%':
+            return self.nested(f'imod({left}, {right})')
+        return self.nested(f'({left} {_binops.get(n.opr, n.opr)} {right})')
+
+    def visit(self, n: CallExpr):
+        args = [ ]
+        for arg in n.args:
+            args.append((yield arg))
+        self.effects += 1
+        if n.ident == 'scanf':
+            # scanf(x) es una asignación: x = iread()
+            return f'(({args[0]} := iread()), None)[1]'
+        if n.ident in ('printf', 'iread'):
+            return self.nested(f'{n.ident}({", ".join(args)})')
+        return self.nested(f'{self.name(n.ident)}({", ".join(args)})')
@@ -0,0 +1,100 @@
+# mcruntime.py
+'''
+Soporte en tiempo de ejecución para Mini-C++
+--------------------------------------------
+
+Funciones predefinidas (printf, scanf, iread), acceso a arreglos con
+verificación de rango y las operaciones cuya semántica en C difiere de
+la de Python (división y módulo enteros).
+
+Los arreglos (new T[n]) son array.array del módulo estándar: los
+elementos se guardan contiguos, sin un objeto de Python por elemento
+(8 bytes por int o float y 1 por bool), y el tamaño es len(). Un int que
+no cabe en 64 bits no se puede guardar en un arreglo int[].
+'''
+from array import array
+import sys
+
+
+class RunError(Exception):
+    pass
+
+
+def idiv(a, b):
+    '''
+    División entera de C (trunca hacia cero).
+    '''
+    if b == 0:
+        raise RunError("División entera por cero")
+    q = a // b
+    if q < 0 and q * b != a:
+        q += 1
+    return q
+
+
+def imod(a, b):
+    '''
+    Módulo entero de C (el signo sigue al dividendo).
+    '''
+    return a - b * idiv(a, b)
+
+
+# Valor inicial de una variable según su tipo
+zero_values = {
+    'int'  : 0,
+    'float': 0.0,
+    'bool' : False,
+}
+
+
+# Código de tipo de array para cada tipo de elemento
+buffer_types = {
+    'int'  : 'q',
+    'float': 'd',
+    'bool' : 'b',
+}
+
+
+def new_array(type_spec, size):
+    if size < 0:
+        raise RunError(f"Tamaño de arreglo negativo: {size}")
+    code = buffer_types[type_spec]
+    # bytes() en cero evita crear una lista intermedia de n elementos
+    return array(code, bytes(size * array(code).itemsize))
+
+
+def check_array(arr):
+    if arr is None:
+        raise RunError("Arreglo no inicializado")
+    return arr
+
+
+def aload(arr, index):
+    if index < 0 or index >= len(check_array(arr)):
+        raise RunError(f"Índice {index} fuera de rango")
+    return arr[index]
+
+
+def astore(arr, index, value):
+    if index < 0 or index >= len(check_array(arr)):
+        raise RunError(f"Índice {index} fuera de rango")
+    try:
+        arr[index] = value
+    except OverflowError:
+        raise RunError("Valor fuera del rango del arreglo")
+
+
+def printf(fmt, *args):
+    try:
+        sys.stdout.write(fmt % args)
+    except (TypeError, ValueError) as e:
+        raise RunError(f"printf: {e}")
+
+
+def iread():
+    try:
+        return int(input())
+    except ValueError as e:
+        raise RunError(f"iread: {e}")
+    except EOFError:
+        raise RunError("iread: fin de la entrada")
@@ -0,0 +1,207 @@
+# mcvm.py
+'''
+Máquina Virtual de Pila
+-----------------------
+
+Ejecuta el bytecode generado por mcbytecode.py.
+
+Todas las funciones comparten una única pila de operandos. Una llamada
+toma sus argumentos del tope de la pila y los copia a los primeros
+slots locales del nuevo marco; los marcos se guardan en una lista
+explícita, así que la recursión del programa no consume la pila de
+Python.
+'''
+from .mcbytecode import *
+from .mcruntime  import RunError, idiv, imod, new_array, printf, iread, check_array, aload, astore
+
+
+class VM:
+
+    def __init__(self):
+        self.globals = []
+
+    def run(self, module: Module):
+        '''
+        Inicializa las variables globales y ejecuta main.
+        '''
+        if module.main is None:
+            raise RunError("El programa no tiene función 'main'")
+        self.module = module
+        self.globals = list(module.globals)
+        return self.execute(module.functions[module.main], [])
+
+    def execute(self, func: Function, args):
+        # Los opcodes se copian a variables locales para que el ciclo
+        # de despacho no haga búsquedas en el diccionario de globales
+        _CONST, _LOAD_LOCAL, _STORE_LOCAL = CONST, LOAD_LOCAL, STORE_LOCAL
+        _LOAD_GLOBAL, _STORE_GLOBAL, _DUP, _POP = LOAD_GLOBAL, STORE_GLOBAL, DUP, POP
+        _ADD, _SUB, _MUL, _DIV, _IDIV, _IMOD = ADD, SUB, MUL, DIV, IDIV, IMOD
+        _LT, _LE, _GT, _GE, _EQ, _NE = LT, LE, GT, GE, EQ, NE
+        _NEG, _NOT, _TO_FLOAT = NEG, NOT, TO_FLOAT
+        _JUMP, _JUMP_IF_FALSE, _JUMP_IF_TRUE = JUMP, JUMP_IF_FALSE, JUMP_IF_TRUE
+        _JUMP_IF_FALSE_OR_POP, _JUMP_IF_TRUE_OR_POP = JUMP_IF_FALSE_OR_POP, JUMP_IF_TRUE_OR_POP
+        _CALL, _RETURN = CALL, RETURN
+        _NEW_ARRAY, _ALOAD, _ASTORE, _ALEN = NEW_ARRAY, ALOAD, ASTORE, ALEN
+        _PRINTF, _IREAD = PRINTF, IREAD
+        _ADD_LOCAL, _SUB_LOCAL, _MUL_LOCAL = ADD_LOCAL, SUB_LOCAL, MUL_LOCAL
+        _ADD_CONST, _SUB_CONST, _MUL_CONST = ADD_CONST, SUB_CONST, MUL_CONST
+
+        functions = self.module.functions
+        gvars = self.globals
+        codes = [_code(f) for f in functions]
+
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        frames = []
+
+        code = _code(func)
+        consts = func.consts
+        lvars = list(args) + func.locals[len(args):]
+        pc = 0
+
+        # El orden de las comparaciones sigue la frecuencia de cada opcode
+        # en programas numéricos (ver bench/bench_vm.py)
+        while True:
+            op, arg = code[pc]
+            pc += 1
+
+            if op == _LOAD_LOCAL:
+                push(lvars[arg])
+            elif op == _MUL_LOCAL:
+                stack[-1] *= lvars[arg]
+            elif op == _STORE_LOCAL:
+                lvars[arg] = pop()
+            elif op == _CONST:
+                push(consts[arg])
+            elif op == _ADD_LOCAL:
+                stack[-1] += lvars[arg]
+            elif op == _SUB_LOCAL:
+                stack[-1] -= lvars[arg]
+            elif op == _ADD_CONST:
+                stack[-1] += consts[arg]
+            elif op == _SUB_CONST:
+                stack[-1] -= consts[arg]
+            elif op == _MUL_CONST:
+                stack[-1] *= consts[arg]
+            elif op == _MUL:
+                b = pop()
+                stack[-1] *= b
+            elif op == _ADD:
+                b = pop()
+                stack[-1] += b
+            elif op == _SUB:
+                b = pop()
+                stack[-1] -= b
+            elif op == _JUMP_IF_TRUE:
+                if pop():
+                    pc = arg
+            elif op == _JUMP_IF_FALSE:
+                if not pop():
+                    pc = arg
+            elif op == _GT:
+                b = pop()
+                stack[-1] = stack[-1] > b
+            elif op == _LT:
+                b = pop()
+                stack[-1] = stack[-1] < b
+            elif op == _GE:
+                b = pop()
+                stack[-1] = stack[-1] >= b
+            elif op == _LE:
+                b = pop()
+                stack[-1] = stack[-1] <= b
+            elif op == _EQ:
+                b = pop()
+                stack[-1] = stack[-1] == b
+            elif op == _NE:
+                b = pop()
+                stack[-1] = stack[-1] != b
+            elif op == _LOAD_GLOBAL:
+                push(gvars[arg])
+            elif op == _STORE_GLOBAL:
+                gvars[arg] = pop()
+            elif op == _JUMP:
+                pc = arg
+            elif op == _DIV:
+                b = pop()
+                try:
+                    stack[-1] /= b
+                except ZeroDivisionError:
+                    raise RunError("División por cero")
+            elif op == _IDIV:
+                b = pop()
+                stack[-1] = idiv(stack[-1], b)
+            elif op == _IMOD:
+                b = pop()
+                stack[-1] = imod(stack[-1], b)
+            elif op == _NEG:
+                stack[-1] = -stack[-1]
+            elif op == _NOT:
+                stack[-1] = not stack[-1]
+            elif op == _TO_FLOAT:
+                stack[-1] = float(stack[-1])
+            elif op == _DUP:
+                push(stack[-1])
+            elif op == _POP:
+                pop()
+            elif op == _JUMP_IF_FALSE_OR_POP:
+                if stack[-1]:
+                    pop()
+                else:
+                    pc = arg
+            elif op == _JUMP_IF_TRUE_OR_POP:
+                if stack[-1]:
+                    pc = arg
+                else:
+                    pop()
+            elif op == _CALL:
+                callee = functions[arg]
+                frames.append((code, consts, lvars, pc))
+                nparams = callee.nparams
+                if nparams:
+                    lvars = stack[-nparams:]
+                    del stack[-nparams:]
+                    lvars += callee.locals[nparams:]
+                else:
+                    lvars = callee.locals[:]
+                code = codes[arg]
+                consts = callee.consts
+                pc = 0
+            elif op == _RETURN:
+                if not frames:
+                    return pop()
+                code, consts, lvars, pc = frames.pop()
+            elif op == _ALOAD:
+                index = pop()
+                stack[-1] = aload(stack[-1], index)
+            elif op == _ASTORE:
+                arr = pop()
+                value = pop()
+                astore(arr, pop(), value)
+                if arg:
+                    push(value)
+            elif op == _ALEN:
+                stack[-1] = len(check_array(stack[-1]))
+            elif op == _NEW_ARRAY:
+                stack[-1] = new_array(array_types[arg], stack[-1])
+            elif op == _PRINTF:
+                args = stack[-arg:]
+                del stack[-arg:]
+                printf(args[0], *args[1:])
+                push(None)
+            elif op == _IREAD:
+                push(iread())
+            else:
+                raise RunError(f"Opcode desconocido {op}")
+
+
+def _code(func: Function):
+    # La máquina ejecuta sobre una lista de tuplas (opcode, argumento):
+    # un solo acceso por instrucción en lugar de dos sobre el array('i')
+    code = getattr(func, '_code', None)
+    if code is None:
+        flat = func.code
+        code = func._code = list(zip(flat[::2], flat[1::2]))
+    return code
+
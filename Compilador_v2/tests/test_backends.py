@@ -0,0 +1,114 @@
+# test_backends.py
+'''
+Regresiones de los backends: cada programa se ejecuta con todos los
+backends de Context.backends, sin optimizar y con -O1, y su salida
+debe ser la indicada (la del intérprete del AST). El backend 'c' solo
+se prueba si hay un compilador de C.
+
+  python -m pytest tests          (o python -m unittest discover tests)
+'''
+from contextlib import redirect_stdout
+import io
+import sys
+import unittest
+
+from analizador_semantico.mcontext import Context
+from interprete.mcgenc   import find_compiler
+from interprete.mcpasses import PassManager
+
+# nombre -> (programa, salida esperada)
+_programs = {
+    # El arreglo se lee después del índice y del valor
+    'arreglo después del valor': ('''
+int a[];
+int f(void) { a = new int[3]; return 7; }
+int main(void) {
+  a = new int[2];
+  a[0] = f();
+  printf("%d\\n", a[0]);
+  return 0;
+}
+''', '7\n'),
+    'asignación como expresión': ('''
+int a[];
+int x;
+int f(void) { a = new int[3]; return 7; }
+int main(void) {
+  a = new int[2];
+  x = a[0] = f();
+  printf("%d %d\\n", x, a[0]);
+  return 0;
+}
+''', '7 7\n'),
+    'arreglo antes del índice': ('''
+int a[];
+int f(void) { a = new int[3]; return 1; }
+int main(void) {
+  a = new int[2];
+  a[1] = 5;
+  printf("%d\\n", a[f()]);
+  return 0;
+}
+''', '5\n'),
+    # Una función que termina sin return retorna el cero de su tipo
+    'retorno implícito': ('''
+int f(int n) { if (n > 0) return n; }
+float g(void) { ; }
+bool h(void) { ; }
+int main(void) { printf("%d %f %d\\n", f(0), g(), h()); return 0; }
+''', '0 0.000000 0\n'),
+    # Un literal que no cabe en un double es inf
+    'literal infinito': ('''
+int main(void) { float x; x = 1e400; printf("%f %f\\n", x, -x); return 0; }
+''', 'inf -inf\n'),
+    # x - 0.0 y x + (-0.0) son x, pero x - (-0.0) y x + 0.0 no con x = -0.0
+    'cero con signo': ('''
+int main(void) {
+  float x;
+  x = -0.0;
+  printf("%f %f %f %f\\n", x - 0.0, x + (-0.0), x - (-0.0), x + 0.0);
+  return 0;
+}
+''', '-0.000000 -0.000000 0.000000 0.000000\n'),
+    # El error de un índice fuera de rango dice el índice
+    'índice fuera de rango': ('''
+int a[];
+int b[];
+int main(void) {
+  a = new int[3];
+  b = new int[2];
+  b[1] = 7;
+  printf("%d\\n", a[b[0]] + a[b[1]]);
+  return 0;
+}
+''', 'Error de ejecución: Índice 7 fuera de rango\n'),
+}
+
+
+def run(source, backend, level):
+    ctx = Context(backend, PassManager.level(level))
+    out = io.StringIO()
+    stdin = sys.stdin
+    sys.stdin = io.StringIO('')
+    try:
+        with redirect_stdout(out):
+            ctx.parse(source)
+            ctx.run()
+    finally:
+        sys.stdin = stdin
+    return out.getvalue()
+
+
+class TestBackends(unittest.TestCase):
+
+    def test_programs(self):
+        backends = [b for b in Context.backends if b != 'c' or find_compiler()]
+        for name, (source, expected) in _programs.items():
+            for backend in backends:
+                for level in (0, 1):
+                    with self.subTest(name, backend=backend, level=level):
+                        self.assertEqual(run(source, backend, level), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
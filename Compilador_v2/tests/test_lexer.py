@@ -0,0 +1,82 @@
+# test_lexer.py
+'''
+Prueba diferencial: FastLexer debe producir exactamente los mismos
+tokens (type, value, lineno, index, end) y los mismos mensajes que el
+Lexer de sly.
+
+  python -m pytest tests          (o python -m unittest discover tests)
+'''
+from contextlib import redirect_stdout
+import glob
+import io
+import os
+import unittest
+
+from analizador_lexico.mclex     import Lexer
+from analizador_lexico.mcfastlex import FastLexer
+
+_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_edge_cases = {
+    'vacío'             : '',
+    'declaración'       : 'int x;',
+    'espacios'          : '\n\n\t  \n   x\n',
+    'flotantes'         : '1.5 0.25 3e10 2E-3 1.0e+5 0.0',
+    'mal formados'      : '007 00.5 0e5\nx 012 y',
+    'operadores'        : 'a && b || !c == d != e <= f >= g < h > i',
+    'arreglos'          : 'x.size new int[10] a[3] = 2;',
+    'palabras'          : 'iffy whileloop return1 truefalse true false',
+    'escapes'           : '"hola\\n" "tab\\t" "comillas \\"x\\"" "malo \\q" x',
+    'salto en cadena'   : 'a "uno\ndos" b\nc "x\n\ny" d\n"\n"\ne',
+    'salto en escape'   : '"malo \\q\n" x\ny',
+    'cadena sin cerrar' : 'int x;\n"sin cerrar\ny = 1;',
+    'comentarios'       : '// comentario\nint a; /* multi\nlinea\n*/ int b;',
+    'comentario final'  : 'a // comentario al final sin salto',
+    'comentario abierto': 'x\n/* sin cerrar\ny',
+    'caracteres malos'  : '@ # $ int ` x\n\\ ~ ^ & | y',
+    'malos en línea 3'  : 'a\nb\n? c ?',
+}
+
+
+def tokenize(lexer_cls, source):
+    out = io.StringIO()
+    with redirect_stdout(out):
+        tokens = [(t.type, t.value, t.lineno, t.index, t.end)
+                  for t in lexer_cls().tokenize(source)]
+    return tokens, out.getvalue()
+
+
+class TestFastLexer(unittest.TestCase):
+
+    def check(self, source):
+        expected_tokens, expected_output = tokenize(Lexer, source)
+        tokens, output = tokenize(FastLexer, source)
+        self.assertEqual(tokens, expected_tokens)
+        self.assertEqual(output, expected_output)
+
+    def test_examples(self):
+        files = sorted(glob.glob(os.path.join(_root, 'test', '*.mcc')))
+        self.assertTrue(files)
+        for fname in files:
+            with self.subTest(fname=os.path.basename(fname)):
+                with open(fname, encoding='utf-8') as f:
+                    self.check(f.read())
+
+    def test_edge_cases(self):
+        for name, source in _edge_cases.items():
+            with self.subTest(name):
+                self.check(source)
+
+    def test_initial_position(self):
+        # tokenize(text, lineno, index) como lo usa mcquery
+        source = 'int a;\n"x\ny" int b;\nfloat c;'
+        for start in (0, 7, 17):
+            with self.subTest(start=start):
+                expected = list(Lexer().tokenize(source, 5, start))
+                tokens = list(FastLexer().tokenize(source, 5, start))
+                self.assertEqual([(t.type, t.value, t.lineno, t.index, t.end) for t in tokens],
+                                 [(t.type, t.value, t.lineno, t.index, t.end) for t in expected])
+
+
+if __name__ == '__main__':
+    unittest.main()